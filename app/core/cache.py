@@ -0,0 +1,292 @@
+"""
+app/core/cache.py
+Cache read-through para as leituras quentes (performance/teatro por id,
+sessões por performance/teatro).
+
+- Backend "memory": LRU em processo com TTL e limite de entradas.
+- Backend "sqlite": arquivo local compartilhado pelos workers do mesmo host
+  (invalidação feita por um worker vale para todos).
+- Single-flight: misses simultâneos da mesma chave aguardam UMA única carga.
+- Invalidação por chave ou por prefixo, chamada pelos métodos de escrita dos
+  repositórios. Uma invalidação durante uma carga em andamento impede que o
+  valor (possivelmente antigo) seja gravado e desliga essa carga do
+  single-flight: quem chega depois da escrita faz uma carga nova.
+
+Valores em cache são compartilhados entre requisições: trate-os como imutáveis.
+"""
+import asyncio
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+_MISSING = object()
+
+
+class _LoadCancelled(Exception):
+    """A requisição dona da carga compartilhada foi cancelada no meio dela."""
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+
+class MemoryBackend:
+    """LRU com TTL. Operações O(1), exceto `delete_prefix` (O(n))."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    async def get(self, key: str) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return _MISSING
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """
+    Cache compartilhado entre processos via arquivo SQLite (WAL).
+    As chamadas bloqueantes rodam no thread pool.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+            " expires REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_accessed ON cache (accessed)")
+        self._lock = asyncio.Lock()
+
+    async def _run(self, fn, *args):
+        async with self._lock:
+            return await asyncio.to_thread(fn, *args)
+
+    def _get(self, key: str) -> Any:
+        row = self._conn.execute(
+            "SELECT value, expires FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return _MISSING
+        now = time.time()
+        if row[1] < now:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return _MISSING
+        self._conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        return pickle.loads(row[0])
+
+    def _set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now + ttl, now),
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        self._conn.execute("DELETE FROM cache WHERE expires < ?", (now,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+
+    def _delete_prefix(self, prefix: str) -> None:
+        # intervalo [prefix, prefix + U+FFFF) usa a PK em vez de LIKE
+        self._conn.execute(
+            "DELETE FROM cache WHERE key >= ? AND key < ?", (prefix, prefix + "\uffff")
+        )
+
+    async def get(self, key: str) -> Any:
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self._run(self._set, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await self._run(self._conn.execute, "DELETE FROM cache WHERE key = ?", (key,))
+
+    async def delete_prefix(self, prefix: str) -> None:
+        await self._run(self._delete_prefix, prefix)
+
+    async def clear(self) -> None:
+        await self._run(self._conn.execute, "DELETE FROM cache")
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+# ── Cache read-through ────────────────────────────────────────────────────────
+
+class ReadThroughCache:
+
+    def __init__(self, backend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self._epoch = 0  # incrementa a cada invalidação
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        ttl_for: Optional[Callable[[Any], float]] = None,
+    ) -> Any:
+        """
+        Valor em cache ou resultado de `loader()`. `None` não é cacheado.
+        `ttl_for(valor)` permite TTL por resultado (ex.: cache negativo mais curto).
+        """
+        if not self.enabled:
+            return await loader()
+
+        value = await self.backend.get(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except _LoadCancelled:
+                # o cliente que disparou a carga caiu: não derruba quem esperava
+                return await self.get_or_load(key, loader, ttl, ttl_for)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        epoch = self._epoch
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.set_exception(_LoadCancelled())
+            future.exception()  # marca como consumida se ninguém aguardava
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # marca como consumida se ninguém aguardava
+            raise
+        else:
+            future.set_result(value)
+            if value is not None and epoch == self._epoch:
+                if ttl_for is not None:
+                    ttl = ttl_for(value)
+                await self.backend.set(key, value, self.ttl if ttl is None else ttl)
+            return value
+        finally:
+            # uma invalidação pode já ter trocado a carga desta chave
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def invalidate(self, *keys: str) -> None:
+        if not self.enabled:
+            return
+        self._epoch += 1
+        self.invalidations += len(keys)
+        for key in keys:
+            self._inflight.pop(key, None)
+            await self.backend.delete(key)
+
+    async def invalidate_prefix(self, *prefixes: str) -> None:
+        if not self.enabled:
+            return
+        self._epoch += 1
+        self.invalidations += len(prefixes)
+        for key in [k for k in self._inflight if k.startswith(prefixes)]:
+            del self._inflight[key]
+        for prefix in prefixes:
+            await self.backend.delete_prefix(prefix)
+
+    async def clear(self) -> None:
+        self._epoch += 1
+        self._inflight.clear()
+        await self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.backend.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+def build_cache(
+    ttl: float,
+    max_entries: int,
+    sqlite_path: Optional[str] = None,
+    enabled: bool = True,
+) -> ReadThroughCache:
+    """Cache em memória, ou persistido em SQLite quando `sqlite_path` é dado."""
+    if sqlite_path:
+        backend = SQLiteBackend(sqlite_path, max_entries)
+    else:
+        backend = MemoryBackend(max_entries)
+    return ReadThroughCache(backend, ttl=ttl, enabled=enabled)
+
+
+def _build_cache() -> ReadThroughCache:
+    return build_cache(
+        ttl=settings.cache_ttl_seconds,
+        max_entries=settings.cache_max_entries,
+        sqlite_path=settings.cache_sqlite_path if settings.cache_backend == "sqlite" else None,
+        enabled=settings.cache_enabled,
+    )
+
+
+cache = _build_cache()
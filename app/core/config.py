@@ -1,10 +1,11 @@
 """
 app/core/config.py
-Centraliza toda leitura de variáveis de ambiente.
-Crie app/core/__init__.py vazio se não existir.
+Centraliza toda leitura de variáveis de ambiente (única fonte de settings:
+API, Mongo, SQL, caches, scripts).
 """
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -15,9 +16,64 @@ class Settings(BaseSettings):
     # MongoDB
     mongodb_uri: str = "mongodb://localhost:27017"
     mongodb_db: str = "theatersdb"
+    # Pool do cliente único (app/db/mongo.py), por processo/worker.
+    # min_pool_size conexões são abertas no startup (warmup).
+    mongodb_max_pool_size: int = 100
+    mongodb_min_pool_size: int = 5
+    # espera máxima por uma conexão livre do pool antes de falhar
+    mongodb_wait_queue_timeout_ms: int = 2_000
+    mongodb_server_selection_timeout_ms: int = 5_000
+    mongodb_connect_timeout_ms: int = 5_000
+    mongodb_max_idle_time_ms: int = 60_000
 
-    # SQL (SQLite por padrão para dev local)
-    database_url: str = "sqlite+aiosqlite:///./backstage.db"
+    # SQL (SQLite por padrão para dev local) — SQL_DATABASE_URL ou DATABASE_URL
+    sql_database_url: str = Field(
+        "sqlite+aiosqlite:///./backstage.db",
+        validation_alias=AliasChoices("sql_database_url", "database_url"),
+    )
+
+    # Cache read-through (app/core/cache.py)
+    # CACHE_BACKEND="memory" (por processo) ou "sqlite" (compartilhado no host)
+    cache_enabled: bool = True
+    cache_backend: str = "memory"
+    cache_ttl_seconds: float = 30.0
+    cache_max_entries: int = 10_000
+    cache_sqlite_path: str = "./cache.db"
+
+    # Consulta de CEP (routes/utils_address.py)
+    viacep_base_url: str = "https://viacep.com.br/ws"
+    zippopotam_base_url: str = "https://api.zippopotam.us"
+    zip_cache_ttl_seconds: float = 7 * 24 * 3600
+    zip_cache_negative_ttl_seconds: float = 3600
+    zip_cache_max_entries: int = 50_000
+    # defina para persistir o cache de CEP entre restarts (ex.: "./zip_cache.db")
+    zip_cache_sqlite_path: Optional[str] = None
+
+    # Cliente HTTP compartilhado (app/core/http.py)
+    http_timeout_seconds: float = 6.0
+    http_max_connections: int = 50
+    http_max_keepalive: int = 20
+
+    # Métricas Prometheus em GET /metrics (app/core/metrics.py)
+    metrics_enabled: bool = True
+
+    # Log de consultas lentas (app/core/slowlog.py); 0 desliga
+    slow_query_ms: float = 200.0
+    # fração das ocorrências lentas de um mesmo formato que roda explain
+    # (a primeira ocorrência sempre roda)
+    slow_query_explain_rate: float = 0.1
+
+    # Respostas rápidas (app/core/responses.py): true = valida a saída dos
+    # repos contra o response_model (dev/CI), false = orjson direto
+    validate_responses: bool = False
+
+    # Variantes de imagem (app/storage/derivatives.py) — processos do pool
+    media_workers: int = 2
+
+    # Jobs em background (app/core/jobs.py): workers por processo e por
+    # quanto tempo jobs concluídos ficam consultáveis em GET /jobs/{id}
+    jobs_workers: int = 2
+    jobs_ttl_seconds: int = 7 * 24 * 3600
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
@@ -0,0 +1,294 @@
+"""
+app/core/jobs.py
+Jobs em background para operações pesadas (expandir regras de vários anos,
+apagar milhares de sessões…), fora do ciclo da requisição.
+
+- Registro durável na coleção `jobs` do MongoDB: status, progresso,
+  resultado/erro. A rota responde 202 com o job e o cliente acompanha em
+  GET /jobs/{id}.
+- Pool limitado de workers asyncio no próprio processo (JOBS_WORKERS). Cada
+  worker reivindica o próximo job com um find_one_and_update atômico, então
+  vários processos/workers do uvicorn dividem a mesma fila sem rodar o mesmo
+  job duas vezes.
+- Lease renovado enquanto o job roda: se o processo morrer, o job volta a
+  ser elegível quando o lease vence (até MAX_ATTEMPTS tentativas). Por isso
+  os handlers precisam ser idempotentes (upserts, deletes por lote).
+- Jobs concluídos expiram por TTL (JOBS_TTL_SECONDS).
+
+Handlers são registrados por tipo:
+
+    @jobs.handler("sessions.rule")
+    async def expand(job: Job) -> dict:
+        for batch in ...:
+            ...
+            job.progress(done, total)
+        return {"inserted": n}
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bson import ObjectId
+from bson import errors as bson_errors
+from fastapi.responses import Response
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.core.responses import json_response
+from app.db.mongo import get_collection
+
+COLLECTION = "jobs"
+
+# intervalo entre gravações de progresso/renovações de lease de um job
+HEARTBEAT_SECONDS = 2.0
+# sem heartbeat por esse tempo, o job é considerado abandonado
+LEASE_SECONDS = 60.0
+# espera máxima de um worker ocioso antes de consultar a fila de novo
+# (jobs criados por outros processos não acordam este)
+POLL_SECONDS = 5.0
+MAX_ATTEMPTS = 3
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _to_out(doc: dict) -> dict:
+    return {
+        "id": str(doc["_id"]),
+        "kind": doc["kind"],
+        "status": doc["status"],
+        "params": doc.get("params") or {},
+        "progress": doc.get("progress") or {"done": 0, "total": None},
+        "result": doc.get("result"),
+        "error": doc.get("error"),
+        "attempts": doc.get("attempts", 0),
+        "created_at": doc.get("created_at"),
+        "started_at": doc.get("started_at"),
+        "finished_at": doc.get("finished_at"),
+    }
+
+
+def accepted(job: Dict[str, Any]) -> Response:
+    """202 Accepted com o job no corpo e `Location` para acompanhar."""
+    return json_response(job, status_code=202, headers={"Location": f"/jobs/{job['id']}"})
+
+
+class JobFailed(Exception):
+    """Falha prevista: o job termina `failed` com `error` e também `result`."""
+
+    def __init__(self, message: str, result: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.result = result
+
+
+class Job:
+    """O que o handler recebe: parâmetros do job e o registro de progresso."""
+
+    __slots__ = ("id", "kind", "params", "attempt", "done", "total")
+
+    def __init__(self, doc: dict):
+        self.id: ObjectId = doc["_id"]
+        self.kind: str = doc["kind"]
+        self.params: Dict[str, Any] = doc.get("params") or {}
+        # identifica esta execução: após um reclaim, a anterior não grava mais nada
+        self.attempt: int = doc.get("attempts", 0)
+        self.done = 0
+        self.total: Optional[int] = None
+
+    def progress(self, done: int, total: Optional[int] = None) -> None:
+        """Só atualiza em memória; o heartbeat grava no Mongo."""
+        self.done = done
+        if total is not None:
+            self.total = total
+
+
+Handler = Callable[[Job], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class JobRunner:
+    """Fila durável + pool de workers. Não é thread-safe (uso no event loop)."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._handlers: Dict[str, Handler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    def _col(self):
+        return get_collection(COLLECTION)
+
+    def handler(self, kind: str) -> Callable[[Handler], Handler]:
+        def register(fn: Handler) -> Handler:
+            self._handlers[kind] = fn
+            return fn
+        return register
+
+    async def ensure_indexes(self) -> None:
+        col = self._col()
+        # reivindicação: próximo job elegível em ordem de criação
+        await col.create_index([("status", 1), ("created_at", 1)], name="status_1_created_at_1")
+        await col.create_index(
+            "finished_at", name="finished_at_ttl",
+            expireAfterSeconds=settings.jobs_ttl_seconds,
+        )
+
+    # ── API ───────────────────────────────────────────────────────────────────
+
+    async def submit(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Grava o job como `queued` e acorda os workers. `params` deve ser BSON."""
+        if kind not in self._handlers:
+            raise ValueError(f"tipo de job desconhecido: {kind}")
+        doc = {
+            "kind": kind,
+            "params": params,
+            "status": QUEUED,
+            "progress": {"done": 0, "total": None},
+            "attempts": 0,
+            "created_at": _now(),
+        }
+        await self._col().insert_one(doc)
+        self._wakeup.set()
+        return _to_out(doc)
+
+    async def get(self, id: str) -> Optional[Dict[str, Any]]:
+        try:
+            oid = ObjectId(id)
+        except (bson_errors.InvalidId, TypeError):
+            raise ValueError(f"id inválido: {id!r}")
+        doc = await self._col().find_one({"_id": oid})
+        return _to_out(doc) if doc else None
+
+    # ── Ciclo de vida ─────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancela os workers; jobs interrompidos voltam para a fila."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ── Workers ───────────────────────────────────────────────────────────────
+
+    async def _claim(self) -> Optional[dict]:
+        now = _now()
+        return await self._col().find_one_and_update(
+            {
+                "kind": {"$in": list(self._handlers)},
+                "$or": [
+                    {"status": QUEUED},
+                    {"status": RUNNING, "lease_until": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "started_at": now,
+                    "lease_until": now + timedelta(seconds=LEASE_SECONDS),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _worker(self) -> None:
+        while True:
+            # limpa antes de consultar: um submit durante o _claim não se perde
+            self._wakeup.clear()
+            try:
+                doc = await self._claim()
+            except Exception as e:
+                logger.warning("fila de jobs indisponível: %s", e)
+                doc = None
+            if doc is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(doc)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # o lease vence e o job volta a ser elegível; o worker segue vivo
+                logger.exception("erro ao registrar o job %s", doc["_id"])
+
+    def _owned(self, job: Job) -> Dict[str, Any]:
+        """Filtro que só casa enquanto esta execução ainda é a dona do job."""
+        return {"_id": job.id, "status": RUNNING, "attempts": job.attempt}
+
+    async def _heartbeat(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            try:
+                await self._col().update_one(
+                    self._owned(job),
+                    {"$set": {
+                        "progress": {"done": job.done, "total": job.total},
+                        "lease_until": _now() + timedelta(seconds=LEASE_SECONDS),
+                    }},
+                )
+            except Exception as e:
+                # o próximo heartbeat tenta de novo; o lease tem folga
+                logger.warning("heartbeat do job %s falhou: %s", job.id, e)
+
+    async def _finish(self, job: Job, status: str, **fields: Any) -> None:
+        result = await self._col().update_one(
+            self._owned(job),
+            {
+                "$set": {
+                    "status": status,
+                    "progress": {"done": job.done, "total": job.total},
+                    "finished_at": _now(),
+                    **fields,
+                },
+                "$unset": {"lease_until": ""},
+            },
+        )
+        if not result.matched_count:
+            logger.warning("job %s foi retomado por outro worker; resultado descartado", job.id)
+
+    async def _run(self, doc: dict) -> None:
+        job = Job(doc)
+        if doc["attempts"] > MAX_ATTEMPTS:
+            await self._finish(job, FAILED, error=f"abandonado após {MAX_ATTEMPTS} tentativas")
+            return
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            result = await self._handlers[job.kind](job)
+        except asyncio.CancelledError:
+            # shutdown: devolve à fila sem gastar tentativa
+            await asyncio.shield(self._col().update_one(
+                self._owned(job),
+                {"$set": {"status": QUEUED}, "$inc": {"attempts": -1}, "$unset": {"lease_until": ""}},
+            ))
+            raise
+        except JobFailed as e:
+            await self._finish(job, FAILED, error=str(e), result=e.result)
+        except Exception as e:
+            logger.exception("job %s (%s) falhou", job.id, job.kind)
+            await self._finish(job, FAILED, error=f"{type(e).__name__}: {e}")
+        else:
+            await self._finish(job, SUCCEEDED, result=result)
+        finally:
+            heartbeat.cancel()
+
+
+# Runner do processo (iniciado no lifespan, ver main.py)
+jobs = JobRunner(workers=settings.jobs_workers)
@@ -0,0 +1,293 @@
+"""
+app/core/metrics.py
+Métricas em processo expostas em GET /metrics (formato texto do Prometheus),
+sem dependência externa.
+
+Fontes:
+- MetricsMiddleware (ASGI): latência, tamanho da resposta e total por rota
+  (o template da rota, ex. "/performances/{id}" — nunca o path cru, para não
+  explodir a cardinalidade) e requisições em andamento.
+- MongoCommandMetrics (pymongo CommandListener): duração de cada comando por
+  coleção e operação (registrado no cliente de app/db/mongo.py).
+- instrument_engine: hooks before/after_cursor_execute do SQLAlchemy.
+
+Cada observação custa um bisect + alguns incrementos sob um lock sem
+contenção (os listeners do Mongo rodam nas threads do Motor). Overhead
+medido em: python -m scripts.bench_metrics
+
+Com vários workers cada processo tem seus contadores; o Prometheus agrega
+por instância. METRICS_ENABLED=false desliga toda a instrumentação.
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+# ── Tipos de métrica ──────────────────────────────────────────────────────────
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_labels(self.label_names, k)} {_fmt(v)}" for k, v in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), collect: Callable[[], float] = None):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._collect = collect
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def render(self) -> List[str]:
+        if self._collect is not None:
+            items = [((), self._collect())]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_labels(self.label_names, k)} {_fmt(v)}" for k, v in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # labels → [contagem por bucket (não cumulativa) + overflow, soma, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, (list(s[0]), s[1], s[2])) for k, s in self._series.items()]
+        lines = self._header()
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_fmt(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {n}")
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "Requisições HTTP concluídas.", ("method", "route", "status"),
+))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP.", ("method", "route"),
+))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Tamanho do corpo das respostas HTTP.", ("method", "route"),
+    buckets=SIZE_BUCKETS,
+))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requisições HTTP em andamento.",
+))
+mongo_latency = registry.register(Histogram(
+    "mongo_command_duration_seconds", "Duração dos comandos MongoDB.",
+    ("collection", "command"), buckets=DB_BUCKETS,
+))
+mongo_failures = registry.register(Counter(
+    "mongo_command_failures_total", "Comandos MongoDB que falharam.", ("collection", "command"),
+))
+sql_latency = registry.register(Histogram(
+    "sql_query_duration_seconds", "Duração das queries SQL.", ("operation",), buckets=DB_BUCKETS,
+))
+sql_failures = registry.register(Counter(
+    "sql_query_failures_total", "Queries SQL que falharam.", ("operation",),
+))
+
+
+# ── HTTP (ASGI) ───────────────────────────────────────────────────────────────
+
+class MetricsMiddleware:
+    """Middleware ASGI puro (sem BaseHTTPMiddleware: não bufferiza o corpo)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            route = scope.get("route")
+            # rotas não encontradas viram um único rótulo
+            path = getattr(route, "path", None) or "<unmatched>"
+            method = scope["method"]
+            http_requests.inc(method, path, str(status))
+            http_latency.observe(elapsed, method, path)
+            http_response_size.observe(size, method, path)
+
+
+# ── MongoDB ───────────────────────────────────────────────────────────────────
+
+# campo que traz a coleção nos comandos de cursor; nos demais (find, insert,
+# killCursors…) ela é o valor do próprio comando
+_COLLECTION_FIELD = {"getMore": "collection"}
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Duração por (coleção, comando). O nome da coleção só vem no evento
+    `started`, então fica guardado até o `succeeded`/`failed` correspondente.
+    """
+
+    def __init__(self):
+        self._collections: Dict[Tuple[int, object], str] = {}
+
+    @staticmethod
+    def _key(event) -> Tuple[int, object]:
+        return (event.request_id, event.connection_id)
+
+    def started(self, event) -> None:
+        field = _COLLECTION_FIELD.get(event.command_name, event.command_name)
+        target = event.command.get(field)
+        collection = target if isinstance(target, str) else "-"
+        self._collections[self._key(event)] = collection
+
+    def succeeded(self, event) -> None:
+        collection = self._collections.pop(self._key(event), "-")
+        mongo_latency.observe(event.duration_micros / 1e6, collection, event.command_name)
+
+    def failed(self, event) -> None:
+        collection = self._collections.pop(self._key(event), "-")
+        mongo_latency.observe(event.duration_micros / 1e6, collection, event.command_name)
+        mongo_failures.inc(collection, event.command_name)
+
+
+# ── SQLAlchemy ────────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=1024)
+def _operation(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "-"
+
+
+def instrument_engine(engine) -> None:
+    """Registra os hooks de timing no engine (aceita AsyncEngine)."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    # o início fica no ExecutionContext da própria execução
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is not None:
+            sql_latency.observe(time.perf_counter() - started, _operation(statement))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        sql_failures.inc(_operation(exception_context.statement or ""))
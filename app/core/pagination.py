@@ -0,0 +1,46 @@
+"""
+app/core/pagination.py
+Cursores opacos para paginação keyset (`?after=<cursor>`).
+
+O cursor é a chave de ordenação do último item da página + id de desempate,
+serializado em Extended JSON (preserva datetime/ObjectId) e codificado em
+base64url. A próxima página é devolvida no header `X-Next-Cursor`.
+"""
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Sequence
+
+from bson import json_util
+from bson.errors import BSONError
+from bson.json_util import JSONOptions
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+_JSON_OPTIONS = JSONOptions(tz_aware=True)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json_util.dumps(list(values), json_options=_JSON_OPTIONS)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """Decodifica um cursor com `size` valores. Levanta ValueError se inválido."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        values = json_util.loads(raw, json_options=_JSON_OPTIONS)
+    except (binascii.Error, UnicodeError, ValueError, TypeError, json.JSONDecodeError, BSONError):
+        raise ValueError("cursor inválido")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("cursor inválido")
+    return values
+
+
+def next_cursor(items: Sequence[dict], limit: int, *keys: str) -> Optional[str]:
+    """Cursor da página seguinte, ou None se esta página veio incompleta."""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor([last[k] for k in keys])
@@ -0,0 +1,95 @@
+"""
+app/core/responses.py
+Caminho rápido de serialização JSON.
+
+Os repositórios já devolvem dicts no formato público (mesmas chaves e aliases
+do `response_model`). Nas listagens grandes as rotas retornam
+`json_response(items)`, que codifica esses dicts direto com orjson — sem a
+segunda validação Pydantic + jsonable_encoder + json.dumps que o FastAPI faz
+quando a rota devolve dados crus. O `response_model` continua na rota só para
+o OpenAPI.
+
+Com `VALIDATE_RESPONSES=true` (dev/CI) a saída passa por um TypeAdapter
+pré-compilado do model (valida e serializa num único passe do pydantic-core),
+para pegar divergências entre o repo e o schema.
+
+Benchmark: python -m scripts.bench_serialization
+"""
+import json
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, List, Mapping, Optional, Type
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; cai no json da stdlib
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if orjson is None and isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"{type(obj).__name__} não é serializável em JSON")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=_OPTIONS)
+else:
+    def dumps(content: Any) -> bytes:
+        return json.dumps(
+            content, default=_default, ensure_ascii=False, separators=(",", ":")
+        ).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse codificada com orjson (classe padrão do app)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def adapter_for(model: Type[BaseModel], many: bool = False) -> TypeAdapter:
+    """TypeAdapter compilado uma vez por (model, lista?)."""
+    return TypeAdapter(List[model] if many else model)
+
+
+def encode(
+    content: Any,
+    model: Optional[Type[BaseModel]] = None,
+    many: bool = False,
+) -> bytes:
+    if model is not None and settings.validate_responses:
+        adapter = adapter_for(model, many)
+        return adapter.dump_json(adapter.validate_python(content), by_alias=True)
+    return dumps(content)
+
+
+def json_response(
+    content: Any,
+    model: Optional[Type[BaseModel]] = None,
+    many: bool = True,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Resposta JSON para dados confiáveis dos repositórios. Headers setados no
+    `Response` injetado na rota não se aplicam aqui: passe-os em `headers`.
+    """
+    return Response(
+        encode(content, model, many),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
@@ -0,0 +1,359 @@
+"""
+app/core/slowlog.py
+Log de consultas lentas (Mongo e SQL) com captura de plano de execução.
+
+Todo comando Mongo ou statement SQL acima de SLOW_QUERY_MS é:
+- logado (warning) com o filtro/SQL, a duração, os documentos retornados e
+  os examinados (do último plano capturado para o formato, se houver);
+- agregado por "formato" (mesma consulta com valores diferentes = mesma
+  entrada: filtros com os valores trocados por "?", SQL já parametrizado);
+- amostrado (SLOW_QUERY_EXPLAIN_RATE, e sempre na primeira ocorrência) para
+  capturar o plano: `explain` com executionStats no Mongo (docs examinados ×
+  retornados, índice usado) e `EXPLAIN QUERY PLAN` no SQLite. O plano é
+  capturado depois, numa thread e conexão próprias: a requisição que já foi
+  lenta não paga mais uma consulta.
+
+Cobre todos os repositórios, pois os hooks ficam no cliente Mongo único
+(app/db/mongo.py) e no engine SQL (app/db/sql.py). Consulta em
+GET /admin/slow-queries. SLOW_QUERY_MS=0 desliga.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+from pymongo import monitoring
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_SAMPLE_CHARS = 2_000
+# comandos com plano de execução no Mongo
+_EXPLAINABLE = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+# chaves de sessão/protocolo que não fazem parte da consulta
+_PROTOCOL_KEYS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+
+# ── Normalização ──────────────────────────────────────────────────────────────
+
+def _shape(value: Any) -> Any:
+    """Troca valores por "?" mantendo chaves e operadores ($in, $gte…)."""
+    if isinstance(value, dict):
+        return {k: _shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(v, dict) for v in value):
+            return [_shape(v) for v in value]
+        return "?"
+    return "?"
+
+
+def _dumps(value: Any, limit: int = MAX_SAMPLE_CHARS) -> str:
+    text = json_util.dumps(value, ensure_ascii=False)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def _mongo_query(command: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """Parte do comando que descreve a consulta (filtro, sort, pipeline…)."""
+    if name == "find":
+        keys = ("filter", "sort", "projection", "limit", "skip")
+    elif name == "aggregate":
+        keys = ("pipeline",)
+    elif name in ("update", "delete"):
+        ops = command.get("updates") or command.get("deletes") or []
+        return {"q": ops[0].get("q", {})} if ops else {}
+    elif name == "findAndModify":
+        keys = ("query", "sort")
+    else:
+        keys = ("query", "key", "filter")
+    return {k: command[k] for k in keys if k in command}
+
+
+def _plan_summary(plan: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Cadeia de estágios do winningPlan, ex.: "LIMIT > FETCH > IXSCAN(idx)"."""
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage = f"{stage}({plan['indexName']})"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " > ".join(stages) or None
+
+
+def _winning_plan(explain: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    planner = explain.get("queryPlanner")
+    if planner is None:
+        # aggregate: o plano fica no estágio $cursor
+        for stage in explain.get("stages", []):
+            planner = stage.get("$cursor", {}).get("queryPlanner")
+            if planner:
+                break
+    if not planner:
+        return None
+    plan = planner.get("winningPlan", {})
+    return plan.get("queryPlan", plan)  # SBE (Mongo 7) aninha em queryPlan
+
+
+# ── Registro ──────────────────────────────────────────────────────────────────
+
+class SlowQueryLog:
+
+    def __init__(self, max_shapes: int = 500):
+        self.max_shapes = max_shapes
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    @property
+    def threshold_s(self) -> float:
+        return settings.slow_query_ms / 1000
+
+    def should_explain(self, store: str, shape: str) -> bool:
+        """
+        Sempre na primeira ocorrência (plan None); depois, ou se o explain
+        falhou (plan False), só por amostragem.
+        """
+        with self._lock:
+            entry = self._entries.get((store, shape))
+        return entry is None or entry["plan"] is None or random.random() < settings.slow_query_explain_rate
+
+    def explain_failed(self, store: str, shape: str) -> None:
+        """Tira o formato da fila "sempre explicar" (plan False = tentado e falhou)."""
+        with self._lock:
+            entry = self._entries.get((store, shape))
+            if entry is not None and entry["plan"] is None:
+                entry["plan"] = False
+
+    def record(
+        self,
+        store: str,
+        shape: str,
+        sample: str,
+        seconds: float,
+        returned: Optional[int] = None,
+    ) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            entry = self._entries.get((store, shape))
+            examined = entry["docs_examined"] if entry is not None else None
+        logger.warning(
+            "consulta lenta (%s) %.1f ms, retornados=%s examinados=%s: %s",
+            store, ms, "?" if returned is None else returned,
+            "?" if examined is None else examined, sample,
+        )
+        with self._lock:
+            entry = self._entries.get((store, shape))
+            if entry is None:
+                if len(self._entries) >= self.max_shapes:
+                    # descarta o formato menos relevante (menor pior caso)
+                    del self._entries[min(self._entries, key=lambda k: self._entries[k]["max_ms"])]
+                entry = self._entries[(store, shape)] = {
+                    "store": store,
+                    "shape": shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "docs_examined": None,
+                    "keys_examined": None,
+                    "docs_returned": None,
+                    "plan_summary": None,
+                    "plan": None,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += ms
+            entry["last_ms"] = ms
+            entry["last_seen"] = time.time()
+            entry["sample"] = sample
+            if ms >= entry["max_ms"]:
+                entry["max_ms"] = ms
+            if returned is not None:
+                entry["docs_returned"] = returned
+
+    def attach_plan(self, store: str, shape: str, plan: Any, summary: Optional[str], stats: Dict[str, Any]) -> None:
+        with self._lock:
+            entry = self._entries.get((store, shape))
+            if entry is None:
+                return
+            entry["plan"] = plan
+            entry["plan_summary"] = summary
+            entry.update({k: v for k, v in stats.items() if v is not None})
+
+    def top(self, n: int = 20, order_by: str = "max_ms") -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = [dict(e) for e in self._entries.values()]
+        for e in entries:
+            e["explain_failed"] = e["plan"] is False
+            if e["plan"] is False:
+                e["plan"] = None
+            e["avg_ms"] = round(e["total_ms"] / e["count"], 3)
+            e["total_ms"] = round(e["total_ms"], 3)
+            e["max_ms"] = round(e["max_ms"], 3)
+            e["last_ms"] = round(e["last_ms"], 3)
+        entries.sort(key=lambda e: e[order_by], reverse=True)
+        return entries[:n]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+slow_queries = SlowQueryLog()
+
+# explains (Mongo e SQL) rodam fora da thread do comando original, um por vez
+_explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slowlog-explain")
+
+
+# ── MongoDB ───────────────────────────────────────────────────────────────────
+
+class SlowMongoCommands(monitoring.CommandListener):
+    """
+    `sync_client` é o MongoClient síncrono por trás do Motor
+    (AsyncIOMotorClient.delegate), usado para rodar o explain numa thread
+    própria. Atribuído por app/db/mongo.py ao criar o cliente.
+    """
+
+    def __init__(self):
+        self.sync_client = None
+        self._started: Dict[Tuple[int, object], Any] = {}
+
+    @staticmethod
+    def _key(event) -> Tuple[int, object]:
+        return (event.request_id, event.connection_id)
+
+    def started(self, event) -> None:
+        if event.command_name == "explain":
+            return
+        self._started[self._key(event)] = event.command
+
+    def failed(self, event) -> None:
+        self._started.pop(self._key(event), None)
+
+    def succeeded(self, event) -> None:
+        command = self._started.pop(self._key(event), None)
+        if command is None or event.duration_micros / 1e6 < slow_queries.threshold_s:
+            return
+
+        name = event.command_name
+        collection = command.get(name)
+        query = _mongo_query(command, name)
+        shape = f"{name} {collection} {json.dumps(_shape(query))}"
+        returned = None
+        cursor = event.reply.get("cursor") if isinstance(event.reply, dict) else None
+        if cursor is not None:
+            returned = len(cursor.get("firstBatch", []))
+        slow_queries.record(
+            "mongo", shape, f"{name} {collection} {_dumps(query)}",
+            event.duration_micros / 1e6, returned,
+        )
+
+        if name in _EXPLAINABLE and self.sync_client is not None and slow_queries.should_explain("mongo", shape):
+            explain_cmd = {
+                k: v for k, v in command.items()
+                if not k.startswith("$") and k not in _PROTOCOL_KEYS
+            }
+            _explainer.submit(self._explain, event.database_name, shape, explain_cmd)
+
+    def _explain(self, database: str, shape: str, command: Dict[str, Any]) -> None:
+        try:
+            result = self.sync_client[database].command(
+                {"explain": command, "verbosity": "executionStats"}
+            )
+        except Exception as e:
+            logger.info("explain falhou para %s: %s", shape, e)
+            slow_queries.explain_failed("mongo", shape)
+            return
+        plan = _winning_plan(result)
+        stats = result.get("executionStats") or {}
+        slow_queries.attach_plan(
+            "mongo", shape,
+            json.loads(json_util.dumps(plan)) if plan else None,
+            _plan_summary(plan),
+            {
+                "docs_examined": stats.get("totalDocsExamined"),
+                "keys_examined": stats.get("totalKeysExamined"),
+                "docs_returned": stats.get("nReturned"),
+            },
+        )
+
+
+# ── SQL ───────────────────────────────────────────────────────────────────────
+
+def _explain_prefix(dialect: str) -> Optional[str]:
+    if dialect == "sqlite":
+        return "EXPLAIN QUERY PLAN "
+    if dialect == "postgresql":
+        return "EXPLAIN "
+    return None
+
+
+def _explain_engine(engine):
+    """
+    Engine síncrono para a mesma base, com o driver padrão do dialeto (o do
+    app pode ser async). Os parâmetros são repassados como vieram, então o
+    paramstyle precisa ser o mesmo.
+    """
+    from sqlalchemy import create_engine
+
+    twin = create_engine(engine.url.set(drivername=engine.dialect.name))
+    if twin.dialect.paramstyle != engine.dialect.paramstyle:
+        twin.dispose()
+        raise ValueError(f"paramstyle {twin.dialect.paramstyle} != {engine.dialect.paramstyle}")
+    return twin
+
+
+def instrument_engine(engine) -> None:
+    """Hooks de slow query no engine (aceita AsyncEngine)."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    prefix = _explain_prefix(sync_engine.dialect.name)
+    # criado sob demanda na thread do explainer; False = indisponível
+    explainer_engine: Any = None
+
+    def _explain(shape: str, statement: str, parameters: Any) -> None:
+        nonlocal explainer_engine
+        if explainer_engine is None:
+            try:
+                explainer_engine = _explain_engine(sync_engine)
+            except Exception as e:
+                logger.info("EXPLAIN de SQL desativado: %s", e)
+                explainer_engine = False
+        if explainer_engine is False:
+            slow_queries.explain_failed("sql", shape)
+            return
+        try:
+            with explainer_engine.connect() as conn:
+                rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+        except Exception as e:
+            logger.info("EXPLAIN falhou para %s: %s", shape, e)
+            slow_queries.explain_failed("sql", shape)
+            return
+        plan = [list(r) for r in rows]
+        summary = " | ".join(str(r[-1]) for r in rows)
+        slow_queries.attach_plan("sql", shape, plan, summary, {})
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slowlog_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slowlog_started", None)
+        if started is None or statement.lstrip().upper().startswith("EXPLAIN"):
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed < slow_queries.threshold_s:
+            return
+
+        shape = " ".join(statement.split())
+        sample = shape if executemany else f"{shape} -- {parameters!r}"
+        slow_queries.record("sql", shape, sample[:MAX_SAMPLE_CHARS], elapsed)
+
+        if prefix and not executemany and shape.upper().startswith(("SELECT", "WITH")) \
+                and slow_queries.should_explain("sql", shape):
+            _explainer.submit(_explain, shape, statement, parameters)
@@ -0,0 +1,49 @@
+"""
+app/core/streaming.py
+Respostas NDJSON (`Accept: application/x-ndjson`) geradas direto do cursor.
+
+Os itens já vêm dos repositórios no formato público (mesmos aliases do
+`response_model`) e são codificados com orjson, um por linha — ou validados
+pelo TypeAdapter do model com VALIDATE_RESPONSES=true, como em
+app/core/responses.py. Enviados em blocos de até `chunk_bytes`. O pico de memória fica limitado ao bloco + batch do cursor,
+independente do tamanho do resultado.
+"""
+from typing import Any, AsyncIterator, Type
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.core.responses import encode
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 500
+CHUNK_BYTES = 64 * 1024
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def _encode(
+    items: AsyncIterator[Any],
+    model: Type[BaseModel],
+    chunk_bytes: int,
+) -> AsyncIterator[bytes]:
+    buf = bytearray()
+    async for item in items:
+        buf += encode(item, model)
+        buf += b"\n"
+        if len(buf) >= chunk_bytes:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
+
+
+def ndjson_response(
+    items: AsyncIterator[Any],
+    model: Type[BaseModel],
+    chunk_bytes: int = CHUNK_BYTES,
+) -> StreamingResponse:
+    return StreamingResponse(_encode(items, model, chunk_bytes), media_type=NDJSON_MEDIA_TYPE)
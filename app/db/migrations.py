@@ -0,0 +1,134 @@
+"""
+db/migrations.py
+Migrações leves do schema SQL, executadas no startup depois do create_all.
+`create_all` só cria tabelas novas — colunas adicionadas depois precisam
+ser aplicadas aqui, sempre de forma idempotente.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.sql import Base
+
+logger = logging.getLogger(__name__)
+
+# tabela → [(coluna, DDL do tipo)]
+_ADDED_COLUMNS = {
+    "theaters": [
+        ("photo_url", "VARCHAR(255)"),
+        ("name_key", "VARCHAR(255)"),
+    ],
+}
+
+# índices substituídos por outros (create_all/checkfirst não remove nada)
+_DROPPED_INDEXES = [
+    "ix_theaters_name_id",  # → ix_theaters_name_key_id
+]
+
+# Busca textual de GET /theaters?q= (só SQLite): tabela FTS5 "external
+# content" sobre `theaters`, sem cópia do texto, mantida por triggers.
+# unicode61/remove_diacritics casa "opera" com "Ópera"; os índices de prefixo
+# de 2 e 3 letras evitam varrer o vocabulário em buscas curtas ("te*").
+THEATERS_FTS = "theaters_fts"
+_FTS_COLUMNS = ("name", "neighborhood", "city")
+theaters_fts_enabled = False
+
+
+def _existing_columns(sync_conn, table: str) -> set:
+    return {c["name"] for c in inspect(sync_conn).get_columns(table)}
+
+
+def _create_missing_indexes(sync_conn) -> None:
+    """create_all não cria índices novos em tabelas que já existem."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
+async def _backfill_name_keys(conn: AsyncConnection) -> None:
+    # import local: theaters_repo importa este módulo
+    from app.repositories.theaters_repo import _slugify
+
+    rows = (await conn.execute(text("SELECT id, name FROM theaters WHERE name_key IS NULL"))).all()
+    if rows:
+        await conn.execute(
+            text("UPDATE theaters SET name_key = :key WHERE id = :id"),
+            [{"id": id_, "key": _slugify(name or "")} for id_, name in rows],
+        )
+
+
+def _fts_triggers() -> dict:
+    cols = ", ".join(_FTS_COLUMNS)
+    new = ", ".join(f"new.{c}" for c in _FTS_COLUMNS)
+    old = ", ".join(f"old.{c}" for c in _FTS_COLUMNS)
+    delete_old = f"INSERT INTO {THEATERS_FTS}({THEATERS_FTS}, rowid, {cols}) VALUES ('delete', old.id, {old});"
+    insert_new = f"INSERT INTO {THEATERS_FTS}(rowid, {cols}) VALUES (new.id, {new});"
+    return {
+        f"{THEATERS_FTS}_ai": f"AFTER INSERT ON theaters BEGIN {insert_new} END",
+        f"{THEATERS_FTS}_ad": f"AFTER DELETE ON theaters BEGIN {delete_old} END",
+        f"{THEATERS_FTS}_au": f"AFTER UPDATE OF {cols} ON theaters BEGIN {delete_old} {insert_new} END",
+    }
+
+
+async def suspend_theaters_fts(conn: AsyncConnection) -> None:
+    """
+    Remove os triggers de sincronização para cargas em massa (um trigger por
+    linha quase dobra o tempo da carga; um 'rebuild' no fim sai mais barato).
+    Chamar `resume_theaters_fts` no fim — e também se a carga falhar: o
+    driver do SQLite não abre transação antes de DDL, então o DROP TRIGGER
+    não é desfeito pelo rollback. Se nada disso rodar, `migrate_sql` recria
+    os triggers (com rebuild) no próximo startup.
+    """
+    for name in _fts_triggers():
+        await conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+
+
+async def resume_theaters_fts(conn: AsyncConnection, rebuild: bool = True) -> None:
+    for name, body in _fts_triggers().items():
+        await conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {body}"))
+    if rebuild:
+        await conn.execute(text(f"INSERT INTO {THEATERS_FTS}({THEATERS_FTS}) VALUES ('rebuild')"))
+
+
+async def _create_theaters_fts(conn: AsyncConnection) -> bool:
+    exists = (await conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": THEATERS_FTS},
+    )).first() is not None
+    triggers = set((await conn.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'theaters'"),
+    )).scalars())
+    missing_triggers = not set(_fts_triggers()) <= triggers
+    try:
+        await conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {THEATERS_FTS} USING fts5("
+            f"{', '.join(_FTS_COLUMNS)}, content='theaters', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        ))
+    except OperationalError as e:
+        # SQLite compilado sem FTS5: ?q= cai no LIKE sobre name_key
+        logger.warning("FTS5 indisponível, busca de teatros sem índice textual: %s", e)
+        return False
+    # tabela nova sobre dados antigos, ou triggers perdidos (carga em massa
+    # interrompida): escritas sem sync podem faltar no índice — reindexa tudo
+    if exists and missing_triggers:
+        logger.warning("triggers de %s ausentes; reconstruindo o índice", THEATERS_FTS)
+    await resume_theaters_fts(conn, rebuild=not exists or missing_triggers)
+    return True
+
+
+async def migrate_sql(conn: AsyncConnection) -> None:
+    global theaters_fts_enabled
+    for table, columns in _ADDED_COLUMNS.items():
+        existing = await conn.run_sync(_existing_columns, table)
+        for name, ddl in columns:
+            if name not in existing:
+                await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+    for index in _DROPPED_INDEXES:
+        await conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+    await _backfill_name_keys(conn)
+    await conn.run_sync(_create_missing_indexes)
+    if conn.dialect.name == "sqlite":
+        theaters_fts_enabled = await _create_theaters_fts(conn)
@@ -1,12 +1,205 @@
+"""
+app/db/mongo.py
+Cliente MongoDB único do processo.
+
+O lifespan (main.py) chama `connect()` + `warmup()` no startup e `close()` no
+shutdown; scripts e testes que usam `get_collection` sem o lifespan recebem
+o mesmo cliente, criado sob demanda. Pool e timeouts vêm das settings
+(MONGODB_MAX_POOL_SIZE, MONGODB_WAIT_QUEUE_TIMEOUT_MS, …).
+
+`pool_stats` registra checkouts do pool (tempo de espera, timeouts,
+conexões abertas) para dimensionar o pool a partir de dados: GET /db/pool.
+"""
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Optional
+
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from app.core.settings import get_settings
+from pymongo import monitoring
 
-_settings = get_settings()
-_client = AsyncIOMotorClient(_settings.mongodb_uri)
-_db: AsyncIOMotorDatabase = _client[_settings.mongodb_db]
+from app.core import metrics, slowlog
+from app.core.config import settings
 
-def get_db() -> AsyncIOMotorDatabase:
+logger = logging.getLogger(__name__)
+
+
+# ── Estatísticas do pool ──────────────────────────────────────────────────────
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Contadores de checkout do pool. Os eventos chegam das threads do Motor,
+    por isso o lock.
+    """
+
+    # limites superiores (ms) do histograma de espera por conexão
+    WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_failures: Dict[str, int] = {}
+            self.wait_total_s = 0.0
+            self.wait_max_s = 0.0
+            self.wait_histogram = [0] * (len(self.WAIT_BUCKETS_MS) + 1)
+            self.checked_out = 0
+            self.connections_created = 0
+            self.connections_closed = 0
+
+    def _record_wait(self, seconds: float) -> None:
+        self.wait_total_s += seconds
+        self.wait_max_s = max(self.wait_max_s, seconds)
+        self.wait_histogram[bisect_left(self.WAIT_BUCKETS_MS, seconds * 1000)] += 1
+
+    def _elapsed(self, event) -> float:
+        # `duration` existe a partir do PyMongo 4.7; antes, mede pela thread
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            return duration
+        started = getattr(self._local, "started", None)
+        return time.perf_counter() - started if started is not None else 0.0
+
+    # eventos de checkout
+
+    def connection_check_out_started(self, event) -> None:
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event) -> None:
+        elapsed = self._elapsed(event)
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self._record_wait(elapsed)
+
+    def connection_check_out_failed(self, event) -> None:
+        elapsed = self._elapsed(event)
+        with self._lock:
+            reason = str(event.reason)
+            self.checkout_failures[reason] = self.checkout_failures.get(reason, 0) + 1
+            self._record_wait(elapsed)
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self.checked_out -= 1
+
+    # ciclo de vida das conexões
+
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self.connections_closed += 1
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = self.checkouts + sum(self.checkout_failures.values())
+            labels = [f"<={b}ms" for b in self.WAIT_BUCKETS_MS] + [f">{self.WAIT_BUCKETS_MS[-1]}ms"]
+            return {
+                "max_pool_size": settings.mongodb_max_pool_size,
+                "min_pool_size": settings.mongodb_min_pool_size,
+                "open_connections": self.connections_created - self.connections_closed,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.checkout_failures),
+                "wait_avg_ms": round(self.wait_total_s / waits * 1000, 3) if waits else None,
+                "wait_max_ms": round(self.wait_max_s * 1000, 3),
+                "wait_histogram": dict(zip(labels, self.wait_histogram)),
+            }
+
+
+pool_stats = PoolStats()
+
+metrics.registry.register(metrics.Gauge(
+    "mongo_pool_open_connections", "Conexões abertas no pool do MongoDB.",
+    collect=lambda: pool_stats.connections_created - pool_stats.connections_closed,
+))
+metrics.registry.register(metrics.Gauge(
+    "mongo_pool_checked_out", "Conexões do pool do MongoDB em uso.",
+    collect=lambda: pool_stats.checked_out,
+))
+
+
+# ── Cliente ───────────────────────────────────────────────────────────────────
+
+_client: Optional[AsyncIOMotorClient] = None
+_db: Optional[AsyncIOMotorDatabase] = None
+
+
+def connect() -> AsyncIOMotorDatabase:
+    """Cria o cliente (idempotente). Não faz I/O: a conexão é preguiçosa."""
+    global _client, _db
+    if _db is None:
+        listeners = [pool_stats]
+        if settings.metrics_enabled:
+            listeners.append(metrics.MongoCommandMetrics())
+        slow_listener = None
+        if settings.slow_query_ms > 0:
+            slow_listener = slowlog.SlowMongoCommands()
+            listeners.append(slow_listener)
+        _client = AsyncIOMotorClient(
+            settings.mongodb_uri,
+            maxPoolSize=settings.mongodb_max_pool_size,
+            minPoolSize=settings.mongodb_min_pool_size,
+            waitQueueTimeoutMS=settings.mongodb_wait_queue_timeout_ms,
+            serverSelectionTimeoutMS=settings.mongodb_server_selection_timeout_ms,
+            connectTimeoutMS=settings.mongodb_connect_timeout_ms,
+            maxIdleTimeMS=settings.mongodb_max_idle_time_ms,
+            event_listeners=listeners,
+        )
+        _db = _client[settings.mongodb_db]
+        if slow_listener is not None:
+            slow_listener.sync_client = _client.delegate
     return _db
 
+
+async def warmup() -> int:
+    """
+    Abre `min_pool_size` conexões antes de o app aceitar tráfego: N pings
+    simultâneos forçam N checkouts distintos. Retorna as conexões abertas.
+    """
+    db = connect()
+    await db.command("ping")
+    n = settings.mongodb_min_pool_size
+    if n > 1:
+        await asyncio.gather(*(db.command("ping") for _ in range(n)))
+    return pool_stats.snapshot()["open_connections"]
+
+
+def close() -> None:
+    global _client, _db
+    if _client is not None:
+        _client.close()
+    _client = None
+    _db = None
+
+
+def get_db() -> AsyncIOMotorDatabase:
+    return _db if _db is not None else connect()
+
+
 def get_collection(name: str):
-    return _db[name]
\ No newline at end of file
+    return get_db()[name]
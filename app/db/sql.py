@@ -5,9 +5,8 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 from sqlalchemy.orm import declarative_base
-from app.core.settings import get_settings
-
-settings = get_settings()
+from app.core.config import settings
+from app.core import metrics, slowlog
 
 engine = create_async_engine(
     settings.sql_database_url,
@@ -15,6 +14,11 @@ engine = create_async_engine(
     future=True,
 )
 
+if settings.metrics_enabled:
+    metrics.instrument_engine(engine)
+if settings.slow_query_ms > 0:
+    slowlog.instrument_engine(engine)
+
 AsyncSessionLocal = async_sessionmaker(
     engine,
     expire_on_commit=False,
@@ -0,0 +1,182 @@
+"""
+indexes/geo.py
+Índice espacial em memória (grade regular lat/lng) para busca de teatros
+próximos sem varrer a tabela `theaters`.
+
+Cada ponto cai numa célula de `cell_deg` graus. A busca k-nearest percorre
+anéis de células ao redor do ponto de consulta e para assim que o limite
+inferior de distância do próximo anel supera o k-ésimo melhor resultado
+(ou o raio pedido). Quando os anéis ficam mais caros que as células
+ocupadas (consulta longe de tudo), cai para uma varredura única das células
+restantes. Distâncias são haversine, em km.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Dict, Hashable, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoGridIndex:
+    """Grade lat/lng → {id: (lat, lng)}. Não é thread-safe (uso no event loop)."""
+
+    def __init__(self, cell_deg: float = 0.05):
+        self.cell_deg = cell_deg
+        self._cols = int(round(360 / cell_deg))
+        self._rows = int(round(180 / cell_deg))
+        self._cells: Dict[Tuple[int, int], Dict[Hashable, Tuple[float, float]]] = {}
+        self._points: Dict[Hashable, Tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._points
+
+    # ── Manutenção ────────────────────────────────────────────────────────────
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        row = min(int((lat + 90) // self.cell_deg), self._rows - 1)
+        col = int((lng + 180) // self.cell_deg) % self._cols
+        return row, col
+
+    def upsert(self, key: Hashable, lat: Optional[float], lng: Optional[float]) -> None:
+        """Insere/move um ponto. Coordenadas None removem o ponto do índice."""
+        self.remove(key)
+        if lat is None or lng is None:
+            return
+        lat, lng = float(lat), float(lng)
+        self._points[key] = (lat, lng)
+        self._cells.setdefault(self._cell(lat, lng), {})[key] = (lat, lng)
+
+    def remove(self, key: Hashable) -> None:
+        old = self._points.pop(key, None)
+        if old is None:
+            return
+        cell = self._cell(*old)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._points.clear()
+
+    # ── Consulta ──────────────────────────────────────────────────────────────
+
+    def _ring(self, row: int, col: int, r: int):
+        if r == 0:
+            yield row, col
+            return
+        for dc in range(-r, r + 1):
+            for dr in (-r, r):
+                yield row + dr, col + dc
+        for dr in range(-r + 1, r):
+            for dc in (-r, r):
+                yield row + dr, col + dc
+
+    def _chebyshev(self, row: int, col: int, cell: Tuple[int, int]) -> int:
+        dc = abs(cell[1] - col)
+        return max(abs(cell[0] - row), min(dc, self._cols - dc))
+
+    def _ring_lower_bound_km(self, lat: float, r: int) -> float:
+        """
+        Distância mínima de (lat, ·) até qualquer ponto fora dos anéis 0..r-1.
+        Tal ponto difere em pelo menos r-1 células de latitude ou longitude
+        (o ponto de consulta pode estar na borda da própria célula).
+        """
+        d = max(r - 1, 0) * self.cell_deg
+        if d <= 0:
+            return 0.0
+        by_lat = math.radians(d) * EARTH_RADIUS_KM
+        # distância de um ponto ao meridiano deslocado de d graus
+        by_lng = EARTH_RADIUS_KM * math.asin(
+            min(1.0, math.cos(math.radians(lat)) * math.sin(math.radians(min(d, 90.0))))
+        )
+        return min(by_lat, by_lng)
+
+    def _scan(self, cells, lat, lng, k, radius_km, best) -> int:
+        """Avalia os pontos das células dadas no heap `best`. Retorna qtd vista."""
+        seen = 0
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if not bucket:
+                continue
+            seen += len(bucket)
+            for key, (plat, plng) in bucket.items():
+                dist = haversine_km(lat, lng, plat, plng)
+                if radius_km is not None and dist > radius_km:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-dist, key))
+                elif dist < -best[0][0]:
+                    heapq.heapreplace(best, (-dist, key))
+        return seen
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 20,
+        radius_km: Optional[float] = None,
+    ) -> List[Tuple[Hashable, float]]:
+        """Retorna até `k` pares (id, distância_km) ordenados por distância."""
+        if k <= 0 or not self._points:
+            return []
+
+        row, col = self._cell(lat, lng)
+        max_r = max(self._rows, self._cols // 2)
+        best: List[Tuple[float, Hashable]] = []  # max-heap via distância negativa
+        visited: set = set()
+        examined = 0
+
+        for r in range(max_r + 1):
+            if examined >= len(self._points):
+                break
+            bound = self._ring_lower_bound_km(lat, r)
+            if radius_km is not None and bound > radius_km:
+                break
+            if len(best) >= k and bound > -best[0][0]:
+                break
+
+            if r and len(visited) + 8 * r > len(self._cells):
+                # anéis ficaram mais caros que varrer as células ocupadas
+                cells = [c for c in self._cells if c not in visited]
+                if radius_km is not None:
+                    cells = [
+                        c for c in cells
+                        if self._ring_lower_bound_km(lat, self._chebyshev(row, col, c)) <= radius_km
+                    ]
+                self._scan(cells, lat, lng, k, radius_km, best)
+                break
+
+            cells = []
+            for cr, cc in self._ring(row, col, r):
+                if cr < 0 or cr >= self._rows:
+                    continue
+                cell = (cr, cc % self._cols)
+                # anéis largos dão a volta no antimeridiano: não repete células
+                if cell in visited:
+                    continue
+                visited.add(cell)
+                cells.append(cell)
+            examined += self._scan(cells, lat, lng, k, radius_km, best)
+
+        return [(key, -neg) for neg, key in sorted(best, reverse=True)]
+
+
+# Índice compartilhado do processo (alimentado por TheatersRepo)
+theaters_geo_index = GeoGridIndex()
@@ -0,0 +1,58 @@
+"""
+indexes/intervals.py
+Intervalos [início, fim) ordenados para detectar sobreposição — conflito de
+horário numa sala — sem uma consulta por candidato.
+
+`IntervalIndex` é estático: ordena os intervalos por início uma vez, com
+arrays paralelos de fins e payloads. Como nenhum intervalo passa de
+`max_length`, tudo que pode sobrepor [s, e) começa em (s - max_length, e):
+um bisect acha essa faixa e só ela é verificada. Montar custa O(n log n);
+cada consulta, O(log n + tamanho da faixa). Sessões de teatro têm duração
+limitada e a faixa fica em poucas sessões.
+
+`sweep_overlaps` cobre o outro lado: sobreposições dentro do próprio lote de
+candidatos, numa varredura ordenada O(m log m).
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Generic, Iterable, Iterator, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class IntervalIndex(Generic[T]):
+    """Intervalos (início, fim, payload); início/fim só precisam ser ordenáveis e subtraíveis."""
+
+    def __init__(self, intervals: Iterable[Tuple[Any, Any, T]]):
+        items = sorted(intervals, key=lambda it: it[0])
+        self._starts = [start for start, _, _ in items]
+        self._ends = [end for _, end, _ in items]
+        self._payloads = [payload for _, _, payload in items]
+        self._max_length = max((end - start for start, end, _ in items), default=None)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def overlapping(self, start: Any, end: Any) -> List[T]:
+        """Payloads cujos intervalos sobrepõem [start, end); encostar não conta."""
+        if self._max_length is None:
+            return []
+        lo = bisect_right(self._starts, start - self._max_length)
+        hi = bisect_left(self._starts, end)
+        return [self._payloads[i] for i in range(lo, hi) if self._ends[i] > start]
+
+
+def sweep_overlaps(intervals: Iterable[Tuple[Any, Any, T]]) -> Iterator[Tuple[T, T]]:
+    """
+    (payload, payload anterior que ele sobrepõe) para cada intervalo que
+    começa antes do fim mais tardio dos anteriores. Um par por intervalo
+    conflitante — suficiente para relatório/rejeição, não a lista completa.
+    """
+    latest_end = None
+    latest: Any = None
+    for start, end, payload in sorted(intervals, key=lambda it: it[0]):
+        if latest_end is not None and start < latest_end:
+            yield payload, latest
+        if latest_end is None or end > latest_end:
+            latest_end, latest = end, payload
@@ -0,0 +1,208 @@
+"""
+indexes/prefix.py
+Índice de prefixos em memória para autocomplete (GET /performances/suggest).
+
+Cada termo (nome da performance, tag ou pessoa do elenco) gera uma chave
+por início de palavra, já normalizada (minúsculas, sem acentos): "O Auto da
+Compadecida" → "o auto da compadecida", "auto da compadecida",
+"da compadecida", "compadecida". As chaves ficam num array ordenado,
+paralelo ao array de ids de termo; um prefixo vira um intervalo achado por
+bisect, sem varrer nada além dos candidatos.
+
+Tags e pessoas são compartilhadas entre performances: o termo guarda o
+conjunto de performances que o usam e some quando o conjunto esvazia.
+Atualizações são incrementais (upsert/remove por performance, O(n) de
+memmove no array); a carga inicial usa `rebuild`, que ordena uma vez só.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+KINDS = ("name", "tag", "cast")
+# chaves por termo: limita o custo de nomes muito longos
+MAX_WORD_STARTS = 8
+# candidatos avaliados por resposta (antes de deduplicar e ordenar)
+CANDIDATES_PER_RESULT = 8
+
+_WORDS = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=65_536)
+def fold(text: str) -> str:
+    """Minúsculas, sem acentos e com espaços normalizados."""
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(_WORDS.findall(text.casefold()))
+
+
+def _word_starts(folded: str) -> List[str]:
+    words = folded.split(" ")
+    return [" ".join(words[i:]) for i in range(min(len(words), MAX_WORD_STARTS))]
+
+
+class _Term:
+    __slots__ = ("kind", "text", "keys", "owners")
+
+    def __init__(self, kind: str, text: str, keys: List[str]):
+        self.kind = kind
+        self.text = text
+        self.keys = keys
+        self.owners: Set[Hashable] = set()
+
+
+class PrefixIndex:
+    """Não é thread-safe (uso no event loop), como o GeoGridIndex."""
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._term_ids: List[int] = []
+        self._terms: Dict[int, _Term] = {}
+        self._term_by_identity: Dict[Tuple[Hashable, ...], int] = {}
+        self._owned: Dict[Hashable, List[int]] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._owned)
+
+    @property
+    def key_count(self) -> int:
+        return len(self._keys)
+
+    # ── Manutenção ────────────────────────────────────────────────────────────
+
+    def _identity(self, kind: str, owner: Hashable, folded: str) -> Tuple[Hashable, ...]:
+        # nomes são por performance; tags e pessoas são compartilhadas
+        return (kind, owner, folded) if kind == "name" else (kind, folded)
+
+    def _attach(
+        self,
+        owner: Hashable,
+        kind: str,
+        text: str,
+        pending: Optional[List[Tuple[str, int]]] = None,
+    ) -> Optional[int]:
+        folded = fold(text)
+        if not folded:
+            return None
+        identity = self._identity(kind, owner, folded)
+        term_id = self._term_by_identity.get(identity)
+        if term_id is None:
+            term_id = self._next_id
+            self._next_id += 1
+            term = _Term(kind, text.strip(), _word_starts(folded))
+            self._terms[term_id] = term
+            self._term_by_identity[identity] = term_id
+            for key in term.keys:
+                if pending is not None:
+                    pending.append((key, term_id))
+                    continue
+                i = bisect_right(self._keys, key)
+                self._keys.insert(i, key)
+                self._term_ids.insert(i, term_id)
+        self._terms[term_id].owners.add(owner)
+        return term_id
+
+    def _detach(self, owner: Hashable, term_id: int) -> None:
+        term = self._terms.get(term_id)
+        if term is None:
+            return
+        term.owners.discard(owner)
+        if term.owners:
+            return
+        for key in term.keys:
+            lo, hi = bisect_left(self._keys, key), bisect_right(self._keys, key)
+            for i in range(lo, hi):
+                if self._term_ids[i] == term_id:
+                    del self._keys[i]
+                    del self._term_ids[i]
+                    break
+        del self._terms[term_id]
+        folded = term.keys[0]
+        self._term_by_identity.pop(self._identity(term.kind, owner, folded), None)
+
+    def upsert(
+        self,
+        owner: Hashable,
+        name: Optional[str],
+        tags: Iterable[str] = (),
+        cast: Iterable[str] = (),
+        _pending: Optional[List[Tuple[str, int]]] = None,
+    ) -> None:
+        """(Re)indexa uma performance; termos que ela deixou de usar saem."""
+        term_ids = []
+        for kind, values in (("name", [name] if name else []), ("tag", tags), ("cast", cast)):
+            for value in values:
+                if isinstance(value, str):
+                    term_id = self._attach(owner, kind, value, _pending)
+                    if term_id is not None:
+                        term_ids.append(term_id)
+        kept = set(term_ids)
+        for term_id in self._owned.get(owner, ()):
+            if term_id not in kept:
+                self._detach(owner, term_id)
+        self._owned[owner] = list(dict.fromkeys(term_ids))
+
+    def remove(self, owner: Hashable) -> None:
+        for term_id in self._owned.pop(owner, ()):
+            self._detach(owner, term_id)
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def rebuild(self, items: Iterable[Tuple[Hashable, Optional[str], Iterable[str], Iterable[str]]]) -> None:
+        """Recria o índice a partir de (owner, name, tags, cast), ordenando uma vez."""
+        self.clear()
+        pending: List[Tuple[str, int]] = []
+        for owner, name, tags, cast in items:
+            self.upsert(owner, name, tags, cast, _pending=pending)
+        pending.sort()
+        self._keys = [key for key, _ in pending]
+        self._term_ids = [term_id for _, term_id in pending]
+
+    # ── Consulta ──────────────────────────────────────────────────────────────
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Até `limit` termos cujo início de palavra casa com `prefix`. Ordem:
+        casamento no início do termo, depois nº de performances, depois texto.
+        """
+        folded = fold(prefix)
+        if not folded or limit <= 0:
+            return []
+        # preserva o espaço final ("o " não casa com "ouro")
+        if prefix[-1:].isspace():
+            folded += " "
+
+        lo = bisect_left(self._keys, folded)
+        candidates: Dict[int, bool] = {}
+        budget = limit * CANDIDATES_PER_RESULT
+        for i in range(lo, len(self._keys)):
+            key = self._keys[i]
+            if not key.startswith(folded) or len(candidates) >= budget:
+                break
+            term_id = self._term_ids[i]
+            term = self._terms[term_id]
+            at_start = key == term.keys[0]
+            candidates[term_id] = candidates.get(term_id, False) or at_start
+
+        ranked = sorted(
+            candidates.items(),
+            key=lambda item: (not item[1], -len(self._terms[item[0]].owners), self._terms[item[0]].text),
+        )
+        out = []
+        for term_id, _ in ranked[:limit]:
+            term = self._terms[term_id]
+            item: Dict[str, Any] = {"text": term.text, "kind": term.kind, "count": len(term.owners)}
+            if term.kind == "name":
+                item["performance_id"] = str(next(iter(term.owners)))
+            out.append(item)
+        return out
+
+
+# Índice compartilhado do processo (alimentado por PerformancesRepository)
+performance_suggest_index = PrefixIndex()
@@ -5,27 +5,45 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 
 from app.routes.theaters import router as theaters_router
 from app.routes.performances import router as performances_router
 from app.routes.sessions import router as sessions_router
-from app.routes.utils_address import router as utils_router
+from app.routes.utils_address import router as utils_router, zip_cache
 from app.routes.media import router as media_router
-from app.db.sql import Base, engine
+from app.routes.schedule import router as schedule_router
+from app.routes.jobs import router as jobs_router
+from app.db import mongo
+from app.db.sql import AsyncSessionLocal, Base, engine
+from app.db.migrations import migrate_sql
+from app.repositories.performances_repo import PerformancesRepository
+from app.repositories.theaters_repo import TheatersRepo
 from app.core.config import settings  # veja nota abaixo
+from app.core.cache import cache
+from app.core.http import close_http_client, get_http_client
+from app.core.jobs import jobs
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.services.session_conflicts import CONFLICTS_HEADER
+from app.core.responses import FastJSONResponse
+from app.core import metrics
+from app.core.slowlog import slow_queries
+from app.storage import derivatives
+from app.storage.static import UploadStaticFiles
 
 # Garante que a pasta de uploads existe antes de montar
 UPLOAD_DIR = Path("static/uploads")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-app = FastAPI(title="Backstage API", version="0.6.0")
+# orjson em todas as respostas; listagens grandes ainda pulam a revalidação
+# (ver app/core/responses.py)
+app = FastAPI(title="Backstage API", version="0.6.0", default_response_class=FastJSONResponse)
 
 # ── Static files ─────────────────────────────
-# Imagens ficam em /static/uploads/<category>/<arquivo>
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Imagens ficam em /static/uploads/<category>/<arquivo> (cache immutable + ETag + Range)
+app.mount("/static", UploadStaticFiles(directory="static"), name="static")
 
 # ── CORS (origens via env, não hardcoded) ────
 app.add_middleware(
@@ -34,18 +52,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, CONFLICTS_HEADER],  # paginação keyset, conflitos de sala
 )
 
+# ── Métricas (por último = mais externo: mede CORS e erros também) ──
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 # ── Startup ───────────────────────────────────
 # Substituímos @app.on_event("startup") pelo lifespan moderno
 from contextlib import asynccontextmanager
+import logging
+
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # cliente MongoDB único; abre o pool mínimo antes de aceitar tráfego
+    mongo.connect()
+    try:
+        opened = await mongo.warmup()
+        logger.info("MongoDB: %d conexões abertas no warmup", opened)
+    except Exception as e:
+        logger.warning("MongoDB indisponível no startup: %s", e)
     # cria tabelas SQL
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await migrate_sql(conn)
+    # índice espacial em memória para /theaters/nearby
+    async with AsyncSessionLocal() as session:
+        await TheatersRepo(session).load_geo_index()
+    # índice de autocomplete para /performances/suggest
+    try:
+        indexed = await PerformancesRepository().load_suggest_index()
+        logger.info("Autocomplete: %d performances indexadas", indexed)
+    except Exception as e:
+        logger.warning("Índice de autocomplete não carregado: %s", e)
+    # cliente HTTP de saída com keep-alive (consulta de CEP)
+    get_http_client()
+    # workers de jobs em background (GET /jobs/{id})
+    try:
+        await jobs.ensure_indexes()
+    except Exception as e:
+        logger.warning("Índices da fila de jobs não criados: %s", e)
+    jobs.start()
     yield
+    await jobs.stop()
+    await close_http_client()
+    derivatives.shutdown()
+    mongo.close()
 
 app.router.lifespan_context = lifespan
 
@@ -54,12 +109,42 @@ app.router.lifespan_context = lifespan
 async def health():
     return {"status": "ok"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Contadores dos caches read-through (hits, misses, evictions…)."""
+    return {"responses": cache.stats(), "zip": zip_cache.stats()}
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(
+        metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.get("/admin/slow-queries")
+async def list_slow_queries(
+    limit: int = Query(20, ge=1, le=500),
+    order_by: str = Query("max_ms", pattern="^(max_ms|avg_ms|total_ms|count)$"),
+):
+    """Formatos de consulta mais lentos (Mongo e SQL), com plano de execução."""
+    return slow_queries.top(limit, order_by)
+
+@app.delete("/admin/slow-queries", status_code=204)
+async def clear_slow_queries():
+    slow_queries.clear()
+
+@app.get("/db/pool")
+async def db_pool_stats():
+    """Pool do MongoDB: conexões abertas, checkouts e espera por conexão."""
+    return mongo.pool_stats.snapshot()
+
 # ── Routers ───────────────────────────────────
 app.include_router(theaters_router)
 app.include_router(performances_router)
 app.include_router(sessions_router)
+app.include_router(schedule_router)
 app.include_router(utils_router)
 app.include_router(media_router)
+app.include_router(jobs_router)
 
 if __name__ == "__main__":
     import uvicorn
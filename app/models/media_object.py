@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+from app.db.sql import Base
+
+class MediaObject(Base):
+    """Arquivo endereçado por conteúdo em static/uploads e quantos uploads o referenciam."""
+    __tablename__ = "media_objects"
+
+    # path relativo, ex: "static/uploads/banners/<sha256>.jpg"
+    path = Column(String(255), primary_key=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    size = Column(Integer, nullable=False)
+    refcount = Column(Integer, nullable=False, default=1)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,12 +1,23 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Index
+from sqlalchemy.orm import deferred
 from app.db.sql import Base
 
 class Theater(Base):
     __tablename__ = "theaters"
+    __table_args__ = (
+        # ordenação + paginação keyset de TheatersRepo.list (sem acento/caixa)
+        Index("ix_theaters_name_key_id", "name_key", "id"),
+        # filtros ?city= e ?state= já na ordem da listagem
+        Index("ix_theaters_city_name_key", "city", "name_key", "id"),
+        Index("ix_theaters_state_name_key", "state", "name_key", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
+    # `_slugify(name)`: "Ópera" e "opera" ordenam juntos. Preenchida pelo
+    # repositório/bulk_load; nullable só por causa do ALTER TABLE da migração.
+    name_key = Column(String(255), nullable=True)
     slug = Column(String(255), nullable=False, unique=True, index=True)
 
     street = Column(String(255), nullable=True)
@@ -24,7 +35,11 @@ class Theater(Base):
     instagram = Column(String(255), nullable=True)
     phone = Column(String(50), nullable=True)
 
-    photo_base64 = Column(Text, nullable=True)
+    # URL relativa retornada por POST /media/upload (category="theaters")
+    photo_url = Column(String(255), nullable=True)
+    # Legado: só é lido pelo backfill (scripts/backfill_theater_photos.py).
+    # `deferred` garante que SELECTs normais nunca carreguem o blob.
+    photo_base64 = deferred(Column(Text, nullable=True))
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(
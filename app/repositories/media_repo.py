@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.media_object import MediaObject
+
+
+class MediaRepo:
+    """Contagem de referências dos uploads deduplicados (tabela media_objects)."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _increment(self, path: str) -> Optional[int]:
+        result = await self.session.execute(
+            update(MediaObject)
+            .where(MediaObject.path == path)
+            .values(refcount=MediaObject.refcount + 1)
+            .returning(MediaObject.refcount)
+        )
+        return result.scalar_one_or_none()
+
+    async def retain(self, path: str, sha256: str, size: int) -> int:
+        """+1 referência (cria o registro no primeiro upload). Retorna o total."""
+        count = await self._increment(path)
+        if count is None:
+            self.session.add(MediaObject(path=path, sha256=sha256, size=size, refcount=1))
+            try:
+                await self.session.commit()
+                return 1
+            except IntegrityError:
+                # outro worker criou o registro entre o UPDATE e o INSERT
+                await self.session.rollback()
+                count = await self._increment(path)
+        await self.session.commit()
+        return count
+
+    async def release(self, path: str) -> Optional[int]:
+        """
+        -1 referência. Retorna quantas restam ou None se o arquivo não é
+        contado (uploads antigos, nomeados por uuid). 0 só quando esta
+        chamada removeu o registro: aí, e só aí, o arquivo pode ser apagado.
+        """
+        result = await self.session.execute(
+            update(MediaObject)
+            .where(MediaObject.path == path)
+            .values(refcount=MediaObject.refcount - 1)
+            .returning(MediaObject.refcount)
+        )
+        count = result.scalar_one_or_none()
+        if count is not None and count <= 0:
+            deleted = await self.session.execute(
+                delete(MediaObject).where(MediaObject.path == path, MediaObject.refcount <= 0)
+            )
+            # outro upload voltou a referenciar o arquivo antes do DELETE
+            count = 0 if deleted.rowcount else max(await self.refcount(path), 1)
+        await self.session.commit()
+        return count
+
+    async def refcount(self, path: str) -> int:
+        result = await self.session.execute(
+            select(MediaObject.refcount).where(MediaObject.path == path)
+        )
+        return result.scalar_one_or_none() or 0
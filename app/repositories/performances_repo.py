@@ -3,12 +3,22 @@ performances_repo.py
 Performances armazenam APENAS metadados.
 Sessões vivem exclusivamente na coleção `sessions` (sessions_repo).
 O campo `banner` virou `banner_url` (path relativo no disco).
+`session_count` é calculado por página com um único $group em `sessions`.
+`_to_out` já monta o formato público (`_id`, como o alias de PerformanceOut),
+para as rotas serializarem direto (app/core/responses.py).
+Com `q`, a listagem vem por relevância (textScore) e o cursor inclui o score.
+Nomes, tags e elenco alimentam o índice de autocomplete em memória
+(app/indexes/prefix.py), mantido a cada create/update/delete.
 """
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
 from bson import ObjectId, errors as bson_errors
 
+from app.core.cache import cache
+from app.core.pagination import decode_cursor, next_cursor
 from app.db.mongo import get_collection
+from app.indexes.prefix import performance_suggest_index
+from app.repositories import sessions_repo
 from app.schemas.performances import PerformanceIn, PerformanceUpdate
 
 
@@ -18,7 +28,7 @@ def _to_out(doc: Dict[str, Any], session_count: int = 0) -> Dict[str, Any]:
     if not doc:
         return doc
     return {
-        "id":            str(doc["_id"]),
+        "_id":           str(doc["_id"]),
         "name":          doc.get("name"),
         "synopsis":      doc.get("synopsis"),
         "tags":          doc.get("tags", []),
@@ -28,13 +38,44 @@ def _to_out(doc: Dict[str, Any], session_count: int = 0) -> Dict[str, Any]:
         "direction":     doc.get("direction", []),
         "cast":          doc.get("cast", []),
         "crew":          doc.get("crew", []),
+        "duration_minutes": doc.get("duration_minutes"),
         "banner_url":    doc.get("banner_url"),
         "session_count": session_count,
+        "score":         doc.get("score"),
         "created_at":    doc.get("created_at"),
         "updated_at":    doc.get("updated_at"),
     }
 
 
+def _to_summary(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id":             str(doc["_id"]),
+        "name":           doc.get("name"),
+        "classification": doc.get("classification"),
+        "season":         doc.get("season"),
+        "banner_url":     doc.get("banner_url"),
+    }
+
+
+_SUMMARY_FIELDS = {"name": 1, "classification": 1, "season": 1, "banner_url": 1}
+
+
+_SUGGEST_FIELDS = {"name": 1, "tags": 1, "cast": 1}
+
+
+def _suggest_terms(doc: Dict[str, Any]):
+    return str(doc["_id"]), doc.get("name"), doc.get("tags") or [], doc.get("cast") or []
+
+
+def _index_for_suggest(doc: Dict[str, Any]) -> None:
+    performance_suggest_index.upsert(*_suggest_terms(doc))
+
+
+def cache_key(id: Any) -> str:
+    """Chave de cache de `get` (invalidada também quando as sessões mudam)."""
+    return f"performance:{id}"
+
+
 def _parse_oid(id: str) -> ObjectId:
     try:
         return ObjectId(id)
@@ -64,9 +105,77 @@ class PerformancesRepository:
                 [("name", "text"), ("synopsis", "text"), ("tags", "text")],
                 name="performance_text_search",
             )
+        # paginação keyset por (name, _id)
+        if "name_1__id_1" not in existing:
+            await self.col.create_index([("name", 1), ("_id", 1)], name="name_1__id_1")
+
+    @staticmethod
+    def page_cursor(items: List[Dict[str, Any]], limit: int, ranked: bool = False) -> Optional[str]:
+        """
+        Cursor opaco para a página seguinte de `list`: (name, id), ou
+        (score, name, id) quando a listagem é por relevância (`q`).
+        """
+        if ranked:
+            return next_cursor(items, limit, "score", "name", "_id")
+        return next_cursor(items, limit, "name", "_id")
+
+    async def _with_counts(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Serializa docs com `session_count` vindo de uma única agregação."""
+        counts = await sessions_repo.count_by_performances(str(d["_id"]) for d in docs)
+        return [_to_out(d, counts.get(str(d["_id"]), 0)) for d in docs]
 
     # ── Listagem ──────────────────────────────────────────────────────────────
 
+    def _find(self, q, season, classification, skip, limit, after):
+        filt: Dict[str, Any] = {}
+
+        if season:
+            filt["season"] = season
+        if classification:
+            filt["classification"] = classification
+        if q:
+            return self._search(q, filt, skip, limit, after)
+
+        if after:
+            last_name, last_id = decode_cursor(after, 2)
+            if not isinstance(last_name, str):
+                raise ValueError("cursor inválido")
+            last_oid = _parse_oid(last_id)
+            filt["$or"] = [
+                {"name": {"$gt": last_name}},
+                {"name": last_name, "_id": {"$gt": last_oid}},
+            ]
+
+        return (
+            self.col.find(filt)
+            .sort([("name", 1), ("_id", 1)])
+            .skip(skip)
+            .limit(limit)
+        )
+
+    def _search(self, q, filt, skip, limit, after):
+        """$text ordenado por relevância, com desempate por (name, _id)."""
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": {"$text": {"$search": q}, **filt}},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+        ]
+        if after:
+            last_score, last_name, last_id = decode_cursor(after, 3)
+            if not isinstance(last_score, (int, float)) or not isinstance(last_name, str):
+                raise ValueError("cursor inválido")
+            last_oid = _parse_oid(last_id)
+            pipeline.append({"$match": {"$or": [
+                {"score": {"$lt": last_score}},
+                {"score": last_score, "name": {"$gt": last_name}},
+                {"score": last_score, "name": last_name, "_id": {"$gt": last_oid}},
+            ]}})
+        pipeline.append({"$sort": {"score": -1, "name": 1, "_id": 1}})
+        if skip:
+            pipeline.append({"$skip": skip})
+        if limit:
+            pipeline.append({"$limit": limit})
+        return self.col.aggregate(pipeline)
+
     async def list(
         self,
         q: Optional[str] = None,
@@ -74,25 +183,78 @@ class PerformancesRepository:
         classification: Optional[str] = None,
         skip: int = 0,
         limit: int = 50,
+        after: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
-        filt: Dict[str, Any] = {}
+        cursor = self._find(q, season, classification, skip, limit, after)
+        return await self._with_counts([doc async for doc in cursor])
 
-        if q:
-            filt["$text"] = {"$search": q}
-        if season:
-            filt["season"] = season
-        if classification:
-            filt["classification"] = classification
+    def iter_list(
+        self,
+        q: Optional[str] = None,
+        season: Optional[int] = None,
+        classification: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 0,
+        after: Optional[str] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Versão streaming de `list` (limit=0 → sem limite). Os contadores de
+        sessão são agregados por lote de `batch_size`, não por documento.
+        """
+        cursor = self._find(q, season, classification, skip, limit, after)
+        return self._iter_batches(cursor.batch_size(batch_size), batch_size)
 
-        cursor = self.col.find(filt).sort("name", 1).skip(skip).limit(limit)
-        return [_to_out(doc) async for doc in cursor]
+    async def _iter_batches(self, cursor, batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                for item in await self._with_counts(batch):
+                    yield item
+                batch = []
+        if batch:
+            for item in await self._with_counts(batch):
+                yield item
 
     # ── Busca por ID ──────────────────────────────────────────────────────────
 
     async def get(self, id: str) -> Optional[Dict[str, Any]]:
         oid = _parse_oid(id)
+        return await cache.get_or_load(cache_key(oid), lambda: self._load(oid))
+
+    async def _load(self, oid: ObjectId) -> Optional[Dict[str, Any]]:
         doc = await self.col.find_one({"_id": oid})
-        return _to_out(doc) if doc else None
+        return (await self._with_counts([doc]))[0] if doc else None
+
+    async def durations(self, ids: Iterable[str]) -> Dict[str, Optional[int]]:
+        """`duration_minutes` por performance num único $in (None se não definida)."""
+        oids = {ObjectId(i) for i in ids if ObjectId.is_valid(i)}
+        if not oids:
+            return {}
+        cursor = self.col.find({"_id": {"$in": list(oids)}}, {"duration_minutes": 1})
+        return {str(doc["_id"]): doc.get("duration_minutes") async for doc in cursor}
+
+    async def summaries(self, ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Resumos (id, name, classification, season, banner_url) num único $in."""
+        oids = {ObjectId(i) for i in ids if ObjectId.is_valid(i)}
+        if not oids:
+            return {}
+        cursor = self.col.find({"_id": {"$in": list(oids)}}, _SUMMARY_FIELDS)
+        return {str(doc["_id"]): _to_summary(doc) async for doc in cursor}
+
+    # ── Autocomplete ──────────────────────────────────────────────────────────
+
+    async def load_suggest_index(self) -> int:
+        """(Re)constrói o índice de autocomplete a partir de name/tags/cast."""
+        cursor = self.col.find({}, _SUGGEST_FIELDS).batch_size(2000)
+        docs = [_suggest_terms(doc) async for doc in cursor]
+        performance_suggest_index.rebuild(docs)
+        return len(performance_suggest_index)
+
+    @staticmethod
+    def suggest(prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        return performance_suggest_index.suggest(prefix, limit)
 
     # ── Criação ───────────────────────────────────────────────────────────────
 
@@ -104,6 +266,7 @@ class PerformancesRepository:
 
         res = await self.col.insert_one(data)
         doc = await self.col.find_one({"_id": res.inserted_id})
+        _index_for_suggest(doc)
         return _to_out(doc)
 
     # ── Atualização ───────────────────────────────────────────────────────────
@@ -115,7 +278,7 @@ class PerformancesRepository:
         if not updates:
             # Nada para atualizar — retorna o doc atual
             doc = await self.col.find_one({"_id": oid})
-            return _to_out(doc) if doc else None
+            return (await self._with_counts([doc]))[0] if doc else None
 
         updates["updated_at"] = datetime.now(timezone.utc)
 
@@ -124,11 +287,17 @@ class PerformancesRepository:
             {"$set": updates},
             return_document=True,
         )
-        return _to_out(doc) if doc else None
+        await cache.invalidate(cache_key(oid))
+        if not doc:
+            return None
+        _index_for_suggest(doc)
+        return (await self._with_counts([doc]))[0]
 
     # ── Remoção ───────────────────────────────────────────────────────────────
 
     async def delete(self, id: str) -> bool:
         oid = _parse_oid(id)
         result = await self.col.delete_one({"_id": oid})
+        await cache.invalidate(cache_key(oid))
+        performance_suggest_index.remove(str(oid))
         return result.deleted_count == 1
\ No newline at end of file
@@ -8,18 +8,28 @@ Documento de sessão:
     "performance_id": str  (ObjectId da performance como string),
     "theater_id": int,
     "datetime": datetime (UTC),
+    "duration_minutes": int (opcional; ausente em sessões antigas),
     "created_at": datetime,
     "updated_at": datetime,
 }
 """
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+import logging
+
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
 
+from app.core.cache import cache
+from app.core.pagination import decode_cursor, next_cursor
 from app.db.mongo import get_collection
 
 COLLECTION = "sessions"
+DUPLICATE_KEY = 11000
+
+logger = logging.getLogger(__name__)
 
 
 def _col() -> AsyncIOMotorCollection:
@@ -35,30 +45,100 @@ def _to_out(doc: dict) -> dict:
         "performance_id": doc.get("performance_id"),
         "theater_id": doc.get("theater_id"),
         "datetime": doc.get("datetime"),
+        "duration_minutes": doc.get("duration_minutes"),
         "created_at": doc.get("created_at"),
         "updated_at": doc.get("updated_at"),
     }
 
 
+# nome → (chaves, opções). Igualdade primeiro, intervalo/ordenação depois: as
+# consultas "sessões do teatro X a partir de hoje" viram um range scan ordenado.
+INDEXES = {
+    # com _id no fim também atende a agenda por teatro (keyset por datetime, _id)
+    "theater_id_1_datetime_1__id_1": ([("theater_id", 1), ("datetime", 1), ("_id", 1)], {}),
+    "performance_id_1_datetime_1": ([("performance_id", 1), ("datetime", 1)], {}),
+    # paginação keyset: ordena e retoma por (datetime, _id) direto no índice
+    "datetime_1__id_1": ([("datetime", 1), ("_id", 1)], {}),
+    # deduplicação: a mesma sessão não pode existir duas vezes
+    "session_unique": (
+        [("performance_id", 1), ("theater_id", 1), ("datetime", 1)],
+        {"unique": True},
+    ),
+}
+
+# Índices cobertos pelo prefixo dos compostos acima
+OBSOLETE_INDEXES = ("performance_id_1", "theater_id_1", "datetime_1", "theater_id_1_datetime_1")
+
+
 async def ensure_indexes() -> None:
-    """Cria índices necessários (idempotente — só cria se não existir)."""
+    """
+    Cria índices necessários e remove os redundantes (idempotente).
+    Os compostos são criados antes do drop, então nenhuma consulta fica sem índice.
+    """
     col = _col()
     existing = await col.index_information()
-    idx_names = {v.get("name") for v in existing.values()}
+    idx_names = {v.get("name", k) for k, v in existing.items()}
+
+    for name, (keys, options) in INDEXES.items():
+        if name in idx_names:
+            continue
+        try:
+            await col.create_index(keys, name=name, **options)
+        except OperationFailure as e:
+            # ex.: duplicatas antigas impedem o índice único — a API segue no ar
+            logger.warning("índice %s não criado: %s", name, e)
+
+    for name in OBSOLETE_INDEXES:
+        if name in idx_names:
+            await col.drop_index(name)
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+# Listagens por performance/teatro ficam em cache sob estes prefixos; qualquer
+# escrita invalida os prefixos afetados e o `session_count` da performance.
+
+def _performance_prefix(performance_id: str) -> str:
+    return f"sessions:performance:{performance_id}:"
+
+
+def _theater_prefix(theater_id: Any) -> str:
+    return f"sessions:theater:{theater_id}:"
+
+
+def _performance_key(performance_id: str) -> str:
+    # mesma chave de performances_repo.cache_key(ObjectId): o id normalizado
+    if ObjectId.is_valid(performance_id):
+        performance_id = str(ObjectId(performance_id))
+    return f"performance:{performance_id}"
+
+
+async def _invalidate(sessions: Iterable[dict]) -> None:
+    performance_ids = {s["performance_id"] for s in sessions}
+    theater_ids = {int(s["theater_id"]) for s in sessions}
+    if not performance_ids:
+        return
+    await cache.invalidate_prefix(
+        *(_performance_prefix(p) for p in performance_ids),
+        *(_theater_prefix(t) for t in theater_ids),
+    )
+    await cache.invalidate(*(_performance_key(p) for p in performance_ids))
+
+
+def _duration(s: dict) -> dict:
+    return {"duration_minutes": s["duration_minutes"]} if s.get("duration_minutes") else {}
+
 
-    if "performance_id_1" not in idx_names:
-        await col.create_index("performance_id", name="performance_id_1")
-    if "theater_id_1" not in idx_names:
-        await col.create_index("theater_id", name="theater_id_1")
-    if "datetime_1" not in idx_names:
-        await col.create_index("datetime", name="datetime_1")
+def page_cursor(items: List[dict], limit: int) -> Optional[str]:
+    """Cursor opaco (datetime, id) para a página seguinte de `list_all`."""
+    return next_cursor(items, limit, "datetime", "id")
 
 
 async def bulk_insert(sessions: List[dict]) -> List[dict]:
     """
     Insere N sessões de uma vez.
     Cada item deve conter: performance_id, theater_id, datetime.
-    Retorna os documentos inseridos com id resolvido.
+    Retorna os documentos inseridos com id resolvido; sessões que já
+    existiam (índice único) são ignoradas.
     """
     if not sessions:
         return []
@@ -69,29 +149,164 @@ async def bulk_insert(sessions: List[dict]) -> List[dict]:
             "performance_id": s["performance_id"],
             "theater_id": int(s["theater_id"]),
             "datetime": s["datetime"],
+            **_duration(s),
             "created_at": now,
             "updated_at": now,
         }
         for s in sessions
     ]
 
-    result = await _col().insert_many(docs)
-
-    # reconstrói saída com os _id gerados
-    for doc, oid in zip(docs, result.inserted_ids):
-        doc["_id"] = oid
+    # insert_many preenche `_id` nos próprios dicts antes de enviar
+    try:
+        await _col().insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != DUPLICATE_KEY for err in errors):
+            raise
+        skipped = {err["index"] for err in errors}
+        docs = [d for i, d in enumerate(docs) if i not in skipped]
 
+    await _invalidate(docs)
     return [_to_out(d) for d in docs]
 
 
-async def list_by_performance(performance_id: str) -> List[dict]:
-    cursor = _col().find({"performance_id": performance_id}).sort("datetime", 1)
-    return [_to_out(d) async for d in cursor]
+async def upsert_many(sessions: List[dict]) -> Dict[str, int]:
+    """
+    Upsert idempotente por (performance_id, theater_id, datetime) num único
+    bulk_write não-ordenado. Retorna {"inserted", "duplicates", "failed"}.
+    """
+    counts = {"inserted": 0, "duplicates": 0, "failed": 0}
+    if not sessions:
+        return counts
 
+    now = datetime.now(timezone.utc)
+    ops = [
+        UpdateOne(
+            {
+                "performance_id": s["performance_id"],
+                "theater_id": int(s["theater_id"]),
+                "datetime": s["datetime"],
+            },
+            {"$setOnInsert": {**_duration(s), "created_at": now, "updated_at": now}},
+            upsert=True,
+        )
+        for s in sessions
+    ]
+
+    try:
+        result = await _col().bulk_write(ops, ordered=False)
+        details, errors = result.bulk_api_result, []
+    except BulkWriteError as e:
+        details, errors = e.details, e.details.get("writeErrors", [])
+    finally:
+        await _invalidate(sessions)
+
+    # dois upserts concorrentes da mesma chave: o perdedor cai no índice único
+    races = sum(1 for err in errors if err.get("code") == DUPLICATE_KEY)
+    counts["inserted"] = details.get("nUpserted", 0)
+    counts["duplicates"] = details.get("nMatched", 0) + races
+    counts["failed"] = len(errors) - races
+    return counts
+
+
+def _date_filter(date_from: Optional[datetime], date_to: Optional[datetime]) -> dict:
+    rng: dict = {}
+    if date_from:
+        rng["$gte"] = date_from
+    if date_to:
+        rng["$lte"] = date_to
+    return {"datetime": rng} if rng else {}
+
+
+def _find_by_performance(performance_id, date_from, date_to, limit):
+    filt = {"performance_id": performance_id, **_date_filter(date_from, date_to)}
+    return _col().find(filt).sort("datetime", 1).limit(limit)
+
+
+def _find_by_theater(theater_id, date_from, date_to, limit):
+    filt = {"theater_id": theater_id, **_date_filter(date_from, date_to)}
+    return _col().find(filt).sort("datetime", 1).limit(limit)
+
+
+def _find_all(skip, limit, date_from, date_to, after, theater_id=None):
+    filt: dict = _date_filter(date_from, date_to)
+    if theater_id is not None:
+        filt["theater_id"] = theater_id
+
+    if after:
+        last_dt, last_id = decode_cursor(after, 2)
+        if not isinstance(last_dt, datetime) or not ObjectId.is_valid(last_id):
+            raise ValueError("cursor inválido")
+        keyset = {"$or": [
+            {"datetime": {"$gt": last_dt}},
+            {"datetime": last_dt, "_id": {"$gt": ObjectId(last_id)}},
+        ]}
+        filt = {"$and": [filt, keyset]} if filt else keyset
+
+    return (
+        _col().find(filt)
+        .sort([("datetime", 1), ("_id", 1)])
+        .skip(skip)
+        .limit(limit)
+    )
 
-async def list_by_theater(theater_id: int) -> List[dict]:
-    cursor = _col().find({"theater_id": theater_id}).sort("datetime", 1)
-    return [_to_out(d) async for d in cursor]
+
+async def _iter_out(cursor, batch_size: int) -> AsyncIterator[dict]:
+    """Serializa documento a documento, buscando `batch_size` por round trip."""
+    async for d in cursor.batch_size(batch_size):
+        yield _to_out(d)
+
+
+async def list_by_performance(
+    performance_id: str,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = 500,
+) -> List[dict]:
+    async def load() -> List[dict]:
+        cursor = _find_by_performance(performance_id, date_from, date_to, limit)
+        return [_to_out(d) async for d in cursor]
+
+    key = f"{_performance_prefix(performance_id)}{date_from}:{date_to}:{limit}"
+    return await cache.get_or_load(key, load)
+
+
+def iter_by_performance(
+    performance_id: str,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = 0,
+    batch_size: int = 500,
+) -> AsyncIterator[dict]:
+    """Versão streaming de `list_by_performance` (limit=0 → sem limite)."""
+    cursor = _find_by_performance(performance_id, date_from, date_to, limit)
+    return _iter_out(cursor, batch_size)
+
+
+async def list_by_theater(
+    theater_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = 500,
+) -> List[dict]:
+    async def load() -> List[dict]:
+        cursor = _find_by_theater(theater_id, date_from, date_to, limit)
+        return [_to_out(d) async for d in cursor]
+
+    key = f"{_theater_prefix(theater_id)}{date_from}:{date_to}:{limit}"
+    return await cache.get_or_load(key, load)
+
+
+def iter_by_theater(
+    theater_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = 0,
+    batch_size: int = 500,
+) -> AsyncIterator[dict]:
+    """Versão streaming de `list_by_theater` (limit=0 → sem limite)."""
+    cursor = _find_by_theater(theater_id, date_from, date_to, limit)
+    return _iter_out(cursor, batch_size)
 
 
 async def list_all(
@@ -99,26 +314,99 @@ async def list_all(
     limit: int = 100,
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
+    after: Optional[str] = None,
+    theater_id: Optional[int] = None,
 ) -> List[dict]:
-    filt: dict = {}
-    if date_from or date_to:
-        filt["datetime"] = {}
-        if date_from:
-            filt["datetime"]["$gte"] = date_from
-        if date_to:
-            filt["datetime"]["$lte"] = date_to
-
-    cursor = _col().find(filt).sort("datetime", 1).skip(skip).limit(limit)
+    """
+    Lista sessões por (datetime, _id). `after` é o cursor de `page_cursor`:
+    retoma a partir da chave via índice, sem custo proporcional à página.
+    """
+    cursor = _find_all(skip, limit, date_from, date_to, after, theater_id)
     return [_to_out(d) async for d in cursor]
 
 
-async def delete_by_performance(performance_id: str) -> int:
-    """Remove todas as sessões de uma performance. Retorna qtd removida."""
-    result = await _col().delete_many({"performance_id": performance_id})
-    return result.deleted_count
+def iter_all(
+    skip: int = 0,
+    limit: int = 0,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    after: Optional[str] = None,
+    batch_size: int = 500,
+) -> AsyncIterator[dict]:
+    """Versão streaming de `list_all` (limit=0 → sem limite)."""
+    cursor = _find_all(skip, limit, date_from, date_to, after)
+    return _iter_out(cursor, batch_size)
+
+
+async def theater_window(theater_id: int, start: datetime, end: datetime) -> List[dict]:
+    """
+    Sessões do teatro que começam em [start, end), só com os campos da checagem
+    de conflito. Um range scan em theater_id_1_datetime_1__id_1.
+    """
+    cursor = _col().find(
+        {"theater_id": theater_id, "datetime": {"$gte": start, "$lt": end}},
+        {"performance_id": 1, "datetime": 1, "duration_minutes": 1},
+    )
+    return [doc async for doc in cursor.batch_size(5000)]
+
+
+async def count_by_performances(performance_ids: Iterable[str]) -> Dict[str, int]:
+    """
+    Total de sessões por performance num único $group (coberto pelo índice
+    performance_id_1_datetime_1). Performances sem sessão ficam de fora.
+    """
+    ids = list(set(performance_ids))
+    if not ids:
+        return {}
+    pipeline = [
+        {"$match": {"performance_id": {"$in": ids}}},
+        {"$group": {"_id": "$performance_id", "count": {"$sum": 1}}},
+    ]
+    return {row["_id"]: row["count"] async for row in _col().aggregate(pipeline)}
+
+
+async def count_by_performance(performance_id: str, limit: int = 0) -> int:
+    """Sessões da performance, parando de contar em `limit` (0 = sem teto)."""
+    options = {"limit": limit} if limit else {}  # $limit 0 é inválido
+    return await _col().count_documents({"performance_id": performance_id}, **options)
+
+
+async def delete_by_performance(
+    performance_id: str,
+    batch_size: int = 0,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Remove todas as sessões de uma performance. Retorna qtd removida.
+    Com `batch_size`, apaga em lotes de _ids (cada delete_many fica curto e
+    `progress(total_até_agora)` é chamado a cada lote) — uso dos jobs.
+    """
+    col = _col()
+    if not batch_size:
+        deleted = (await col.delete_many({"performance_id": performance_id})).deleted_count
+    else:
+        deleted = 0
+        while True:
+            cursor = col.find({"performance_id": performance_id}, {"_id": 1}).limit(batch_size)
+            ids = [doc["_id"] async for doc in cursor]
+            if not ids:
+                break
+            deleted += (await col.delete_many({"_id": {"$in": ids}})).deleted_count
+            if progress is not None:
+                progress(deleted)
+    # não sabemos quais teatros tinham sessões: invalida todas as listagens por teatro
+    await cache.invalidate_prefix(_performance_prefix(performance_id), "sessions:theater:")
+    await cache.invalidate(_performance_key(performance_id))
+    return deleted
 
 
 async def delete_one(session_id: str) -> bool:
     """Remove uma sessão pelo id. Retorna True se encontrou e removeu."""
-    result = await _col().delete_one({"_id": ObjectId(session_id)})
-    return result.deleted_count == 1
\ No newline at end of file
+    doc = await _col().find_one_and_delete(
+        {"_id": ObjectId(session_id)},
+        projection={"performance_id": 1, "theater_id": 1},
+    )
+    if not doc:
+        return False
+    await _invalidate([doc])
+    return True
\ No newline at end of file
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import and_, column, func, literal_column, or_, select, table, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import cache
+from app.core.pagination import decode_cursor, encode_cursor
+from app.db import migrations
+from app.indexes.geo import theaters_geo_index
 from app.models.theater import Theater
 from app.schemas.theaters import TheaterCreate, TheaterUpdate
+from app.storage.uploads import decode_base64_image, discard, save_bytes
 import unicodedata
 import re
 
@@ -22,6 +28,22 @@ def _slugify(value: str) -> str:
   value = re.sub(r"[\s_-]+", "-", value)
   return value or "theater"
 
+def _search_terms(q: str) -> List[str]:
+  """Palavras de `q` na normalização do slug: "Ópera  SP" → ["opera", "sp"]."""
+  return _slugify(q).split("-") if re.search(r"[^\W_]", q) else []
+
+_fts = table(migrations.THEATERS_FTS, column("rowid"))
+
+def _fts_ids(terms: List[str]):
+  """rowids da tabela FTS5 que casam todos os termos como prefixo."""
+  expr = " ".join(f'"{t}"*' for t in terms)
+  return select(_fts.c.rowid).where(literal_column(migrations.THEATERS_FTS).match(expr))
+
+def _like_any(terms: List[str]):
+  """Fallback sem FTS5 (ex.: PostgreSQL): substring em nome, bairro ou cidade."""
+  fields = (Theater.name_key, func.lower(Theater.neighborhood), func.lower(Theater.city))
+  return and_(*(or_(*(f.like(f"%{t}%") for f in fields)) for t in terms))
+
 def _to_public(obj: Theater) -> Dict[str, Any]:
     address = {
         "street": obj.street or "",
@@ -52,9 +74,18 @@ def _to_public(obj: Theater) -> Dict[str, Any]:
         "address": address,
         "location": location,
         "contacts": contacts,
-        "photo_base64": obj.photo_base64,
+        "photo_url": obj.photo_url,
     }
 
+
+async def _store_photo(photo_base64: str) -> str:
+    """
+    Converte base64 legado em arquivo no media store (IO no thread pool).
+    Retorna a URL relativa; se o commit falhar, apague com `discard`.
+    """
+    content, ext = decode_base64_image(photo_base64)
+    return await asyncio.to_thread(save_bytes, "theaters", content, ext)
+
 class TheatersRepo:
     """
     Repositório usando SQL (SQLAlchemy Async) para a entidade Theater.
@@ -63,24 +94,127 @@ class TheatersRepo:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def list(self, limit: int = 100, skip: int = 0) -> List[Dict[str, Any]]:
+    async def _commit(self, stored_photo: Optional[str] = None) -> None:
+        """Commit; se falhar, a foto gravada para esta escrita não fica órfã."""
+        try:
+            await self.session.commit()
+        except BaseException:
+            if stored_photo:
+                await asyncio.to_thread(discard, stored_photo)
+            raise
+
+    @staticmethod
+    def page_cursor(items: List[Dict[str, Any]], limit: int) -> Optional[str]:
+        """Cursor opaco (name_key, id) para a página seguinte de `list`."""
+        if not items or len(items) < limit:
+            return None
+        last = items[-1]
+        return encode_cursor([_slugify(last["name"]), last["id"]])
+
+    async def list(
+        self,
+        limit: int = 100,
+        skip: int = 0,
+        after: Optional[str] = None,
+        q: Optional[str] = None,
+        city: Optional[str] = None,
+        state: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Teatros em ordem de `name_key` (sem acento/caixa). `q` busca por
+        prefixo de palavra em nome, bairro e cidade ("oper" acha "Ópera");
+        `city`/`state` são filtros exatos cobertos pelos índices compostos.
+        """
+        stmt = select(Theater)
+        if q is not None:
+            terms = _search_terms(q)
+            if not terms:
+                return []
+            if migrations.theaters_fts_enabled:
+                stmt = stmt.where(Theater.id.in_(_fts_ids(terms)))
+            else:
+                stmt = stmt.where(_like_any(terms))
+        if city:
+            stmt = stmt.where(Theater.city == city.strip())
+        if state:
+            stmt = stmt.where(Theater.state == state.strip().upper())
+        if after:
+            last_key, last_id = decode_cursor(after, 2)
+            if not isinstance(last_key, str) or not isinstance(last_id, int):
+                raise ValueError("cursor inválido")
+            # retoma pelo índice (name_key, id) em vez de OFFSET
+            stmt = stmt.where(tuple_(Theater.name_key, Theater.id) > (last_key, last_id))
         stmt = (
-            select(Theater)
+            stmt
+            .order_by(Theater.name_key, Theater.id)
             .offset(skip)
             .limit(limit)
-            .order_by(Theater.name)
         )
         result = await self.session.execute(stmt)
         theaters = result.scalars().all()
         return [_to_public(t) for t in theaters]
 
+    async def summaries(self, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Resumos (id, name, slug, city, state, photo_url) num único IN (...)."""
+        ids = set(ids)
+        if not ids:
+            return {}
+        stmt = select(
+            Theater.id, Theater.name, Theater.slug,
+            Theater.city, Theater.state, Theater.photo_url,
+        ).where(Theater.id.in_(ids))
+        result = await self.session.execute(stmt)
+        return {row.id: dict(row._mapping) for row in result.all()}
+
+    async def load_geo_index(self) -> int:
+        """(Re)constrói o índice espacial em memória a partir de (id, lat, lng)."""
+        stmt = select(Theater.id, Theater.lat, Theater.lng).where(
+            Theater.lat.is_not(None), Theater.lng.is_not(None)
+        )
+        result = await self.session.execute(stmt)
+        theaters_geo_index.clear()
+        for id_, lat, lng in result.all():
+            theaters_geo_index.upsert(id_, lat, lng)
+        return len(theaters_geo_index)
+
+    async def nearby(
+        self,
+        lat: float,
+        lng: float,
+        radius_km: float = 10,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """Teatros mais próximos de (lat, lng), ordenados por distância haversine."""
+        hits = theaters_geo_index.nearest(lat, lng, k=limit, radius_km=radius_km)
+        if not hits:
+            return []
+
+        stmt = select(Theater).where(Theater.id.in_([id_ for id_, _ in hits]))
+        result = await self.session.execute(stmt)
+        by_id = {t.id: t for t in result.scalars().all()}
+
+        out = []
+        for id_, dist in hits:
+            obj = by_id.get(id_)
+            if obj is None:
+                # removido por outro processo: índice local ficou defasado
+                theaters_geo_index.remove(id_)
+                continue
+            item = _to_public(obj)
+            item["distance_km"] = round(dist, 3)
+            out.append(item)
+        return out
+
     async def get(self, id_: int | str) -> Optional[Dict[str, Any]]:
         try:
             pk = int(id_)
         except (ValueError, TypeError):
             return None
-        obj = await self.session.get(Theater, pk)
-        return _to_public(obj) if obj else None
+        async def load() -> Optional[Dict[str, Any]]:
+            obj = await self.session.get(Theater, pk)
+            return _to_public(obj) if obj else None
+
+        return await cache.get_or_load(f"theater:{pk}", load)
 
     async def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
         name = data["name"]
@@ -97,6 +231,7 @@ class TheatersRepo:
 
         obj = Theater(
             name=name,
+            name_key=_slugify(name),
             slug=slug,
             street=addr.get("street"),
             number=addr.get("number"),
@@ -110,12 +245,16 @@ class TheatersRepo:
             website=(contacts.get("website") or None),
             instagram=(contacts.get("instagram") or None),
             phone=(contacts.get("phone") or None),
-            photo_base64=data.get("photo_base64"),
+            photo_url=data.get("photo_url"),
         )
+        stored = None
+        if data.get("photo_base64"):
+            stored = obj.photo_url = await _store_photo(data["photo_base64"])
 
         self.session.add(obj)
-        await self.session.commit()
+        await self._commit(stored)
         await self.session.refresh(obj)
+        theaters_geo_index.upsert(obj.id, obj.lat, obj.lng)
         return _to_public(obj)
 
     async def update(self, id_: int | str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -133,6 +272,7 @@ class TheatersRepo:
             if new_name and new_name != (obj.name or ""):
                 obj.name = new_name
                 obj.slug = _slugify(new_name)
+                obj.name_key = obj.slug
 
         addr = data.get("address")
         if addr:
@@ -155,11 +295,17 @@ class TheatersRepo:
             obj.instagram = contacts.get("instagram", obj.instagram)
             obj.phone = contacts.get("phone", obj.phone)
 
-        if "photo_base64" in data:
-            obj.photo_base64 = data["photo_base64"]
+        if "photo_url" in data:
+            obj.photo_url = data["photo_url"]
+        stored = None
+        if data.get("photo_base64"):
+            stored = obj.photo_url = await _store_photo(data["photo_base64"])
+            obj.photo_base64 = None
 
-        await self.session.commit()
+        await self._commit(stored)
         await self.session.refresh(obj)
+        theaters_geo_index.upsert(obj.id, obj.lat, obj.lng)
+        await cache.invalidate(f"theater:{pk}")
         return _to_public(obj)
 
     async def delete(self, id_: int | str) -> bool:
@@ -174,4 +320,6 @@ class TheatersRepo:
 
         await self.session.delete(obj)
         await self.session.commit()
+        theaters_geo_index.remove(pk)
+        await cache.invalidate(f"theater:{pk}")
         return True
@@ -0,0 +1,22 @@
+"""
+routes/jobs.py
+Acompanhamento dos jobs em background (app/core/jobs.py) criados pelas rotas
+que respondem 202 (ex.: POST /sessions/rule?background=true).
+"""
+from fastapi import APIRouter, HTTPException
+
+from app.core.jobs import jobs
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/{id}")
+async def get_job(id: str):
+    """Status (queued, running, succeeded, failed), progresso e resultado."""
+    try:
+        job = await jobs.get(id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
@@ -10,36 +10,109 @@ O banco passa a guardar apenas o campo `image_url: str`, ex:
 
 Para servir, o frontend acessa:
   GET http://localhost:8000/static/uploads/banners/abc123.jpg
+
+O nome do arquivo é o sha256 do conteúdo: uploads idênticos viram um único
+arquivo, com contagem de referências — DELETE só apaga o arquivo quando a
+última referência é liberada. Como a URL nunca muda de conteúdo, /static
+serve os uploads com `Cache-Control: immutable` (app/storage/static.py).
+
+Cada upload também gera variantes menores em segundo plano
+(abc123-480w.webp etc. — ver app/storage/derivatives.py); a resposta já traz
+o manifesto com as URLs e o `srcset`.
 """
-import uuid
+import asyncio
 from pathlib import Path
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
-from fastapi.staticfiles import StaticFiles  # montado em main.py
-
-UPLOAD_ROOT = Path("static/uploads")
-ALLOWED_TYPES = {"image/jpeg", "image/png", "image/webp"}
+from typing import Callable
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, Response, UploadFile
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.sql import get_session
+from app.repositories.media_repo import MediaRepo
+from app.storage import derivatives
+from app.storage.uploads import (
+    MIME_TO_EXT,
+    UPLOAD_ROOT,
+    UploadTooLarge,
+    category_dir,
+    normalize_url,
+    path_lock,
+    publish,
+    stage_stream,
+)
+
+ALLOWED_TYPES = set(MIME_TO_EXT)
 MAX_SIZE_MB = 5
 MAX_SIZE_BYTES = MAX_SIZE_MB * 1024 * 1024
+# folga para boundary/cabeçalhos do multipart no teto do corpo
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+MAX_BODY_BYTES = MAX_SIZE_BYTES + MULTIPART_OVERHEAD_BYTES
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Arquivo muito grande. Limite: {MAX_SIZE_MB}MB."
+    )
+
+
+class LimitedBodyRoute(APIRoute):
+    """
+    Teto do corpo aplicado antes de o FastAPI ler o multipart (o que ele faz
+    antes de qualquer dependência, spoolando o arquivo em disco):
+    Content-Length acima de MAX_BODY_BYTES → 413 sem ler nada; sem
+    Content-Length (chunked), o receive conta os bytes e corta ao passar.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def limited(request: Request) -> Response:
+            length = request.headers.get("content-length")
+            if length and length.isdigit() and int(length) > MAX_BODY_BYTES:
+                raise _too_large()
+            receive = request.receive
+            received = 0
+
+            async def counting_receive():
+                nonlocal received
+                message = await receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > MAX_BODY_BYTES:
+                        raise _too_large()
+                return message
+
+            return await handler(Request(request.scope, counting_receive))
+
+        return limited
+
+
+router = APIRouter(prefix="/media", tags=["Media"], route_class=LimitedBodyRoute)
+
 
-router = APIRouter(prefix="/media", tags=["Media"])
+def get_repo(session: AsyncSession = Depends(get_session)) -> MediaRepo:
+    return MediaRepo(session)
 
 
 def _category_dir(category: str) -> Path:
-    if category not in ("banners", "theaters"):
+    try:
+        return category_dir(category)
+    except ValueError:
         raise HTTPException(status_code=400, detail="category deve ser 'banners' ou 'theaters'")
-    d = UPLOAD_ROOT / category
-    d.mkdir(parents=True, exist_ok=True)
-    return d
 
 
 @router.post("/upload", status_code=201)
 async def upload_image(
     category: str = Form(..., description="'banners' ou 'theaters'"),
     file: UploadFile = File(...),
+    repo: MediaRepo = Depends(get_repo),
 ):
     """
     Recebe multipart/form-data com campo 'file' e 'category'.
-    Retorna { url: "static/uploads/<category>/<uuid>.<ext>" }
+    Retorna { url: "static/uploads/<category>/<sha256>.<ext>", variants: {...} }
+    O arquivo é copiado em blocos (limite checado a cada bloco) e gravado
+    fora do event loop; as variantes ficam "pending" até o pool terminar.
     """
     if file.content_type not in ALLOWED_TYPES:
         raise HTTPException(
@@ -47,38 +120,63 @@ async def upload_image(
             detail=f"Tipo não suportado: {file.content_type}. Use JPEG, PNG ou WebP."
         )
 
-    content = await file.read()
-    if len(content) > MAX_SIZE_BYTES:
-        raise HTTPException(
-            status_code=413,
-            detail=f"Arquivo muito grande. Limite: {MAX_SIZE_MB}MB."
-        )
-
     ext = file.filename.rsplit(".", 1)[-1].lower() if "." in file.filename else "jpg"
-    filename = f"{uuid.uuid4().hex}.{ext}"
-    dest = _category_dir(category) / filename
+    _category_dir(category)  # valida a categoria antes de gravar
 
-    dest.write_bytes(content)
+    try:
+        staged = await stage_stream(category, file, ext, MAX_SIZE_BYTES)
+    except UploadTooLarge:
+        raise _too_large()
 
-    relative_url = f"static/uploads/{category}/{filename}"
-    return {"url": relative_url}
+    relative_url = staged.url
+    async with path_lock(relative_url):
+        await repo.retain(relative_url, staged.sha256, staged.size)
+        try:
+            await asyncio.to_thread(publish, staged)
+        except BaseException:
+            await repo.release(relative_url)
+            await asyncio.to_thread(staged.tmp.unlink, missing_ok=True)
+            raise
 
+    derivatives.schedule(relative_url)
+    return {"url": relative_url, "variants": await derivatives.manifest(relative_url)}
 
-@router.delete("/upload")
-async def delete_image(url: str):
-    """
-    Remove um arquivo pelo path relativo armazenado no banco.
-    Exemplo: url = "static/uploads/banners/abc123.jpg"
-    """
+
+def _safe_upload_path(url: str) -> Path:
     path = Path(url)
     # Garante que está dentro de static/uploads (evita path traversal)
     try:
         path.resolve().relative_to(UPLOAD_ROOT.resolve())
     except ValueError:
         raise HTTPException(status_code=400, detail="Path inválido.")
+    return path
 
-    if not path.exists():
+
+@router.get("/variants")
+async def get_variants(url: str):
+    """Manifesto das variantes de um upload (status: pending/ready/failed…)."""
+    if not await asyncio.to_thread(_safe_upload_path(url).exists):
         raise HTTPException(status_code=404, detail="Arquivo não encontrado.")
+    return await derivatives.manifest(url)
+
 
-    path.unlink()
-    return {"deleted": url}
\ No newline at end of file
+@router.delete("/upload")
+async def delete_image(url: str, repo: MediaRepo = Depends(get_repo)):
+    """
+    Libera uma referência ao arquivo; o arquivo (e suas variantes) só é
+    removido quando não resta nenhuma. Uploads antigos (nome por uuid, sem
+    contagem) são removidos direto.
+    Exemplo: url = "static/uploads/banners/abc123.jpg"
+    """
+    path = _safe_upload_path(url)
+    url = normalize_url(url)
+    async with path_lock(url):
+        if not await asyncio.to_thread(path.exists):
+            raise HTTPException(status_code=404, detail="Arquivo não encontrado.")
+
+        # 0 só quando este release removeu o registro; None = upload antigo
+        remaining = await repo.release(url)
+        if not remaining:
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+            await asyncio.to_thread(derivatives.delete_variants, url)
+    return {"deleted": url, "references": remaining or 0}
\ No newline at end of file
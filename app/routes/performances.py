@@ -4,14 +4,23 @@ Performances são metadados puros. Filtros por theater_id e por data
 foram removidos daqui — agora ficam em /sessions (a fonte de verdade).
 """
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from bson import ObjectId
 
+import app.repositories.sessions_repo as sessions_repo
 from app.schemas.performances import PerformanceIn, PerformanceOut, PerformanceUpdate
 from app.repositories.performances_repo import PerformancesRepository
+from app.core.jobs import accepted, jobs
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.responses import json_response
+from app.core.streaming import STREAM_BATCH_SIZE, ndjson_response, wants_ndjson
 
 router = APIRouter(prefix="/performances", tags=["performances"])
 repo = PerformancesRepository()
 
+# até aqui as sessões são removidas na própria requisição; acima, num job
+INLINE_SESSION_DELETE = 1_000
+
 
 @router.on_event("startup")
 async def startup():
@@ -20,13 +29,46 @@ async def startup():
 
 @router.get("", response_model=List[PerformanceOut], response_model_by_alias=True)
 async def list_performances(
-    q: Optional[str] = Query(None, description="Busca por nome, sinopse ou tags"),
+    request: Request,
+    q: Optional[str] = Query(None, description="Busca por nome, sinopse ou tags (ordenada por relevância)"),
     season: Optional[int] = Query(None, description="Ano da temporada"),
     classification: Optional[str] = Query(None),
     skip: int = 0,
     limit: int = 50,
+    after: Optional[str] = Query(None, description=f"Cursor do header {NEXT_CURSOR_HEADER}"),
+):
+    """
+    Com `Accept: application/x-ndjson` a resposta é enviada em streaming,
+    uma performance por linha (`limit=0` exporta tudo).
+    """
+    try:
+        if wants_ndjson(request):
+            items = repo.iter_list(
+                q=q, season=season, classification=classification,
+                skip=skip, limit=limit, after=after, batch_size=STREAM_BATCH_SIZE,
+            )
+            return ndjson_response(items, PerformanceOut)
+        items = await repo.list(
+            q=q, season=season, classification=classification,
+            skip=skip, limit=limit, after=after,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cursor = repo.page_cursor(items, limit, ranked=bool(q))
+    headers = {NEXT_CURSOR_HEADER: cursor} if cursor else None
+    return json_response(items, PerformanceOut, headers=headers)
+
+
+@router.get("/suggest")
+async def suggest_performances(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
 ):
-    return await repo.list(q=q, season=season, classification=classification, skip=skip, limit=limit)
+    """
+    Autocomplete por início de palavra em nomes, tags e elenco, sem acento e
+    sem diferenciar maiúsculas. Responde do índice em memória (sem Mongo).
+    """
+    return json_response(repo.suggest(prefix, limit))
 
 
 @router.get("/{id}", response_model=PerformanceOut, response_model_by_alias=True)
@@ -53,11 +95,26 @@ async def update_performance(id: str, payload: PerformanceUpdate):
     return updated
 
 
-@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{id}", status_code=status.HTTP_204_NO_CONTENT,
+    responses={202: {"description": "Sessões sendo removidas num job; acompanhe em GET /jobs/{id}"}},
+)
 async def delete_performance(id: str):
+    """
+    Remove a performance e suas sessões. Poucas sessões: tudo na requisição
+    (204). Muitas: a performance sai na hora e as sessões num job (202).
+    """
     try:
         ok = await repo.delete(id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     if not ok:
-        raise HTTPException(status_code=404, detail="Performance não encontrada")
\ No newline at end of file
+        raise HTTPException(status_code=404, detail="Performance não encontrada")
+    # sessões guardam o id normalizado; o do path pode vir em maiúsculas
+    performance_id = str(ObjectId(id))
+    pending = await sessions_repo.count_by_performance(performance_id, limit=INLINE_SESSION_DELETE + 1)
+    if pending > INLINE_SESSION_DELETE:
+        return accepted(await jobs.submit("sessions.delete_by_performance", {"performance_id": performance_id}))
+    if pending:
+        await sessions_repo.delete_by_performance(performance_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+routes/schedule.py
+Agenda para o calendário: sessões (Mongo) com resumo do teatro (SQL) e da
+performance (Mongo) embutidos.
+
+Custo fixo por página, independente do nº de sessões: uma consulta de
+sessões, um `$in` em `performances` e um `IN (...)` em `theaters` com os ids
+distintos da página (os dois últimos em paralelo).
+"""
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.repositories.sessions_repo as sessions_repo
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.responses import json_response
+from app.db.sql import get_session
+from app.repositories.performances_repo import PerformancesRepository
+from app.repositories.theaters_repo import TheatersRepo
+from app.schemas.schedule import ScheduleItem
+
+router = APIRouter(prefix="/schedule", tags=["Schedule"])
+performances = PerformancesRepository()
+
+
+@router.get("", response_model=List[ScheduleItem])
+async def get_schedule(
+    date_from: Optional[datetime] = Query(None),
+    date_to:   Optional[datetime] = Query(None),
+    theater_id: Optional[int] = Query(None),
+    limit: int = Query(200, ge=1, le=1000),
+    after: Optional[str] = Query(None, description=f"Cursor do header {NEXT_CURSOR_HEADER}"),
+    session: AsyncSession = Depends(get_session),
+):
+    try:
+        items = await sessions_repo.list_all(
+            limit=limit, date_from=date_from, date_to=date_to,
+            after=after, theater_id=theater_id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    perf_by_id, theater_by_id = await asyncio.gather(
+        performances.summaries(s["performance_id"] for s in items if s["performance_id"]),
+        TheatersRepo(session).summaries(s["theater_id"] for s in items),
+    )
+
+    cursor = sessions_repo.page_cursor(items, limit)
+    headers = {NEXT_CURSOR_HEADER: cursor} if cursor else None
+
+    schedule = [
+        {
+            "id": s["id"],
+            "datetime": s["datetime"],
+            "performance_id": s["performance_id"],
+            "theater_id": s["theater_id"],
+            "performance": perf_by_id.get(s["performance_id"]),
+            "theater": theater_by_id.get(s["theater_id"]),
+        }
+        for s in items
+    ]
+    return json_response(schedule, ScheduleItem, headers=headers)
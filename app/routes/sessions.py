@@ -3,13 +3,27 @@ routes/sessions.py
 Sessões são a única fonte de verdade (coleção MongoDB independente).
 Performances NÃO armazenam mais sessões embedded.
 """
-from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel, field_validator
+from datetime import date, datetime, time, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+from fastapi import APIRouter, File, Form, HTTPException, Query, Request, Response, UploadFile
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field, field_validator
 from bson import ObjectId
 
 import app.repositories.sessions_repo as repo
+from app.core.jobs import Job, JobFailed, accepted, jobs
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.responses import json_response
+from app.core.streaming import STREAM_BATCH_SIZE, ndjson_response, wants_ndjson
+from app.services.session_conflicts import (
+    CONFLICTS_HEADER,
+    MAX_SESSION_MINUTES,
+    conflict_report,
+    find_conflicts,
+    resolve_duration,
+)
+from app.services.session_import import detect_format, import_sessions
 
 router = APIRouter(prefix="/sessions", tags=["Sessions"])
 
@@ -23,6 +37,7 @@ class SessionOut(BaseModel):
     performance_id: Optional[str]
     theater_id: int
     datetime: datetime
+    duration_minutes: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
@@ -35,13 +50,15 @@ class RulePayload(BaseModel):
     end_date: str            # "YYYY-MM-DD"
     # chave = weekday (0=seg … 6=dom), valor = lista de horários "HH:MM"
     rules: Dict[int, List[str]]
+    # None = duração da performance (ou o padrão)
+    duration_minutes: Optional[int] = Field(None, ge=1, le=MAX_SESSION_MINUTES)
 
     @field_validator("performance_id")
     @classmethod
     def valid_oid(cls, v: str) -> str:
         if not ObjectId.is_valid(v):
             raise ValueError("performance_id inválido")
-        return v
+        return str(ObjectId(v))
 
 
 class ManualPayload(BaseModel):
@@ -50,40 +67,173 @@ class ManualPayload(BaseModel):
     theater_id: int
     # lista de ISO datetime strings: "2025-10-04T20:00:00"
     datetimes: List[str]
+    duration_minutes: Optional[int] = Field(None, ge=1, le=MAX_SESSION_MINUTES)
 
     @field_validator("performance_id")
     @classmethod
     def valid_oid(cls, v: str) -> str:
         if not ObjectId.is_valid(v):
             raise ValueError("performance_id inválido")
-        return v
+        return str(ObjectId(v))
 
 
 # ─────────────────────────────────────────────
 # Helpers internos
 # ─────────────────────────────────────────────
 
-def _expand_rules(payload: RulePayload) -> List[dict]:
-    """Expande regras de recorrência em lista de {performance_id, theater_id, datetime}."""
-    start = datetime.fromisoformat(payload.start_date).replace(tzinfo=timezone.utc)
-    end   = datetime.fromisoformat(payload.end_date).replace(tzinfo=timezone.utc)
-
-    sessions = []
-    current = start
-    while current <= end:
-        weekday = current.weekday()  # Python: 0=seg, 6=dom
-        if weekday in payload.rules:
-            for hour_str in payload.rules[weekday]:
+# Teto de sessões por regra na requisição; com ?background=true vira job
+# (até MAX_BACKGROUND_RULE_SESSIONS — acima disso, use /sessions/import).
+# A checagem de conflitos materializa a regra inteira, daí o teto do job.
+MAX_RULE_SESSIONS = 10_000
+MAX_BACKGROUND_RULE_SESSIONS = 100_000
+RULE_INSERT_BATCH = 1_000
+# lote de DELETE dos jobs de remoção em massa
+DELETE_BATCH = 1_000
+# teto de `limit` nas listagens por performance/teatro em JSON; em NDJSON
+# não há teto e limit=0 exporta tudo
+MAX_LIST_LIMIT = 5_000
+WEEK = timedelta(days=7)
+
+
+def _check_json_limit(limit: int) -> None:
+    if not 1 <= limit <= MAX_LIST_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit deve estar entre 1 e {MAX_LIST_LIMIT} "
+                   "(sem teto com Accept: application/x-ndjson; 0 exporta tudo)",
+        )
+
+
+def _rule_dates(payload: RulePayload) -> Tuple[date, date]:
+    try:
+        start = date.fromisoformat(payload.start_date[:10])
+        end = date.fromisoformat(payload.end_date[:10])
+    except ValueError:
+        raise ValueError("start_date/end_date devem ser YYYY-MM-DD")
+    return start, end
+
+
+def _parse_rules(rules: Dict[int, List[str]]) -> Dict[int, List[timedelta]]:
+    """weekday → horários já convertidos em offset do dia (parse único)."""
+    parsed: Dict[int, List[timedelta]] = {}
+    for weekday, hours in rules.items():
+        if not 0 <= weekday <= 6:
+            raise ValueError(f"weekday inválido: {weekday} (use 0=seg … 6=dom)")
+        offsets = set()
+        for hour_str in hours:
+            try:
                 h, m = map(int, hour_str.split(":"))
-                dt = current.replace(hour=h, minute=m, second=0, microsecond=0)
-                sessions.append({
+                time(h, m)  # valida faixa
+            except (ValueError, TypeError):
+                raise ValueError(f"horário inválido: {hour_str!r} (use HH:MM)")
+            offsets.add(timedelta(hours=h, minutes=m))
+        if offsets:
+            parsed[weekday] = sorted(offsets)
+    return parsed
+
+
+def _expand_rules(payload: RulePayload) -> Iterator[dict]:
+    """
+    Gera {performance_id, theater_id, datetime} em ordem cronológica, sob demanda.
+    Anda de semana em semana e só visita os dias da semana que têm regra.
+    """
+    start, end = _rule_dates(payload)
+    rules = sorted(_parse_rules(payload.rules).items())
+    if not rules or start > end:
+        return
+
+    day_offsets = [(timedelta(days=weekday), offsets) for weekday, offsets in rules]
+    duration = {"duration_minutes": payload.duration_minutes} if payload.duration_minutes else {}
+    start_dt = datetime.combine(start, time(), tzinfo=timezone.utc)
+    end_dt = datetime.combine(end, time(), tzinfo=timezone.utc)
+    week = start_dt - timedelta(days=start.weekday())  # segunda-feira da 1ª semana
+
+    while week <= end_dt:
+        for day_offset, offsets in day_offsets:
+            day = week + day_offset
+            if day < start_dt:
+                continue
+            if day > end_dt:
+                return
+            for offset in offsets:
+                yield {
                     "performance_id": payload.performance_id,
                     "theater_id": payload.theater_id,
-                    "datetime": dt,
-                })
-        current += timedelta(days=1)
+                    "datetime": day + offset,
+                    **duration,
+                }
+        week += WEEK
+
+
+def _count_rule_sessions(payload: RulePayload) -> int:
+    """Total que `_expand_rules` geraria, em O(7) — sem expandir nada."""
+    start, end = _rule_dates(payload)
+    total_days = (end - start).days + 1
+    if total_days <= 0:
+        return 0
+    full_weeks, rest = divmod(total_days, 7)
+    count = 0
+    for weekday, offsets in _parse_rules(payload.rules).items():
+        days = full_weeks + (1 if (weekday - start.weekday()) % 7 < rest else 0)
+        count += days * len(offsets)
+    return count
+
+
+def _last_rule_session(payload: RulePayload) -> Optional[datetime]:
+    start, end = _rule_dates(payload)
+    rules = _parse_rules(payload.rules)
+    for back in range(7):
+        day = end - timedelta(days=back)
+        if day < start:
+            break
+        if day.weekday() in rules:
+            return datetime.combine(day, time(), tzinfo=timezone.utc) + rules[day.weekday()][-1]
+    return None
+
+
+def _batched(items: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    while batch := list(islice(items, size)):
+        yield batch
+
 
-    return sessions
+def _reject_conflicts(conflicts: List[dict]) -> HTTPException:
+    detail = {"message": f"{len(conflicts)} sessões conflitam com outras no mesmo teatro.",
+              **conflict_report(conflicts)}
+    return HTTPException(status_code=409, detail=jsonable_encoder(detail))
+
+
+# ─────────────────────────────────────────────
+# Jobs (app/core/jobs.py) — idempotentes: podem rodar de novo após queda
+# ─────────────────────────────────────────────
+
+@jobs.handler("sessions.rule")
+async def rule_job(job: Job) -> dict:
+    # jobs enfileirados antes do `strict` guardam a regra direto em params
+    payload = RulePayload(**job.params.get("rule", job.params))
+    job.progress(0, _count_rule_sessions(payload))
+    conflicts = await find_conflicts(list(_expand_rules(payload)))
+    if conflicts and job.params.get("strict"):
+        raise JobFailed(f"{len(conflicts)} sessões conflitam com outras no mesmo teatro",
+                        conflict_report(conflicts))
+    counts = {"inserted": 0, "duplicates": 0, "failed": 0}
+    done = 0
+    for batch in _batched(_expand_rules(payload), RULE_INSERT_BATCH):
+        # upsert (não insert): uma nova tentativa não duplica o que já entrou
+        for key, value in (await repo.upsert_many(batch)).items():
+            counts[key] += value
+        done += len(batch)
+        job.progress(done)
+    return {**counts, **conflict_report(conflicts)}
+
+
+@jobs.handler("sessions.delete_by_performance")
+async def delete_by_performance_job(job: Job) -> dict:
+    performance_id = job.params["performance_id"]
+    job.progress(0, await repo.count_by_performance(performance_id))
+    deleted = await repo.delete_by_performance(
+        performance_id, batch_size=DELETE_BATCH, progress=job.progress,
+    )
+    return {"deleted": deleted}
 
 
 # ─────────────────────────────────────────────
@@ -95,18 +245,93 @@ async def startup():
     await repo.ensure_indexes()
 
 
-@router.post("/rule", status_code=201, response_model=List[SessionOut])
-async def create_by_rule(payload: RulePayload):
-    """Gera sessões automaticamente a partir de regras semanais."""
-    sessions = _expand_rules(payload)
-    if not sessions:
+@router.post("/rule/preview")
+async def preview_rule(
+    payload: RulePayload,
+    conflicts: bool = Query(False, description="Inclui o relatório de conflitos de sala (expande a regra)"),
+):
+    """Dry-run de /sessions/rule: quantas sessões seriam criadas e o intervalo, sem gravar."""
+    try:
+        count = _count_rule_sessions(payload)
+        first = next(_expand_rules(payload), None)
+        last = _last_rule_session(payload) if count else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    out = {
+        "count": count,
+        "first": first["datetime"] if first else None,
+        "last": last,
+        "max_allowed": MAX_RULE_SESSIONS,
+    }
+    if conflicts and 0 < count <= MAX_BACKGROUND_RULE_SESSIONS:
+        out["duration_minutes"] = await resolve_duration(payload.performance_id, payload.duration_minutes)
+        out.update(conflict_report(await find_conflicts(list(_expand_rules(payload)))))
+    return out
+
+
+@router.post(
+    "/rule", status_code=201, response_model=List[SessionOut],
+    responses={
+        202: {"description": "Job criado (background=true); acompanhe em GET /jobs/{id}"},
+        409: {"description": "strict=true e há conflitos de sala; nada foi gravado"},
+    },
+)
+async def create_by_rule(
+    payload: RulePayload,
+    response: Response,
+    background: bool = Query(False, description="Expande e grava num job; responde 202"),
+    strict: bool = Query(False, description="Rejeita tudo (409) se alguma sessão conflitar no teatro"),
+):
+    """
+    Gera sessões automaticamente a partir de regras semanais. Conflitos de
+    sala seguem as mesmas regras de /sessions/manual (no job, vão no `result`).
+    """
+    try:
+        count = _count_rule_sessions(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not count:
         raise HTTPException(status_code=400, detail="Nenhuma sessão gerada. Verifique as datas e regras.")
-    return await repo.bulk_insert(sessions)
-
-
-@router.post("/manual", status_code=201, response_model=List[SessionOut])
-async def create_manual(payload: ManualPayload):
-    """Insere sessões em datas/horários específicos."""
+    limit = MAX_BACKGROUND_RULE_SESSIONS if background else MAX_RULE_SESSIONS
+    if count > limit:
+        hint = "" if background else " Use ?background=true para processar num job."
+        raise HTTPException(
+            status_code=400,
+            detail=f"Regra gera {count} sessões (limite {limit}). "
+                   f"Divida o período ou confira em /sessions/rule/preview.{hint}",
+        )
+    if background:
+        params = {"rule": payload.model_dump(mode="json"), "strict": strict}
+        return accepted(await jobs.submit("sessions.rule", params))
+
+    conflicts = await find_conflicts(list(_expand_rules(payload)))
+    if conflicts and strict:
+        raise _reject_conflicts(conflicts)
+
+    created: List[dict] = []
+    for batch in _batched(_expand_rules(payload), RULE_INSERT_BATCH):
+        created.extend(await repo.bulk_insert(batch))
+    if conflicts:
+        response.headers[CONFLICTS_HEADER] = str(len(conflicts))
+    return created
+
+
+@router.post(
+    "/manual", status_code=201, response_model=List[SessionOut],
+    responses={409: {"description": "strict=true e há conflitos de sala; nada foi gravado"}},
+)
+async def create_manual(
+    payload: ManualPayload,
+    response: Response,
+    strict: bool = Query(False, description="Rejeita tudo (409) se alguma sessão conflitar no teatro"),
+):
+    """
+    Insere sessões em datas/horários específicos. Conflitos de sala com a
+    agenda (ou entre as próprias sessões) vão no header X-Session-Conflicts;
+    com `strict=true`, nada é gravado e a resposta 409 traz o relatório.
+    """
+    # sem duração explícita a sessão segue a da performance (ver session_conflicts)
+    duration = {"duration_minutes": payload.duration_minutes} if payload.duration_minutes else {}
     sessions = []
     for iso in payload.datetimes:
         try:
@@ -117,40 +342,126 @@ async def create_manual(payload: ManualPayload):
             "performance_id": payload.performance_id,
             "theater_id": payload.theater_id,
             "datetime": dt,
+            **duration,
         })
 
     if not sessions:
         raise HTTPException(status_code=400, detail="Lista de datetimes vazia.")
 
+    conflicts = await find_conflicts(sessions)
+    if conflicts and strict:
+        raise _reject_conflicts(conflicts)
+    if conflicts:
+        response.headers[CONFLICTS_HEADER] = str(len(conflicts))
     return await repo.bulk_insert(sessions)
 
 
+@router.post("/import")
+async def import_file(
+    file: UploadFile = File(..., description="NDJSON ou CSV (performance_id, theater_id, datetime)"),
+    format: Optional[str] = Form(None, description="'ndjson' ou 'csv' (padrão: pela extensão)"),
+):
+    """
+    Importação em massa idempotente: sessões já existentes contam como
+    `duplicates`, linhas inválidas como `rejected` (com amostra em `errors`).
+    """
+    try:
+        fmt = detect_format(file, format)
+        return await import_sessions(file, fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("", response_model=List[SessionOut])
 async def list_sessions(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     date_from: Optional[datetime] = Query(None),
     date_to:   Optional[datetime] = Query(None),
+    after: Optional[str] = Query(None, description=f"Cursor do header {NEXT_CURSOR_HEADER}"),
 ):
-    return await repo.list_all(skip=skip, limit=limit, date_from=date_from, date_to=date_to)
+    """
+    Com `Accept: application/x-ndjson` a resposta é enviada em streaming,
+    uma sessão por linha (`limit=0` exporta tudo).
+    """
+    try:
+        if wants_ndjson(request):
+            items = repo.iter_all(
+                skip=skip, limit=limit, date_from=date_from, date_to=date_to,
+                after=after, batch_size=STREAM_BATCH_SIZE,
+            )
+            return ndjson_response(items, SessionOut)
+        items = await repo.list_all(
+            skip=skip, limit=limit, date_from=date_from, date_to=date_to, after=after,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cursor = repo.page_cursor(items, limit)
+    headers = {NEXT_CURSOR_HEADER: cursor} if cursor else None
+    return json_response(items, SessionOut, headers=headers)
 
 
 @router.get("/by-performance/{performance_id}", response_model=List[SessionOut])
-async def by_performance(performance_id: str):
+async def by_performance(
+    request: Request,
+    performance_id: str,
+    date_from: Optional[datetime] = Query(None),
+    date_to:   Optional[datetime] = Query(None),
+    limit: int = Query(500, ge=0, description="Até 5000 em JSON; em NDJSON sem teto (0 = tudo)"),
+):
+    """Sessões da performance; com `Accept: application/x-ndjson`, em streaming."""
     if not ObjectId.is_valid(performance_id):
         raise HTTPException(status_code=400, detail="performance_id inválido")
-    return await repo.list_by_performance(performance_id)
+    performance_id = str(ObjectId(performance_id))
+    if wants_ndjson(request):
+        items = repo.iter_by_performance(
+            performance_id, date_from=date_from, date_to=date_to,
+            limit=limit, batch_size=STREAM_BATCH_SIZE,
+        )
+        return ndjson_response(items, SessionOut)
+    _check_json_limit(limit)
+    items = await repo.list_by_performance(
+        performance_id, date_from=date_from, date_to=date_to, limit=limit,
+    )
+    return json_response(items, SessionOut)
 
 
 @router.get("/by-theater/{theater_id}", response_model=List[SessionOut])
-async def by_theater(theater_id: int):
-    return await repo.list_by_theater(theater_id)
-
-
-@router.delete("/by-performance/{performance_id}")
-async def delete_by_performance(performance_id: str):
+async def by_theater(
+    request: Request,
+    theater_id: int,
+    date_from: Optional[datetime] = Query(None),
+    date_to:   Optional[datetime] = Query(None),
+    limit: int = Query(500, ge=0, description="Até 5000 em JSON; em NDJSON sem teto (0 = tudo)"),
+):
+    """Sessões do teatro; com `Accept: application/x-ndjson`, em streaming."""
+    if wants_ndjson(request):
+        items = repo.iter_by_theater(
+            theater_id, date_from=date_from, date_to=date_to,
+            limit=limit, batch_size=STREAM_BATCH_SIZE,
+        )
+        return ndjson_response(items, SessionOut)
+    _check_json_limit(limit)
+    items = await repo.list_by_theater(
+        theater_id, date_from=date_from, date_to=date_to, limit=limit,
+    )
+    return json_response(items, SessionOut)
+
+
+@router.delete(
+    "/by-performance/{performance_id}",
+    responses={202: {"description": "Job criado (background=true); acompanhe em GET /jobs/{id}"}},
+)
+async def delete_by_performance(
+    performance_id: str,
+    background: bool = Query(False, description="Remove em lotes num job; responde 202"),
+):
     if not ObjectId.is_valid(performance_id):
         raise HTTPException(status_code=400, detail="performance_id inválido")
+    performance_id = str(ObjectId(performance_id))
+    if background:
+        return accepted(await jobs.submit("sessions.delete_by_performance", {"performance_id": performance_id}))
     count = await repo.delete_by_performance(performance_id)
     return {"deleted": count}
 
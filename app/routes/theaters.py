@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.responses import json_response
 from app.db.sql import get_session
 from app.repositories.theaters_repo import TheatersRepo
 from app.schemas.theaters import TheaterCreate, TheaterUpdate
@@ -16,8 +20,33 @@ async def list_theaters(
     repo: TheatersRepo = Depends(get_repo),
     limit: int = 100,
     skip: int = 0,
+    after: Optional[str] = Query(None, description=f"Cursor do header {NEXT_CURSOR_HEADER}"),
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=100,
+        description="Busca por início de palavra em nome, bairro e cidade (ignora acentos)",
+    ),
+    city: Optional[str] = Query(None, max_length=100),
+    state: Optional[str] = Query(None, max_length=50, description="UF, ex.: SP"),
+):
+    try:
+        items = await repo.list(limit=limit, skip=skip, after=after, q=q, city=city, state=state)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cursor = repo.page_cursor(items, limit)
+    headers = {NEXT_CURSOR_HEADER: cursor} if cursor else None
+    return json_response(items, headers=headers)
+
+@router.get("/theaters/nearby")
+async def nearby_theaters(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=500),
+    limit: int = Query(20, ge=1, le=200),
+    repo: TheatersRepo = Depends(get_repo),
 ):
-    return await repo.list(limit=limit, skip=skip)
+    """Teatros num raio de `radius_km`, do mais próximo ao mais distante."""
+    items = await repo.nearby(lat=lat, lng=lng, radius_km=radius_km, limit=limit)
+    return json_response(items)
 
 @router.get("/theaters/{id}")
 async def get_theater(id: str, repo: TheatersRepo = Depends(get_repo)):
@@ -29,13 +58,19 @@ async def get_theater(id: str, repo: TheatersRepo = Depends(get_repo)):
 @router.post("/theaters", status_code=201)
 async def create_theater(payload: TheaterCreate, repo: TheatersRepo = Depends(get_repo)):
     data = jsonable_encoder(payload, exclude_none=True)
-    return await repo.create(data)
+    try:
+        return await repo.create(data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.patch("/theaters/{id}")
 async def update_theater(id: str, payload: TheaterUpdate, repo: TheatersRepo = Depends(get_repo)):
     data = jsonable_encoder(payload, exclude_none=True)
     data.pop("id", None)
-    updated = await repo.update(id, data)
+    try:
+        updated = await repo.update(id, data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not updated:
         raise HTTPException(status_code=404, detail="Teatro não encontrado")
     return updated
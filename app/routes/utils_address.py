@@ -1,51 +1,107 @@
+"""
+routes/utils_address.py
+Consulta de endereço por CEP/código postal (viacep para BR, zippopotam
+para o resto).
+
+Usa o cliente HTTP compartilhado (keep-alive) e um cache read-through por
+(country, postal_code) normalizado: resultados encontrados ficam em cache
+por dias, "não encontrado" por uma hora, e consultas simultâneas ao mesmo
+código viram uma única chamada externa.
+"""
 import re
+from typing import Any, Dict, Optional, Tuple
+
 import httpx
 from fastapi import APIRouter, HTTPException, Query
 
+from app.core.cache import build_cache
+from app.core.config import settings
+from app.core.http import get_http_client
+
 router = APIRouter(prefix="/utils", tags=["utils"])
 
+zip_cache = build_cache(
+    ttl=settings.zip_cache_ttl_seconds,
+    max_entries=settings.zip_cache_max_entries,
+    sqlite_path=settings.zip_cache_sqlite_path,
+)
+
+
+def _normalize(country: str, postal_code: str) -> Tuple[str, str]:
+    cc = country.upper().strip()
+    code = postal_code.strip()
+    if cc == "BR":
+        cep = re.sub(r"\D", "", code)
+        if len(cep) != 8:
+            raise HTTPException(400, "CEP inválido")
+        return cc, cep
+    return cc, code.replace(" ", "").upper()
+
+
+async def _fetch_br(cep: str) -> Optional[Dict[str, Any]]:
+    r = await get_http_client().get(f"{settings.viacep_base_url}/{cep}/json/")
+    r.raise_for_status()
+    data = r.json()
+    if data.get("erro"):
+        return None
+    return {
+        "street": data.get("logradouro") or "",
+        "neighborhood": data.get("bairro"),
+        "city": data.get("localidade") or "",
+        "state": data.get("uf") or "",
+        "postal_code": data.get("cep") or cep,
+        "country": "BR",
+    }
+
+
+async def _fetch_intl(cc: str, zip_clean: str) -> Optional[Dict[str, Any]]:
+    r = await get_http_client().get(f"{settings.zippopotam_base_url}/{cc.lower()}/{zip_clean}")
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    data = r.json()
+    places = data.get("places") or []
+    if not places:
+        return None
+
+    p = places[0]
+    return {
+        "street": "",              # normalmente não vem
+        "neighborhood": None,      # normalmente não vem
+        "city": p.get("place name") or "",
+        "state": p.get("state abbreviation") or p.get("state") or "",
+        "postal_code": data.get("post code") or zip_clean,
+        "country": cc,
+    }
+
+
+async def _lookup(cc: str, code: str) -> Dict[str, Any]:
+    """Resultado cacheável: {"found": bool, "address": dict | None}."""
+    address = await (_fetch_br(code) if cc == "BR" else _fetch_intl(cc, code))
+    return {"found": address is not None, "address": address}
+
+
+def _ttl_for(result: Dict[str, Any]) -> float:
+    if result["found"]:
+        return settings.zip_cache_ttl_seconds
+    return settings.zip_cache_negative_ttl_seconds
+
+
 @router.get("/address-by-zip")
 async def address_by_zip(
     country: str = Query(..., min_length=2, max_length=2),
     postal_code: str = Query(..., min_length=2),
 ):
-    cc = country.upper().strip()
-    code = postal_code.strip()
+    cc, code = _normalize(country, postal_code)
+
+    try:
+        result = await zip_cache.get_or_load(
+            f"zip:{cc}:{code}", lambda: _lookup(cc, code), ttl_for=_ttl_for,
+        )
+    except (httpx.HTTPError, ValueError):
+        # falha do serviço externo não é cacheada
+        raise HTTPException(502, "Serviço de CEP indisponível")
 
-    async with httpx.AsyncClient(timeout=6) as client:
-        if cc == "BR":
-            cep = re.sub(r"\D", "", code)
-            if len(cep) != 8:
-                raise HTTPException(400, "CEP inválido")
-            r = await client.get(f"https://viacep.com.br/ws/{cep}/json/")
-            data = r.json()
-            if data.get("erro"):
-                raise HTTPException(404, "Zip não encontrado")
-            return {
-                "street": data.get("logradouro") or "",
-                "neighborhood": data.get("bairro"),
-                "city": data.get("localidade") or "",
-                "state": data.get("uf") or "",
-                "postal_code": data.get("cep") or code,
-                "country": "BR",
-            }
-
-        # Zippopotam (internacional)
-        zip_clean = code.replace(" ", "")
-        r = await client.get(f"https://api.zippopotam.us/{cc.lower()}/{zip_clean}")
-        if r.status_code == 404:
-            raise HTTPException(404, "Zip não encontrado")
-        data = r.json()
-        places = data.get("places") or []
-        if not places:
-            raise HTTPException(404, "Zip não encontrado")
-
-        p = places[0]
-        return {
-            "street": "",              # normalmente não vem
-            "neighborhood": None,      # normalmente não vem
-            "city": p.get("place name") or "",
-            "state": p.get("state abbreviation") or p.get("state") or "",
-            "postal_code": data.get("post code") or zip_clean,
-            "country": cc,
-        }
+    if not result["found"]:
+        raise HTTPException(404, "Zip não encontrado")
+    return result["address"]
@@ -26,6 +26,8 @@ class PerformanceIn(BaseModel):
     direction: List[str] = Field(default_factory=list)
     cast: List[str] = Field(default_factory=list)
     crew: List[CrewRole] = Field(default_factory=list)
+    # duração padrão das sessões (detecção de conflito de sala em /sessions)
+    duration_minutes: Optional[int] = Field(default=None, ge=1, le=24 * 60)
 
     # URL relativa retornada pelo endpoint POST /media/upload
     # Ex: "static/uploads/banners/abc123.jpg"
@@ -38,9 +40,12 @@ class PerformanceIn(BaseModel):
 
 # ── Performance (saída) ───────────────────────
 class PerformanceOut(PerformanceIn):
-    id: str = Field(serialization_alias="_id")
+    # repos já devolvem "_id"; populate_by_name aceita também "id"
+    id: str = Field(alias="_id")
     # campo informativo: total de sessões (preenchido pelo repo, não salvo no doc)
     session_count: int = 0
+    # relevância do $text; só vem em buscas com `q`
+    score: Optional[float] = None
     created_at: datetime
     updated_at: datetime
     model_config = ConfigDict(populate_by_name=True)
@@ -57,4 +62,5 @@ class PerformanceUpdate(BaseModel):
     direction: Optional[List[str]] = None
     cast: Optional[List[str]] = None
     crew: Optional[List[CrewRole]] = None
+    duration_minutes: Optional[int] = Field(default=None, ge=1, le=24 * 60)
     banner_url: Optional[str] = None
\ No newline at end of file
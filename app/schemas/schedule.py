@@ -0,0 +1,35 @@
+"""
+schedule.py (schema)
+Agenda: sessões já acompanhadas dos resumos de teatro e performance, para o
+calendário não precisar buscar cada um por id.
+"""
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+class TheaterSummary(BaseModel):
+    id: int
+    name: str
+    slug: str
+    city: Optional[str] = None
+    state: Optional[str] = None
+    photo_url: Optional[str] = None
+
+
+class PerformanceSummary(BaseModel):
+    id: str
+    name: Optional[str] = None
+    classification: Optional[str] = None
+    season: Optional[int] = None
+    banner_url: Optional[str] = None
+
+
+class ScheduleItem(BaseModel):
+    id: str
+    datetime: datetime
+    performance_id: Optional[str]
+    theater_id: int
+    # None se o teatro/performance referenciado não existe mais
+    performance: Optional[PerformanceSummary] = None
+    theater: Optional[TheaterSummary] = None
@@ -27,7 +27,10 @@ class TheaterBase(BaseModel):
     address: Address
     location: Optional[Location] = None
     contacts: Optional[Contacts] = None
-    photo_base64: Optional[str] = None
+    # URL relativa retornada por POST /media/upload (category="theaters")
+    photo_url: Optional[str] = None
+    # Legado: se enviado, é gravado no media store e vira `photo_url`
+    photo_base64: Optional[str] = Field(default=None, deprecated=True)
 
 class TheaterCreate(TheaterBase):
     """Schema usado no POST /theaters."""
@@ -44,7 +47,8 @@ class TheaterUpdate(BaseModel):
     address: Optional[Address] = None
     location: Optional[Location] = None
     contacts: Optional[Contacts] = None
-    photo_base64: Optional[str] = None
+    photo_url: Optional[str] = None
+    photo_base64: Optional[str] = Field(default=None, deprecated=True)
 
 class TheaterOut(TheaterBase):
     id: int
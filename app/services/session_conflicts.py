@@ -0,0 +1,131 @@
+"""
+services/session_conflicts.py
+Conflito de sala: duas sessões no mesmo teatro com horários sobrepostos.
+
+Cada sessão ocupa [datetime, datetime + duração). A duração vem da própria
+sessão; na falta dela, da performance (`duration_minutes`); na falta das
+duas, DEFAULT_SESSION_MINUTES. A sessão só guarda duração quando ela foi
+informada: as demais acompanham a da performance, inclusive se ela mudar.
+
+Para um lote de candidatos (uma regra, uma lista manual) a checagem faz:
+- um $in em performances para as durações que faltam nos candidatos;
+- uma consulta por teatro: as sessões existentes que começam entre
+  (primeiro candidato - MAX_SESSION_MINUTES) e o fim do último candidato;
+- um $in para as performances dessas sessões ainda sem duração conhecida;
+- um IntervalIndex das existentes, consultado por bisect para cada
+  candidato — O((n + m) log n) —, mais uma varredura dos candidatos entre si.
+
+Sessões idênticas (mesma performance, teatro e horário) não são conflito:
+o índice único já as trata como duplicatas.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import app.repositories.sessions_repo as sessions_repo
+from app.indexes.intervals import IntervalIndex, sweep_overlaps
+from app.repositories.performances_repo import PerformancesRepository
+
+DEFAULT_SESSION_MINUTES = 120
+# teto de duração aceito nos schemas; também é a folga da busca para trás
+MAX_SESSION_MINUTES = 24 * 60
+MAX_REPORTED_CONFLICTS = 100
+# total de conflitos de um POST /sessions/rule|manual aceito sem `strict`
+CONFLICTS_HEADER = "X-Session-Conflicts"
+
+_performances = PerformancesRepository()
+
+Span = Tuple[datetime, datetime, Dict[str, Any]]
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _span(session: Dict[str, Any], default_minutes: Optional[int] = None) -> Span:
+    start = _utc(session["datetime"])
+    minutes = session.get("duration_minutes") or default_minutes or DEFAULT_SESSION_MINUTES
+    return start, start + timedelta(minutes=minutes), session
+
+
+def _slot(span: Span) -> Dict[str, Any]:
+    start, end, session = span
+    return {
+        "id": str(session["_id"]) if "_id" in session else None,
+        "performance_id": session.get("performance_id"),
+        "datetime": start,
+        "end": end,
+    }
+
+
+def _conflict(theater_id: int, candidate: Span, other: Span) -> Dict[str, Any]:
+    slot = _slot(candidate)
+    del slot["id"]
+    return {"theater_id": theater_id, **slot, "conflicts_with": _slot(other)}
+
+
+async def resolve_duration(performance_id: str, explicit: Optional[int] = None) -> int:
+    """Duração explícita, senão a da performance, senão o padrão."""
+    if explicit:
+        return explicit
+    durations = await _performances.durations([performance_id])
+    return durations.get(performance_id) or DEFAULT_SESSION_MINUTES
+
+
+async def _fill_durations(sessions: List[Dict[str, Any]], known: Dict[str, Optional[int]]) -> None:
+    """Completa `known` com as durações das performances de `sessions` que não trazem a sua."""
+    missing = {
+        s["performance_id"] for s in sessions
+        if not s.get("duration_minutes") and s["performance_id"] not in known
+    }
+    if missing:
+        found = await _performances.durations(missing)
+        known.update({p: found.get(p) for p in missing})
+
+
+async def _existing_spans(
+    theater_id: int, start: datetime, end: datetime, durations: Dict[str, Optional[int]],
+) -> List[Span]:
+    docs = await sessions_repo.theater_window(theater_id, start, end)
+    await _fill_durations(docs, durations)
+    return [_span(d, durations.get(d["performance_id"])) for d in docs]
+
+
+async def find_conflicts(candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Conflitos de `candidates` ({performance_id, theater_id, datetime,
+    duration_minutes?}) com a agenda gravada e entre si, em ordem de teatro
+    e horário.
+    """
+    durations: Dict[str, Optional[int]] = {}
+    await _fill_durations(candidates, durations)
+    by_theater: Dict[int, List[Span]] = {}
+    for c in candidates:
+        by_theater.setdefault(int(c["theater_id"]), []).append(_span(c, durations.get(c["performance_id"])))
+
+    conflicts: List[Dict[str, Any]] = []
+    for theater_id, spans in by_theater.items():
+        lo = min(start for start, _, _ in spans) - timedelta(minutes=MAX_SESSION_MINUTES)
+        hi = max(end for _, end, _ in spans)
+        existing = await _existing_spans(theater_id, lo, hi, durations)
+        index = IntervalIndex((span[0], span[1], span) for span in existing)
+        taken = {(s["performance_id"], start) for start, _, s in existing}
+
+        # duplicatas (já gravadas ou repetidas no lote) ficam de fora
+        fresh: Dict[Tuple[str, datetime], Span] = {}
+        for span in spans:
+            key = (span[2]["performance_id"], span[0])
+            if key not in taken:
+                fresh.setdefault(key, span)
+
+        found: List[Tuple[Span, Span]] = []
+        for span in fresh.values():
+            found.extend((span, other) for other in index.overlapping(span[0], span[1]))
+        found.extend(sweep_overlaps((span[0], span[1], span) for span in fresh.values()))
+        found.sort(key=lambda pair: (pair[0][0], pair[1][0]))
+        conflicts.extend(_conflict(theater_id, span, other) for span, other in found)
+    return conflicts
+
+
+def conflict_report(conflicts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Total + amostra (as primeiras MAX_REPORTED_CONFLICTS) para respostas e jobs."""
+    return {"conflict_count": len(conflicts), "conflicts": conflicts[:MAX_REPORTED_CONFLICTS]}
@@ -0,0 +1,207 @@
+"""
+services/session_import.py
+Importação em massa de sessões a partir de upload NDJSON ou CSV.
+
+O arquivo é lido em blocos e parseado linha a linha (nunca inteiro em
+memória); as sessões válidas são gravadas em lotes de `chunk_size` com
+upserts não-ordenados contra o índice único
+(performance_id, theater_id, datetime). Reimportar o mesmo arquivo não
+duplica a agenda.
+
+Formato NDJSON — um objeto por linha:
+  {"performance_id": "...", "theater_id": 1, "datetime": "2025-10-04T20:00:00"}
+
+Formato CSV — com cabeçalho:
+  performance_id,theater_id,datetime
+
+Linhas longas demais (MAX_LINE_BYTES) ou fora de UTF-8 são rejeitadas uma a
+uma, como qualquer linha inválida: um erro no meio do arquivo não desfaz nem
+interrompe os lotes já gravados. Só o cabeçalho CSV ilegível aborta (400),
+e antes de qualquer gravação.
+"""
+import csv
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from bson import ObjectId
+from fastapi import UploadFile
+
+import app.repositories.sessions_repo as repo
+
+READ_CHUNK_BYTES = 256 * 1024
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 50
+# uma linha sem "\n" não cresce o buffer além disso
+MAX_LINE_BYTES = 64 * 1024
+
+CSV_COLUMNS = ("performance_id", "theater_id", "datetime")
+
+
+def detect_format(file: UploadFile, declared: Optional[str] = None) -> str:
+    """'ndjson' ou 'csv', pelo parâmetro explícito, content-type ou extensão."""
+    if declared:
+        fmt = declared.lower()
+    elif file.content_type in ("text/csv", "application/csv"):
+        fmt = "csv"
+    elif (file.filename or "").lower().endswith(".csv"):
+        fmt = "csv"
+    else:
+        fmt = "ndjson"
+    if fmt not in ("ndjson", "csv"):
+        raise ValueError("format deve ser 'ndjson' ou 'csv'")
+    return fmt
+
+
+def _decode(raw: bytes) -> Union[str, ValueError]:
+    if len(raw) > MAX_LINE_BYTES:
+        return ValueError(f"linha maior que {MAX_LINE_BYTES} bytes")
+    try:
+        return raw.decode("utf-8-sig").rstrip("\r")
+    except UnicodeDecodeError:
+        return ValueError("linha não é UTF-8 válido")
+
+
+async def _iter_lines(file: UploadFile) -> AsyncIterator[Union[str, ValueError]]:
+    """
+    Linhas do upload, lidas em blocos (memória limitada ao bloco +
+    MAX_LINE_BYTES). Linha ilegível vem como ValueError no lugar do texto.
+    """
+    pending = b""
+    # descartando o resto de uma linha que já passou do limite
+    oversized = False
+    while True:
+        block = await file.read(READ_CHUNK_BYTES)
+        if not block:
+            break
+        pending += block
+        *lines, pending = pending.split(b"\n")
+        for raw in lines:
+            if oversized:
+                oversized = False
+                yield ValueError(f"linha maior que {MAX_LINE_BYTES} bytes")
+            else:
+                yield _decode(raw)
+        if len(pending) > MAX_LINE_BYTES:
+            pending, oversized = b"", True
+    if oversized:
+        yield ValueError(f"linha maior que {MAX_LINE_BYTES} bytes")
+    elif pending:
+        yield _decode(pending)
+
+
+def _parse_datetime(value: Any) -> datetime:
+    dt = datetime.fromisoformat(str(value).strip())
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _validate(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Normaliza uma linha em sessão. Levanta ValueError com o motivo."""
+    performance_id = str(row.get("performance_id") or "").strip()
+    if not ObjectId.is_valid(performance_id):
+        raise ValueError("performance_id inválido")
+    try:
+        theater_id = int(row.get("theater_id"))
+    except (TypeError, ValueError):
+        raise ValueError("theater_id inválido")
+    try:
+        dt = _parse_datetime(row.get("datetime"))
+    except (TypeError, ValueError):
+        raise ValueError("datetime inválido")
+    return {"performance_id": str(ObjectId(performance_id)), "theater_id": theater_id, "datetime": dt}
+
+
+async def _iter_rows(file: UploadFile, fmt: str) -> AsyncIterator[Tuple[int, Any]]:
+    """(nº da linha, dict | ValueError) — erros de parse não interrompem o import."""
+    lines = _iter_lines(file)
+
+    if fmt == "ndjson":
+        lineno = 0
+        async for line in lines:
+            lineno += 1
+            if isinstance(line, ValueError):
+                yield lineno, line
+                continue
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                yield lineno, ValueError("JSON inválido")
+                continue
+            if not isinstance(obj, dict):
+                yield lineno, ValueError("linha deve ser um objeto JSON")
+                continue
+            yield lineno, obj
+        return
+
+    header: Optional[List[str]] = None
+    lineno = 0
+    async for line in lines:
+        lineno += 1
+        if isinstance(line, ValueError):
+            if header is None:
+                raise ValueError(f"cabeçalho CSV ilegível: {line}")
+            yield lineno, line
+            continue
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [h.strip().lower() for h in values]
+            missing = [c for c in CSV_COLUMNS if c not in header]
+            if missing:
+                raise ValueError(f"cabeçalho CSV sem colunas: {', '.join(missing)}")
+            continue
+        if len(values) != len(header):
+            yield lineno, ValueError("quantidade de colunas diferente do cabeçalho")
+            continue
+        yield lineno, dict(zip(header, values))
+
+
+async def import_sessions(
+    file: UploadFile,
+    fmt: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """Importa o upload e retorna o resumo (contagens, erros de amostra, rows/s)."""
+    started = time.perf_counter()
+    summary: Dict[str, Any] = {
+        "rows": 0,
+        "inserted": 0,
+        "duplicates": 0,
+        "rejected": 0,
+        "errors": [],
+    }
+
+    async def flush(batch: List[Dict[str, Any]]) -> None:
+        counts = await repo.upsert_many(batch)
+        summary["inserted"] += counts["inserted"]
+        summary["duplicates"] += counts["duplicates"]
+        summary["rejected"] += counts["failed"]
+
+    batch: List[Dict[str, Any]] = []
+    async for lineno, row in _iter_rows(file, fmt):
+        summary["rows"] += 1
+        try:
+            if isinstance(row, ValueError):
+                raise row
+            batch.append(_validate(row))
+        except ValueError as e:
+            summary["rejected"] += 1
+            if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                summary["errors"].append({"line": lineno, "error": str(e)})
+            continue
+        if len(batch) >= chunk_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+
+    elapsed = time.perf_counter() - started
+    summary["elapsed_s"] = round(elapsed, 3)
+    summary["rows_per_sec"] = round(summary["rows"] / elapsed) if elapsed > 0 else None
+    return summary
@@ -0,0 +1,214 @@
+"""
+storage/derivatives.py
+Variantes redimensionadas (thumbnails) das imagens enviadas, para listas
+e clientes mobile não baixarem o original.
+
+Para cada upload "static/uploads/banners/abc.png" são geradas, ao lado do
+original, larguras 160/480/1080 em WebP e JPEG:
+
+  static/uploads/banners/abc-160w.webp   abc-160w.jpg
+  static/uploads/banners/abc-480w.webp   abc-480w.jpg
+  static/uploads/banners/abc-1080w.webp  abc-1080w.jpg
+
+Os nomes são determinísticos (dá para montar o `srcset` só com a URL do
+original) e o redimensionamento roda num ProcessPoolExecutor — o upload
+retorna o manifesto na hora, com status "pending", sem esperar o trabalho
+de CPU. Larguras iguais ou maiores que a do original não são geradas (nem
+entram no `srcset`): ampliar não ganha nada e o descritor `w` mentiria.
+O manifesto descobre a largura do original lendo só o cabeçalho da imagem.
+
+Depende do Pillow; sem ele o upload funciona normalmente e o manifesto
+vem com status "unavailable".
+"""
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow é opcional
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (160, 480, 1080)
+FORMATS = ("webp", "jpg")
+
+_QUALITY = {"webp": 80, "jpg": 82}
+# tag EXIF Orientation; 5–8 giram 90°, trocando largura e altura
+_EXIF_ORIENTATION = 0x0112
+_PIL_FORMAT = {"webp": "WEBP", "jpg": "JPEG"}
+
+_pool: Optional[ProcessPoolExecutor] = None
+# falhas recentes (URL → erro), para o manifesto; LRU para não crescer sem fim
+MAX_FAILED = 1_000
+
+_pending: Dict[str, "asyncio.Future[List[str]]"] = {}
+_failed: "OrderedDict[str, str]" = OrderedDict()
+
+
+def available() -> bool:
+    return Image is not None
+
+
+def variant_url(url: str, width: int, fmt: str) -> str:
+    stem = url.rsplit(".", 1)[0]
+    return f"{stem}-{width}w.{fmt}"
+
+
+def _source_width(path: str) -> Optional[int]:
+    """Largura do original já orientado (EXIF), sem decodificar os pixels."""
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            if img.getexif().get(_EXIF_ORIENTATION) in (5, 6, 7, 8):
+                width = height
+            return width
+    except (OSError, ValueError):
+        return None
+
+
+def target_widths(path: str, widths: Sequence[int] = WIDTHS) -> List[int]:
+    """Larguras de `widths` menores que a do original (todas, se ilegível)."""
+    source = _source_width(path)
+    if source is None:
+        return list(widths)
+    return [w for w in widths if w < source]
+
+
+# ── Worker (roda em outro processo) ───────────────────────────────────────────
+
+def _write_atomic(img, dest: str, fmt: str) -> None:
+    tmp = f"{dest}.part"
+    options = {"quality": _QUALITY[fmt], "optimize": True}
+    if fmt == "jpg":
+        options["progressive"] = True
+    elif fmt == "webp":
+        options["method"] = 4
+    img.save(tmp, _PIL_FORMAT[fmt], **options)
+    os.replace(tmp, dest)
+
+
+def render_variants(path: str, widths: Sequence[int] = WIDTHS, formats: Sequence[str] = FORMATS) -> List[str]:
+    """
+    Gera as variantes de `path` e retorna os arquivos escritos.
+    Função de módulo (picklable) para rodar no ProcessPoolExecutor.
+    """
+    written: List[str] = []
+    if _variants_exist(path, target_widths(path, widths), formats):
+        return written  # conteúdo repetido: variantes já geradas
+    with Image.open(path) as img:
+        # JPEG grande: decodifica já reduzido (DCT scaling), bem mais barato
+        img.draft("RGB", (max(widths), max(widths)))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+        # da maior para a menor: cada redução parte da anterior. O draft não
+        # reduz abaixo de max(widths), então este filtro bate com target_widths.
+        current = img
+        for width in sorted((w for w in widths if w < img.width), reverse=True):
+            height = max(1, round(current.height * width / current.width))
+            current = current.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                out = current
+                if fmt == "jpg" and out.mode == "RGBA":
+                    background = Image.new("RGB", out.size, (255, 255, 255))
+                    background.paste(out, mask=out.getchannel("A"))
+                    out = background
+                dest = variant_url(path, width, fmt)
+                _write_atomic(out, dest, fmt)
+                written.append(dest)
+    return written
+
+
+# ── Agendamento (event loop) ──────────────────────────────────────────────────
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.media_workers)
+    return _pool
+
+
+def shutdown() -> None:
+    """Chamado no encerramento do app (lifespan)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _on_done(url: str, future: "asyncio.Future[List[str]]") -> None:
+    _pending.pop(url, None)
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        _failed[url] = str(error)
+        _failed.move_to_end(url)
+        while len(_failed) > MAX_FAILED:
+            _failed.popitem(last=False)
+        logger.warning("variantes de %s não geradas: %s", url, error)
+
+
+def schedule(url: str) -> None:
+    """
+    Enfileira a geração das variantes de `url` sem aguardar o resultado.
+    Se já existirem, o worker só confere e retorna (nada de disco aqui).
+    """
+    if not available() or url in _pending:
+        return
+    _failed.pop(url, None)
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_get_pool(), render_variants, url)
+    _pending[url] = future
+    future.add_done_callback(lambda f: _on_done(url, f))
+
+
+def _variants_exist(url: str, widths: Sequence[int], formats: Sequence[str] = FORMATS) -> bool:
+    return all(Path(variant_url(url, w, f)).exists() for w in widths for f in formats)
+
+
+def _disk_state(url: str) -> Tuple[List[int], bool]:
+    """(larguras-alvo, todas as variantes existem) — IO de disco, roda em thread."""
+    widths = target_widths(url)
+    return widths, _variants_exist(url, widths)
+
+
+async def manifest(url: str) -> Dict[str, object]:
+    """URLs das variantes por formato/largura, `srcset` pronto e status."""
+    if not available():
+        return {"url": url, "status": "unavailable", "variants": {}, "srcset": {}}
+    widths, ready = await asyncio.to_thread(_disk_state, url)
+    if url in _pending:
+        status = "pending"
+    elif url in _failed:
+        status = "failed"
+    else:
+        status = "ready" if ready else "missing"
+    variants = {fmt: {str(w): variant_url(url, w, fmt) for w in widths} for fmt in FORMATS}
+    srcset = {
+        fmt: ", ".join(f"{variant_url(url, w, fmt)} {w}w" for w in widths)
+        for fmt in FORMATS
+    }
+    return {"url": url, "status": status, "variants": variants, "srcset": srcset}
+
+
+def delete_variants(url: str) -> int:
+    """Remove as variantes de `url` (as que existirem). Retorna quantas."""
+    removed = 0
+    for w in WIDTHS:
+        for fmt in FORMATS:
+            path = Path(variant_url(url, w, fmt))
+            if path.exists():
+                path.unlink()
+                removed += 1
+    _failed.pop(url, None)
+    return removed
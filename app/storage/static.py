@@ -0,0 +1,52 @@
+"""
+storage/static.py
+StaticFiles para /static com cache agressivo nos uploads.
+
+Arquivos em static/uploads nunca mudam de conteúdo sob a mesma URL (nomes
+por sha256 ou uuid; variantes derivadas deles), então saem com
+`Cache-Control: immutable` de um ano. Nos nomes por conteúdo o ETag forte é
+o próprio sha256. Range (206) e If-None-Match (304) vêm do FileResponse.
+"""
+import os
+import re
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.storage.uploads import UPLOAD_ROOT
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_SHA256_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadStaticFiles(StaticFiles):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._upload_root = UPLOAD_ROOT.resolve()
+
+    def file_response(
+        self,
+        full_path: "os.PathLike[str]",
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        path = Path(full_path).resolve()
+        if self._upload_root not in path.parents:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        headers = {"cache-control": IMMUTABLE}
+        if _SHA256_NAME.match(path.stem):
+            headers["etag"] = f'"{path.stem}"'
+
+        response = FileResponse(
+            full_path, status_code=status_code, headers=headers, stat_result=stat_result
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,234 @@
+"""
+storage/uploads.py
+Armazenamento de imagens em disco, compartilhado entre as rotas de mídia
+e os repositórios (ex.: migração de `photo_base64` → `photo_url`).
+
+Arquivos ficam em static/uploads/{category}/ e o banco guarda apenas o
+path relativo, ex: "static/uploads/theaters/abc123.webp".
+
+Uploads de POST /media/upload são endereçados por conteúdo: o nome é o
+sha256 do arquivo (calculado durante a cópia), então o mesmo banner enviado
+várias vezes vira um único arquivo, e a URL nunca muda de conteúdo (pode ser
+cacheada para sempre). As referências são contadas em `media_objects`
+(app/repositories/media_repo.py).
+"""
+import asyncio
+import base64
+import binascii
+import hashlib
+import os
+import re
+import uuid
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+
+from fastapi import UploadFile
+
+try:
+    import fcntl
+except ImportError:  # Windows: só o lock do processo
+    fcntl = None
+
+UPLOAD_ROOT = Path("static/uploads")
+# arquivos de lock entre processos (um por faixa de hash, não por upload),
+# fora de static/ para não serem servidos
+LOCK_DIR = Path(".locks/uploads")
+LOCK_STRIPES = 256
+CATEGORIES = ("banners", "theaters")
+
+MIME_TO_EXT = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+}
+
+READ_CHUNK_BYTES = 256 * 1024
+
+_DATA_URI = re.compile(r"^data:(?P<mime>[\w/+.-]+)?(?:;[\w=-]+)*;base64,", re.IGNORECASE)
+
+
+class UploadTooLarge(ValueError):
+    """O upload passou do limite de bytes (detectado durante a leitura)."""
+
+
+@dataclass(frozen=True)
+class StagedUpload:
+    """Upload já copiado para um arquivo temporário, ainda não publicado."""
+    tmp: Path
+    dest: Path
+    url: str
+    sha256: str
+    size: int
+
+
+_path_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def normalize_url(url: str) -> str:
+    """Forma canônica da URL relativa (chave do lock e de media_objects)."""
+    return os.path.normpath(url).replace(os.sep, "/")
+
+
+def _acquire_file_lock(key: str) -> int:
+    LOCK_DIR.mkdir(parents=True, exist_ok=True)
+    stripe = int(hashlib.sha1(key.encode()).hexdigest(), 16) % LOCK_STRIPES
+    fd = os.open(LOCK_DIR / f"{stripe:03d}.lock", os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+
+def _release_file_lock(fd: int) -> None:
+    try:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+@asynccontextmanager
+async def path_lock(url: str) -> AsyncIterator[None]:
+    """
+    Lock por arquivo: serializa publicar+contar referência contra
+    liberar+apagar, para um DELETE concorrente não remover o arquivo que um
+    upload idêntico acabou de reaproveitar. Vale entre os workers do
+    uvicorn: asyncio.Lock no processo + flock (no thread pool) num arquivo de
+    LOCK_DIR.
+    """
+    key = normalize_url(url)
+    lock = _path_locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        _path_locks[key] = lock
+    async with lock:
+        if fcntl is None:
+            yield
+            return
+        fd = await asyncio.to_thread(_acquire_file_lock, key)
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(_release_file_lock, fd)
+
+
+def category_dir(category: str) -> Path:
+    if category not in CATEGORIES:
+        raise ValueError(f"categoria inválida: {category!r}")
+    d = UPLOAD_ROOT / category
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def sniff_ext(content: bytes) -> Optional[str]:
+    """Detecta a extensão pelos magic bytes (JPEG, PNG, WebP)."""
+    if content.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if content.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if content[:4] == b"RIFF" and content[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def decode_base64_image(value: str) -> Tuple[bytes, str]:
+    """
+    Decodifica uma imagem em base64 (com ou sem prefixo data URI).
+    Retorna (bytes, extensão). Levanta ValueError se não for imagem suportada.
+    """
+    mime = None
+    match = _DATA_URI.match(value)
+    if match:
+        mime = (match.group("mime") or "").lower()
+        value = value[match.end():]
+
+    try:
+        content = base64.b64decode("".join(value.split()), validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("photo_base64 não é base64 válido")
+
+    ext = sniff_ext(content) or MIME_TO_EXT.get(mime or "")
+    if not ext:
+        raise ValueError("photo_base64 não é JPEG, PNG ou WebP")
+    return content, ext
+
+
+def save_bytes(category: str, content: bytes, ext: str) -> str:
+    """Grava o conteúdo com nome único e retorna a URL relativa."""
+    filename = f"{uuid.uuid4().hex}.{ext}"
+    (category_dir(category) / filename).write_bytes(content)
+    return f"static/uploads/{category}/{filename}"
+
+
+def discard(url: str) -> None:
+    """Apaga o arquivo de uma URL relativa (ex.: gravado antes de um commit que falhou)."""
+    Path(url).unlink(missing_ok=True)
+
+
+def _write_block(fh, digest, chunk: bytes) -> None:
+    # no thread pool: hashlib libera o GIL para blocos grandes
+    digest.update(chunk)
+    fh.write(chunk)
+
+
+async def stage_stream(
+    category: str,
+    file: UploadFile,
+    ext: str,
+    max_bytes: int,
+    chunk_size: int = READ_CHUNK_BYTES,
+) -> StagedUpload:
+    """
+    Copia o upload em blocos para um temporário na pasta da categoria,
+    calculando o sha256 no caminho — sem carregá-lo inteiro em memória.
+    A escrita roda no thread pool (não bloqueia o event loop) e o limite é
+    verificado a cada bloco. A extensão vem dos magic bytes quando possível,
+    para o mesmo conteúdo sempre cair no mesmo nome.
+    """
+    directory = category_dir(category)
+    tmp = directory / f".{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+
+    fh = await asyncio.to_thread(open, tmp, "wb")
+    try:
+        total = 0
+        while chunk := await file.read(chunk_size):
+            if total == 0:
+                ext = sniff_ext(chunk) or ext
+            total += len(chunk)
+            if total > max_bytes:
+                raise UploadTooLarge(f"arquivo maior que {max_bytes} bytes")
+            await asyncio.to_thread(_write_block, fh, digest, chunk)
+        await asyncio.to_thread(fh.close)
+    except BaseException:
+        await asyncio.to_thread(fh.close)
+        tmp.unlink(missing_ok=True)
+        raise
+
+    filename = f"{digest.hexdigest()}.{ext}"
+    return StagedUpload(
+        tmp=tmp,
+        dest=directory / filename,
+        url=f"static/uploads/{category}/{filename}",
+        sha256=digest.hexdigest(),
+        size=total,
+    )
+
+
+def publish(staged: StagedUpload) -> bool:
+    """
+    Move o temporário para o nome final (rename atômico — nunca existe um
+    arquivo parcial com o nome público). Se o conteúdo já existe, descarta o
+    temporário. Retorna True se o arquivo foi criado agora.
+    Chame sob `path_lock(staged.url)`, depois do `retain`: se o arquivo
+    sumiu antes disso, ele é recriado aqui.
+    """
+    if staged.dest.exists():
+        staged.tmp.unlink(missing_ok=True)
+        return False
+    os.replace(staged.tmp, staged.dest)
+    return True
@@ -0,0 +1,79 @@
+"""
+scripts/backfill_theater_photos.py
+Migra fotos legadas `theaters.photo_base64` → arquivos em
+static/uploads/theaters/ + coluna `photo_url`, em lotes.
+
+Uso:
+  python -m scripts.backfill_theater_photos --batch-size 100 --vacuum
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import select, text, update
+
+from app.db.migrations import migrate_sql
+from app.db.sql import AsyncSessionLocal, Base, engine
+from app.models.theater import Theater
+from app.storage.uploads import decode_base64_image, save_bytes
+
+
+async def backfill(batch_size: int = 100, vacuum: bool = False) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await migrate_sql(conn)
+
+    migrated = cleared = failed = 0
+    last_id = 0
+
+    async with AsyncSessionLocal() as session:
+        while True:
+            # keyset por id: linhas inválidas não fazem o loop voltar nelas
+            stmt = (
+                select(Theater.id, Theater.photo_url, Theater.photo_base64)
+                .where(Theater.id > last_id, Theater.photo_base64.is_not(None))
+                .order_by(Theater.id)
+                .limit(batch_size)
+            )
+            rows = (await session.execute(stmt)).all()
+            if not rows:
+                break
+
+            for id_, photo_url, photo_base64 in rows:
+                last_id = id_
+                values = {"photo_base64": None}
+                if not photo_url:
+                    try:
+                        content, ext = decode_base64_image(photo_base64)
+                    except ValueError as e:
+                        print(f"theater {id_}: {e} (mantido)")
+                        failed += 1
+                        continue
+                    values["photo_url"] = save_bytes("theaters", content, ext)
+                    migrated += 1
+                else:
+                    cleared += 1
+                await session.execute(
+                    update(Theater).where(Theater.id == id_).values(**values)
+                )
+
+            await session.commit()
+            print(f"... até id={last_id}: {migrated} migradas, {cleared} limpas, {failed} falhas")
+
+    if vacuum and engine.dialect.name == "sqlite":
+        # devolve ao disco as páginas que guardavam os blobs
+        async with engine.execution_options(isolation_level="AUTOCOMMIT").connect() as conn:
+            await conn.execute(text("VACUUM"))
+
+    print(f"Backfill concluído: {migrated} migradas, {cleared} limpas, {failed} falhas.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM no SQLite ao final")
+    args = parser.parse_args()
+    asyncio.run(backfill(batch_size=args.batch_size, vacuum=args.vacuum))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+scripts/bench_metrics.py
+Overhead da instrumentação de app/core/metrics.py no caminho quente:
+
+  asgi    — requisição ASGI mínima com e sem MetricsMiddleware
+  mongo   — par started/succeeded do CommandListener (eventos sintéticos)
+  sql     — `SELECT 1` num SQLite em memória com e sem os hooks do engine
+
+Não precisa de servidor nem de banco.
+
+Uso:
+  python -m scripts.bench_metrics [--n 50000]
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, text
+
+from app.core import metrics
+
+
+async def _endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b'{"status":"ok"}'})
+
+
+async def _asgi_loop(app, n: int) -> float:
+    route = SimpleNamespace(path="/bench")
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    t0 = time.perf_counter()
+    for _ in range(n):
+        scope = {"type": "http", "method": "GET", "path": "/bench", "route": route}
+        await app(scope, receive, send)
+    return time.perf_counter() - t0
+
+
+def _bench_asgi(n: int):
+    bare = asyncio.run(_asgi_loop(_endpoint, n))
+    wrapped = asyncio.run(_asgi_loop(metrics.MetricsMiddleware(_endpoint), n))
+    return bare, wrapped
+
+
+def _bench_mongo(n: int):
+    listener = metrics.MongoCommandMetrics()
+    t0 = time.perf_counter()
+    for i in range(n):
+        started = SimpleNamespace(
+            request_id=i, connection_id=("localhost", 27017),
+            command_name="find", command={"find": "sessions"},
+        )
+        done = SimpleNamespace(
+            request_id=i, connection_id=("localhost", 27017),
+            command_name="find", duration_micros=850,
+        )
+        listener.started(started)
+        listener.succeeded(done)
+    return 0.0, time.perf_counter() - t0
+
+
+def _sql_loop(engine, n: int) -> float:
+    with engine.connect() as conn:
+        stmt = text("SELECT 1")
+        conn.execute(stmt)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            conn.execute(stmt)
+        return time.perf_counter() - t0
+
+
+def _bench_sql(n: int):
+    bare = _sql_loop(create_engine("sqlite://"), n)
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+    return bare, _sql_loop(engine, n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--n", type=int, default=50_000)
+    args = parser.parse_args()
+    n = args.n
+
+    print(f"{'caso':<8}{'sem (µs)':>10}{'com (µs)':>10}{'overhead (µs)':>15}")
+    for name, bench in (("asgi", _bench_asgi), ("mongo", _bench_mongo), ("sql", _bench_sql)):
+        bare, instrumented = bench(n)
+        print(
+            f"{name:<8}{bare / n * 1e6:>10.2f}{instrumented / n * 1e6:>10.2f}"
+            f"{(instrumented - bare) / n * 1e6:>15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+scripts/bench_serialization.py
+Microbenchmark da serialização das listagens (performances e sessões),
+comparando, por item:
+
+  fastapi   — caminho padrão quando a rota devolve dicts com response_model:
+              valida no model, converte para JSON-compatível e json.dumps
+  adapter   — TypeAdapter pré-compilado: valida + dump_json no pydantic-core
+              (modo VALIDATE_RESPONSES=true de app/core/responses.py)
+  orjson    — dicts dos repos codificados direto (caminho padrão atual)
+
+Não precisa de banco: os documentos são sintéticos e passam pelo `_to_out`
+real dos repositórios.
+
+Uso:
+  python -m scripts.bench_serialization [--sizes 1000 10000] [--repeat 5]
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+from app.core.responses import adapter_for, dumps
+from app.repositories.performances_repo import _to_out as performance_out
+from app.repositories.sessions_repo import _to_out as session_out
+from app.routes.sessions import SessionOut
+from app.schemas.performances import PerformanceOut
+
+
+def _performance_docs(n: int) -> List[Dict[str, Any]]:
+    now = datetime(2025, 1, 1, 12, 0, 0, 123000)
+    return [
+        performance_out({
+            "_id": ObjectId(),
+            "name": f"Espetáculo {i}",
+            "synopsis": "Uma sinopse de tamanho realista para um espetáculo. " * 4,
+            "tags": ["drama", "comédia", "musical"][: 1 + i % 3],
+            "classification": "14",
+            "season": 2025,
+            "dramaturgy": ["Autora A"],
+            "direction": ["Diretor B"],
+            "cast": [f"Ator {j}" for j in range(6)],
+            "crew": [{"role": "Luz", "people": ["C"]}, {"role": "Som", "people": ["D", "E"]}],
+            "banner_url": f"static/uploads/banners/{i:064x}.jpg",
+            "created_at": now,
+            "updated_at": now,
+        }, session_count=i % 40)
+        for i in range(n)
+    ]
+
+
+def _session_docs(n: int) -> List[Dict[str, Any]]:
+    start = datetime(2025, 3, 1, 20, 0)
+    pid = str(ObjectId())
+    return [
+        session_out({
+            "_id": ObjectId(),
+            "performance_id": pid,
+            "theater_id": i % 50,
+            "datetime": start + timedelta(days=i),
+            "created_at": start,
+            "updated_at": start,
+        })
+        for i in range(n)
+    ]
+
+
+def _fastapi_path(model) -> Callable[[List[dict]], bytes]:
+    adapter = TypeAdapter(List[model])
+
+    def run(items: List[dict]) -> bytes:
+        validated = adapter.validate_python(items)
+        content = adapter.dump_python(validated, mode="json", by_alias=True)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+    return run
+
+
+def _adapter_path(model) -> Callable[[List[dict]], bytes]:
+    adapter = adapter_for(model, True)
+    return lambda items: adapter.dump_json(adapter.validate_python(items), by_alias=True)
+
+
+def _best_of(fn: Callable[[List[dict]], bytes], items: List[dict], repeat: int) -> float:
+    fn(items)  # aquecimento
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(items)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = (
+        ("performances", PerformanceOut, _performance_docs),
+        ("sessions", SessionOut, _session_docs),
+    )
+    print(f"{'lista':<13}{'itens':>7}  {'caminho':<9}{'total ms':>10}{'µs/item':>10}{'ganho':>8}")
+    for name, model, build in cases:
+        paths = (
+            ("fastapi", _fastapi_path(model)),
+            ("adapter", _adapter_path(model)),
+            ("orjson", dumps),
+        )
+        for n in args.sizes:
+            items = build(n)
+            # mesma saída nos três caminhos
+            reference = json.loads(paths[0][1](items))
+            for label, fn in paths[1:]:
+                assert json.loads(fn(items)) == reference, f"{label} diverge em {name}"
+
+            baseline = None
+            for label, fn in paths:
+                elapsed = _best_of(fn, items, args.repeat)
+                baseline = baseline or elapsed
+                print(
+                    f"{name:<13}{n:>7}  {label:<9}{elapsed * 1e3:>10.2f}"
+                    f"{elapsed / n * 1e6:>10.2f}{baseline / elapsed:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
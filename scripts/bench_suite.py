@@ -0,0 +1,305 @@
+"""
+scripts/bench_suite.py
+Suíte de microbenchmarks das funções puras do caminho quente (sem banco,
+sem rede):
+
+  expand_rules/*     — _expand_rules em períodos de 1, 5 e 10 anos
+  to_out/*           — sessions_repo._to_out, performances_repo._to_out,
+                       theaters_repo._to_public
+  slugify            — _slugify sobre nomes com acentos/pontuação
+  suggest/*          — PrefixIndex: rebuild e consultas de autocomplete
+  conflicts/*        — IntervalIndex + sweep_overlaps: conflitos de sala de
+                       n candidatos contra n sessões gravadas
+  validate/*         — validação Pydantic de listas de SessionOut/PerformanceOut
+
+Cada caso roda `--repeat` vezes e guarda o melhor tempo, em ns por item.
+
+Baseline e regressão:
+  python -m scripts.bench_suite --save                # grava bench_baseline.json
+  python -m scripts.bench_suite                       # compara com a baseline
+  python -m scripts.bench_suite --threshold 0.10      # falha se >10% mais lento
+  python -m scripts.bench_suite --full -k to_out      # inclui 1M docs, só to_out
+
+Sai com código 1 se algum caso regrediu além do limite. Baselines só são
+comparáveis na mesma máquina/versão de Python.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+from app.indexes.intervals import IntervalIndex, sweep_overlaps
+from app.indexes.prefix import PrefixIndex
+from app.models.theater import Theater
+from app.repositories.performances_repo import _to_out as performance_out
+from app.repositories.sessions_repo import _to_out as session_out
+from app.repositories.theaters_repo import _slugify, _to_public
+from app.routes.sessions import RulePayload, SessionOut, _expand_rules
+from app.schemas.performances import PerformanceOut
+
+DEFAULT_BASELINE = Path("bench_baseline.json")
+DEFAULT_THRESHOLD = 0.20
+
+SIZES = (10_000, 100_000)
+FULL_SIZES = (10_000, 100_000, 1_000_000)
+
+
+# ── Dados sintéticos ──────────────────────────────────────────────────────────
+
+_NOW = datetime(2025, 1, 1, 12, 0, 0, 123000)
+_WORDS = ["Teatro", "Espaço", "Cênico", "Ópera", "Cia.", "São", "João", "d'Arte",
+          "Musical", "Auditório", "Centro", "Cultural", "Núcleo", "&", "Ação", "Vila"]
+
+
+def session_docs(n: int) -> List[Dict[str, Any]]:
+    start = datetime(2025, 3, 1, 20, 0)
+    pids = [str(ObjectId()) for _ in range(100)]
+    return [
+        {
+            "_id": ObjectId(),
+            "performance_id": pids[i % 100],
+            "theater_id": i % 500,
+            "datetime": start + timedelta(hours=i),
+            "created_at": _NOW,
+            "updated_at": _NOW,
+        }
+        for i in range(n)
+    ]
+
+
+def performance_docs(n: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Espetáculo {i}",
+            "synopsis": "Uma sinopse de tamanho realista para um espetáculo. " * 4,
+            "tags": ["drama", "comédia", "musical"][: 1 + i % 3],
+            "classification": "14",
+            "season": 2025,
+            "dramaturgy": ["Autora A"],
+            "direction": ["Diretor B"],
+            "cast": [f"Ator {j}" for j in range(6)],
+            "crew": [{"role": "Luz", "people": ["C"]}, {"role": "Som", "people": ["D", "E"]}],
+            "banner_url": f"static/uploads/banners/{i:064x}.jpg",
+            "created_at": _NOW,
+            "updated_at": _NOW,
+        }
+        for i in range(n)
+    ]
+
+
+def theater_rows(n: int) -> List[Theater]:
+    return [
+        Theater(
+            id=i, name=f"Teatro {i}", slug=f"teatro-{i}",
+            street="Rua Augusta", number=str(i), neighborhood="Consolação",
+            city="São Paulo", state="SP", postal_code="01305-000", country="BR",
+            lat=-23.55 + i * 1e-5, lng=-46.65, website="https://exemplo.com.br",
+            instagram="@teatro", phone=None, photo_url=None,
+            created_at=_NOW, updated_at=_NOW,
+        )
+        for i in range(n)
+    ]
+
+
+def theater_names(n: int) -> List[str]:
+    rng = random.Random(42)
+    return [" ".join(rng.choices(_WORDS, k=rng.randint(2, 6))) + f" {i}" for i in range(n)]
+
+
+def suggest_items(n: int) -> List[Tuple[str, str, List[str], List[str]]]:
+    rng = random.Random(7)
+    return [
+        (str(i), name, rng.sample(_WORDS, 2), [" ".join(rng.sample(_WORDS, 2)) for _ in range(4)])
+        for i, name in enumerate(theater_names(n))
+    ]
+
+
+def suggest_index(n: int) -> Tuple[Tuple[PrefixIndex, List[str]], int]:
+    index = PrefixIndex()
+    index.rebuild(suggest_items(n))
+    prefixes = [w[:k] for w in _WORDS for k in (1, 2, 4)]
+    return (index, prefixes), len(prefixes)
+
+
+Spans = List[Tuple[datetime, datetime, int]]
+
+
+def conflict_spans(n: int) -> Tuple[Tuple[Spans, Spans], int]:
+    """Agenda com uma sessão a cada 3h (2h30 cada) e candidatos deslocados."""
+    rng = random.Random(11)
+    def spans(offset_min: int) -> Spans:
+        out = []
+        for i in range(n):
+            start = _NOW + timedelta(hours=3 * i, minutes=offset_min + rng.randint(0, 30))
+            out.append((start, start + timedelta(minutes=rng.choice((90, 120, 150))), i))
+        return out
+    return (spans(0), spans(90)), n
+
+
+def check_conflicts(data: Tuple[Spans, Spans]) -> int:
+    existing, candidates = data
+    index = IntervalIndex(existing)
+    found = sum(len(index.overlapping(start, end)) for start, end, _ in candidates)
+    return found + sum(1 for _ in sweep_overlaps(candidates))
+
+
+def rule_payload(years: int) -> RulePayload:
+    return RulePayload(
+        performance_id=str(ObjectId()),
+        theater_id=1,
+        start_date="2025-01-01",
+        end_date=(datetime(2025, 1, 1) + timedelta(days=365 * years)).strftime("%Y-%m-%d"),
+        # 5 dias por semana, 2 sessões por dia
+        rules={d: ["16:00", "20:30"] for d in (2, 3, 4, 5, 6)},
+    )
+
+
+# ── Casos ─────────────────────────────────────────────────────────────────────
+
+# nome → (preparação, função medida); a preparação devolve (entrada, nº de itens)
+Case = Tuple[Callable[[], Tuple[Any, int]], Callable[[Any], Any]]
+
+
+def build_cases(sizes: Tuple[int, ...]) -> Dict[str, Case]:
+    cases: Dict[str, Case] = {}
+
+    for years in (1, 5, 10):
+        def setup(years=years):
+            payload = rule_payload(years)
+            return payload, sum(1 for _ in _expand_rules(payload))
+        cases[f"expand_rules/{years}y"] = (setup, lambda p: sum(1 for _ in _expand_rules(p)))
+
+    for n in sizes:
+        cases[f"to_out/sessions/{n}"] = (
+            lambda n=n: (session_docs(n), n), lambda docs: [session_out(d) for d in docs],
+        )
+        cases[f"to_out/performances/{n}"] = (
+            lambda n=n: (performance_docs(n), n), lambda docs: [performance_out(d) for d in docs],
+        )
+        cases[f"to_out/theaters/{n}"] = (
+            lambda n=n: (theater_rows(n), n), lambda rows: [_to_public(t) for t in rows],
+        )
+
+    n = sizes[-1]
+    cases[f"slugify/{n}"] = (lambda: (theater_names(n), n), lambda names: [_slugify(s) for s in names])
+
+    n = sizes[0]
+    cases[f"suggest/rebuild/{n}"] = (
+        lambda n=n: (suggest_items(n), n), lambda items: PrefixIndex().rebuild(items),
+    )
+    cases[f"suggest/query/{n}"] = (
+        lambda n=n: suggest_index(n),
+        lambda data: [data[0].suggest(p, 10) for p in data[1]],
+    )
+    for n in sizes:
+        cases[f"conflicts/{n}"] = (lambda n=n: conflict_spans(n), check_conflicts)
+
+    sessions = TypeAdapter(List[SessionOut])
+    performances = TypeAdapter(List[PerformanceOut])
+    for n in sizes[:2]:
+        cases[f"validate/sessions/{n}"] = (
+            lambda n=n: ([session_out(d) for d in session_docs(n)], n), sessions.validate_python,
+        )
+        cases[f"validate/performances/{n}"] = (
+            lambda n=n: ([performance_out(d) for d in performance_docs(n)], n), performances.validate_python,
+        )
+    return cases
+
+
+def run_case(case: Case, repeat: int) -> Dict[str, Any]:
+    setup, fn = case
+    data, items = setup()
+    fn(data)  # aquecimento
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - t0)
+    return {
+        "items": items,
+        "best_s": round(best, 6),
+        "per_item_ns": round(best / items * 1e9, 1) if items else None,
+    }
+
+
+# ── Baseline ──────────────────────────────────────────────────────────────────
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("per_item_ns") or not current["per_item_ns"]:
+            current["change"] = None
+            continue
+        change = current["per_item_ns"] / base["per_item_ns"] - 1
+        current["change"] = round(change, 4)
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="grava os resultados como baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="regressão tolerada (0.20 = 20%% mais lento)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--full", action="store_true", help="inclui os casos de 1M documentos")
+    parser.add_argument("-k", dest="filter", default="", help="roda só casos que contêm o texto")
+    args = parser.parse_args()
+
+    cases = build_cases(FULL_SIZES if args.full else SIZES)
+    baseline = {}
+    if args.baseline.exists() and not args.save:
+        baseline = json.loads(args.baseline.read_text())["results"]
+
+    results: Dict[str, Dict] = {}
+    print(f"{'caso':<32}{'itens':>10}{'ns/item':>12}{'baseline':>12}{'Δ':>9}")
+    for name, case in cases.items():
+        if args.filter not in name:
+            continue
+        results[name] = run_case(case, args.repeat)
+        regressions = compare({name: results[name]}, baseline, args.threshold)
+        base = baseline.get(name, {}).get("per_item_ns")
+        change = results[name]["change"]
+        flag = "  REGRESSÃO" if regressions else ""
+        print(
+            f"{name:<32}{results[name]['items']:>10}{results[name]['per_item_ns']:>12}"
+            f"{base if base is not None else '-':>12}"
+            f"{f'{change:+.1%}' if change is not None else '-':>9}{flag}"
+        )
+
+    if args.save:
+        merged = {}
+        if args.baseline.exists():
+            merged = json.loads(args.baseline.read_text())["results"]
+        merged.update(results)
+        args.baseline.write_text(json.dumps({
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "saved_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            },
+            "results": merged,
+        }, indent=2))
+        print(f"baseline gravada em {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} caso(s) acima de +{args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
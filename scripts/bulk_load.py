@@ -0,0 +1,461 @@
+"""
+scripts/bulk_load.py
+Carga em massa de teatros (SQL), performances e sessões (MongoDB) a partir
+de arquivos JSON (array), NDJSON ou Extended JSON ({"$oid"}, {"$date"}),
+opcionalmente .gz. Os arquivos são lidos em streaming: a memória fica
+limitada ao tamanho do lote, não do arquivo.
+
+Teatros:  INSERT Core em executemany por lote de `--chunk` linhas, numa
+          única transação; no SQLite com pragmas de carga (synchronous=OFF,
+          journal em memória, cache grande), restaurados no fim. A busca
+          textual (FTS5) é reconstruída uma vez no fim em vez de sincronizada
+          por trigger a cada linha.
+Mongo:    insert_many/bulk_write não-ordenados por lote, com um lote em
+          voo enquanto o próximo é montado.
+
+Modos (--mode):
+  upsert   (padrão) teatros por slug, performances por _id, sessões por
+           (performance_id, theater_id, datetime) — recargas incrementais
+  insert   só insere; duplicatas (índice único) são contadas e ignoradas
+  replace  apaga a tabela/coleção e insere tudo
+
+`--keep-ids` preserva o `id` inteiro dos teatros (ex.: scripts/synth_data,
+cujas sessões referenciam esses ids).
+
+Depois da carga o cache de respostas é limpo; os índices em memória
+(/theaters/nearby e /performances/suggest) são montados no startup da API,
+então reinicie a API que já estiver rodando.
+
+Uso:
+  python -m scripts.bulk_load theaters seeds/theaters.json
+  python -m scripts.bulk_load all data/synth --keep-ids --mode replace
+  python -m scripts.bulk_load sessions data/synth/sessions.ndjson --mode insert
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from bson import ObjectId, json_util
+from pymongo import InsertOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from sqlalchemy import delete, insert
+
+import app.repositories.sessions_repo as sessions_repo
+from app.core.cache import cache
+from app.db import migrations
+from app.db.migrations import migrate_sql
+from app.db.mongo import get_collection
+from app.db.sql import Base, engine
+from app.models.theater import Theater
+from app.repositories.performances_repo import PerformancesRepository
+from app.repositories.theaters_repo import _slugify
+
+DEFAULT_CHUNK = 5_000
+MODES = ("upsert", "insert", "replace")
+DUPLICATE_KEY = 11000
+READ_SIZE = 1 << 20
+
+_object_hook = partial(
+    json_util.object_hook,
+    json_options=json_util.JSONOptions(tz_aware=True, tzinfo=timezone.utc),
+)
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+# ── Leitura ───────────────────────────────────────────────────────────────────
+
+def _open(path: Path) -> TextIO:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return path.open("r", encoding="utf-8")
+
+
+def _iter_array(fh: TextIO, buf: str, decoder: json.JSONDecoder) -> Iterator[Dict[str, Any]]:
+    """Objetos de um array JSON, decodificados um a um a partir de `buf` + fh."""
+    pos = 0
+    while True:
+        pos = _SEPARATORS.match(buf, pos).end()
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        try:
+            if pos == len(buf):
+                raise json.JSONDecodeError("fim do buffer", buf, pos)
+            obj, pos = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # objeto cortado no fim do buffer: lê mais e tenta de novo
+            chunk = fh.read(READ_SIZE)
+            if not chunk:
+                raise ValueError("array JSON incompleto ou inválido") from None
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield obj
+        if pos > READ_SIZE:
+            buf, pos = buf[pos:], 0
+
+
+def iter_documents(path: Path) -> Iterator[Dict[str, Any]]:
+    """Documentos de um arquivo JSON (array) ou NDJSON, com Extended JSON."""
+    decoder = json.JSONDecoder(object_hook=_object_hook)
+    with _open(path) as fh:
+        head = fh.read(READ_SIZE)
+        start = len(head) - len(head.lstrip())
+        if head[start:start + 1] == "[":
+            yield from _iter_array(fh, head[start + 1:], decoder)
+            return
+        # NDJSON: completa a linha cortada pelo read inicial
+        lines = (head + fh.readline()).splitlines()
+        for number, line in enumerate(_chain(lines, fh), 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield decoder.decode(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{number}: JSON inválido ({e.msg})") from None
+
+
+def _chain(first: List[str], rest: Iterable[str]) -> Iterator[str]:
+    yield from first
+    yield from rest
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ── Normalização ──────────────────────────────────────────────────────────────
+
+def _naive_utc(value: Any) -> Optional[datetime]:
+    """Colunas DateTime do SQL guardam UTC sem fuso."""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value if isinstance(value, datetime) else None
+
+
+def theater_row(doc: Dict[str, Any], keep_ids: bool = False, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Documento no formato de seeds/theaters.json → colunas da tabela `theaters`."""
+    now = now or datetime.utcnow()
+    addr = doc.get("address") or {}
+    contacts = doc.get("contacts") or {}
+    coords = (doc.get("location") or {}).get("coordinates") or [None, None]
+    row = {
+        "name": doc["name"],
+        "name_key": _slugify(doc["name"]),
+        "slug": doc.get("slug") or _slugify(doc["name"]),
+        "street": addr.get("street"),
+        "number": addr.get("number"),
+        "neighborhood": addr.get("neighborhood"),
+        "city": addr.get("city"),
+        "state": addr.get("state"),
+        "postal_code": addr.get("postal_code"),
+        "country": addr.get("country"),
+        "lng": float(coords[0]) if coords[0] is not None else None,
+        "lat": float(coords[1]) if coords[1] is not None else None,
+        "website": contacts.get("website") or None,
+        "instagram": contacts.get("instagram") or None,
+        "phone": contacts.get("phone") or None,
+        "created_at": _naive_utc(doc.get("created_at")) or now,
+        "updated_at": now,
+    }
+    if keep_ids:
+        # executemany exige as mesmas chaves em todas as linhas
+        if not isinstance(doc.get("id"), int):
+            raise ValueError(f"--keep-ids: teatro sem `id` inteiro ({row['slug']})")
+        row["id"] = doc["id"]
+    return row
+
+
+def performance_doc(doc: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    doc = dict(doc)
+    if "_id" not in doc and ObjectId.is_valid(str(doc.get("id", ""))):
+        doc["_id"] = ObjectId(str(doc.pop("id")))
+    doc.setdefault("created_at", now)
+    doc.setdefault("updated_at", now)
+    return doc
+
+
+def session_doc(doc: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    when = doc["datetime"]
+    if isinstance(when, str):
+        when = datetime.fromisoformat(when.replace("Z", "+00:00"))
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return {
+        "performance_id": str(doc["performance_id"]),
+        "theater_id": int(doc["theater_id"]),
+        "datetime": when,
+        "created_at": doc.get("created_at") or now,
+        "updated_at": doc.get("updated_at") or now,
+    }
+
+
+# ── Relatório ─────────────────────────────────────────────────────────────────
+
+@dataclass
+class LoadStats:
+    target: str
+    rows: int = 0
+    duplicates: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        dup = f", {self.duplicates} duplicadas" if self.duplicates else ""
+        return f"{self.target}: {self.rows} linhas em {self.seconds:.2f}s ({self.rate:,.0f}/s){dup}"
+
+
+# ── SQL ───────────────────────────────────────────────────────────────────────
+
+# pragma → valor durante a carga (o valor anterior é restaurado no fim)
+SQLITE_BULK_PRAGMAS = {
+    "synchronous": "OFF",
+    "journal_mode": "MEMORY",
+    "temp_store": "MEMORY",
+    "cache_size": "-262144",  # 256 MiB
+}
+
+
+async def _set_pragmas(conn, pragmas: Dict[str, str]) -> Dict[str, str]:
+    previous = {}
+    for name, value in pragmas.items():
+        previous[name] = str((await conn.exec_driver_sql(f"PRAGMA {name}")).scalar())
+        await conn.exec_driver_sql(f"PRAGMA {name}={value}")
+    await conn.commit()
+    return previous
+
+
+def _dialect_insert(dialect: str):
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        raise ValueError(f"ON CONFLICT não suportado no dialeto {dialect}")
+    return dialect_insert(Theater)
+
+
+def _insert_statement(dialect: str):
+    # sem alvo: qualquer índice único (slug, ou id com --keep-ids) conta como duplicata
+    return _dialect_insert(dialect).on_conflict_do_nothing()
+
+
+def _upsert_statement(dialect: str, columns: Iterable[str]):
+    stmt = _dialect_insert(dialect)
+    keep = {"id", "slug", "created_at"}
+    return stmt.on_conflict_do_update(
+        index_elements=["slug"],
+        set_={c: stmt.excluded[c] for c in columns if c not in keep},
+    )
+
+
+async def load_theaters(
+    docs: Iterable[Dict[str, Any]],
+    mode: str = "upsert",
+    chunk: int = DEFAULT_CHUNK,
+    keep_ids: bool = False,
+) -> LoadStats:
+    stats = LoadStats("theaters")
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await migrate_sql(conn)
+
+    dialect = engine.dialect.name
+    now = datetime.utcnow()
+    rows = (theater_row(d, keep_ids, now) for d in docs)
+    fts = dialect == "sqlite" and migrations.theaters_fts_enabled
+    async with engine.connect() as conn:
+        previous = await _set_pragmas(conn, SQLITE_BULK_PRAGMAS) if dialect == "sqlite" else {}
+        try:
+            async with conn.begin():
+                if fts:
+                    await migrations.suspend_theaters_fts(conn)
+                if mode == "replace":
+                    await conn.execute(delete(Theater))
+                stmt = None
+                for batch in batched(rows, chunk):
+                    if stmt is None:
+                        if mode == "upsert":
+                            stmt = _upsert_statement(dialect, batch[0])
+                        elif mode == "insert":
+                            stmt = _insert_statement(dialect)
+                        else:
+                            stmt = insert(Theater)
+                    result = await conn.execute(stmt, batch)
+                    # executemany: rowcount soma só as linhas de fato inseridas
+                    # (-1 quando o driver não informa)
+                    duplicates = len(batch) - result.rowcount if mode == "insert" and result.rowcount >= 0 else 0
+                    stats.rows += len(batch) - duplicates
+                    stats.duplicates += duplicates
+                if fts:
+                    await migrations.resume_theaters_fts(conn)
+        except BaseException:
+            # o driver do SQLite não abre transação antes de DDL: o DROP
+            # TRIGGER já foi commitado e o rollback não traz os triggers de volta
+            if fts:
+                async with conn.begin():
+                    await migrations.resume_theaters_fts(conn)
+            raise
+        finally:
+            if previous:
+                await _set_pragmas(conn, previous)
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+# ── MongoDB ───────────────────────────────────────────────────────────────────
+
+def _performance_ops(batch: List[Dict[str, Any]]) -> list:
+    return [
+        ReplaceOne({"_id": d["_id"]}, d, upsert=True) if "_id" in d else InsertOne(d)
+        for d in batch
+    ]
+
+
+def _session_ops(batch: List[Dict[str, Any]]) -> list:
+    return [
+        UpdateOne(
+            {"performance_id": d["performance_id"], "theater_id": d["theater_id"], "datetime": d["datetime"]},
+            {"$setOnInsert": {"created_at": d["created_at"], "updated_at": d["updated_at"]}},
+            upsert=True,
+        )
+        for d in batch
+    ]
+
+
+async def _write_batch(col, batch: List[Dict[str, Any]], ops: Optional[Callable], stats: LoadStats) -> None:
+    try:
+        if ops is None:
+            await col.insert_many(batch, ordered=False)
+        else:
+            await col.bulk_write(ops(batch), ordered=False)
+        errors = []
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != DUPLICATE_KEY for err in errors):
+            raise
+    stats.rows += len(batch) - len(errors)
+    stats.duplicates += len(errors)
+
+
+async def load_collection(
+    name: str,
+    docs: Iterable[Dict[str, Any]],
+    prepare: Callable[[Dict[str, Any], datetime], Dict[str, Any]],
+    upsert_ops: Callable[[List[Dict[str, Any]]], list],
+    ensure_indexes: Callable,
+    mode: str = "upsert",
+    chunk: int = DEFAULT_CHUNK,
+    indexes: bool = True,
+) -> LoadStats:
+    stats = LoadStats(name)
+    started = time.perf_counter()
+    col = get_collection(name)
+    if mode == "replace":
+        await col.delete_many({})
+    # índices antes da carga: o único de sessões descarta duplicatas e o
+    # upsert precisa deles para não varrer a coleção a cada lote
+    if indexes:
+        await ensure_indexes()
+
+    now = datetime.now(timezone.utc)
+    ops = upsert_ops if mode == "upsert" else None
+    in_flight: Optional[asyncio.Task] = None
+    # monta o próximo lote enquanto o anterior é gravado
+    for batch in batched((prepare(d, now) for d in docs), chunk):
+        if in_flight is not None:
+            await in_flight
+        in_flight = asyncio.create_task(_write_batch(col, batch, ops, stats))
+        await asyncio.sleep(0)  # deixa o lote partir para a thread do Motor
+    if in_flight is not None:
+        await in_flight
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+async def load_performances(
+    docs: Iterable[Dict[str, Any]],
+    mode: str = "upsert",
+    chunk: int = DEFAULT_CHUNK,
+    indexes: bool = True,
+) -> LoadStats:
+    return await load_collection(
+        "performances", docs, performance_doc, _performance_ops,
+        PerformancesRepository().ensure_indexes, mode, chunk, indexes,
+    )
+
+
+async def load_sessions(
+    docs: Iterable[Dict[str, Any]],
+    mode: str = "upsert",
+    chunk: int = DEFAULT_CHUNK,
+    indexes: bool = True,
+) -> LoadStats:
+    return await load_collection(
+        sessions_repo.COLLECTION, docs, session_doc, _session_ops,
+        sessions_repo.ensure_indexes, mode, chunk, indexes,
+    )
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+KINDS = ("theaters", "performances", "sessions")
+
+
+async def run(kind: str, path: Path, mode: str, chunk: int, keep_ids: bool) -> List[LoadStats]:
+    if kind == "all":
+        if not path.is_dir():
+            raise ValueError("`all` espera um diretório com theaters/performances/sessions.ndjson")
+        files = [(k, path / f"{k}.ndjson") for k in KINDS if (path / f"{k}.ndjson").exists()]
+    else:
+        files = [(kind, path)]
+
+    results = []
+    for kind, file in files:
+        docs = iter_documents(file)
+        if kind == "theaters":
+            stats = await load_theaters(docs, mode, chunk, keep_ids)
+        elif kind == "performances":
+            stats = await load_performances(docs, mode, chunk)
+        else:
+            stats = await load_sessions(docs, mode, chunk)
+        print(stats)
+        results.append(stats)
+    await cache.clear()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("kind", choices=(*KINDS, "all"))
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--mode", choices=MODES, default="upsert")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK)
+    parser.add_argument("--keep-ids", action="store_true", help="preserva o `id` dos teatros")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args.kind, args.path, args.mode, args.chunk, args.keep_ids))
+    except ValueError as e:
+        parser.exit(1, f"erro: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
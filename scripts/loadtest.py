@@ -0,0 +1,396 @@
+"""
+scripts/loadtest.py
+Teste de carga ponta a ponta: mix de tráfego configurável sobre os routers
+da API, com p50/p95/p99 e throughput por endpoint.
+
+Alvos:
+  (padrão)          app ASGI em processo (httpx.ASGITransport), com o lifespan
+                    real e os bancos do .env (mongod local + SQLite)
+  --base-url URL    servidor já rodando (uvicorn/gunicorn), via HTTP
+
+Bancos locais:
+  --stand-ins       SQLite temporário + Mongo em memória (mongomock-motor,
+                    dependência só de desenvolvimento). O mongomock roda
+                    síncrono dentro do event loop e varre a coleção a cada
+                    consulta: serve para validar o mix e achar erros, não
+                    para medir latência — números de verdade, só com mongod.
+                    Endpoints que dependem de $text saem do mix.
+  --generate        popula os bancos com dados de scripts/synth_data antes
+                    de medir (escala via --theaters/--performances/…);
+                    para o volume de produção, gere os arquivos com
+                    synth_data e carregue-os antes.
+
+Os ids usados nas URLs são descobertos pela própria API (GET /theaters e
+GET /performances), então o mesmo mix roda contra qualquer alvo.
+
+Uso:
+  python -m scripts.loadtest --stand-ins --generate --duration 20
+  python -m scripts.loadtest --concurrency 64 --mix "performances.get=5,schedule=1"
+  python -m scripts.loadtest --base-url http://localhost:8000 --requests 20000 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+# endpoint → peso relativo
+DEFAULT_MIX = {
+    "theaters.list": 6,
+    "theaters.get": 10,
+    "theaters.nearby": 10,
+    "performances.list": 8,
+    "performances.search": 5,
+    "performances.get": 15,
+    "sessions.list": 4,
+    "sessions.by_performance": 15,
+    "sessions.by_theater": 10,
+    "schedule": 12,
+    "health": 1,
+}
+# endpoints que dependem de operadores que o mongomock não implementa
+NEEDS_REAL_MONGO = {"performances.search"}
+
+SEARCH_TERMS = ["amor", "cidade", "noite", "drama", "musical", "família", "verão", "comédia"]
+
+
+# ── Endpoints ─────────────────────────────────────────────────────────────────
+
+class Context:
+    """Ids e parâmetros que os geradores de requisição sorteiam."""
+
+    def __init__(self, theaters: List[Dict[str, Any]], performance_ids: List[str], window: Tuple[datetime, datetime]):
+        self.theater_ids = [t["id"] for t in theaters]
+        self.points = [(t["lat"], t["lng"]) for t in theaters if t.get("lat") is not None]
+        self.performance_ids = performance_ids
+        self.window = window
+
+    def date_range(self, rng: random.Random, days: int) -> Dict[str, str]:
+        start, end = self.window
+        span = max(0, (end - start).days - days)
+        date_from = start + timedelta(days=rng.randint(0, span))
+        return {"date_from": date_from.isoformat(), "date_to": (date_from + timedelta(days=days)).isoformat()}
+
+
+Request = Tuple[str, Dict[str, Any]]  # (path, query params); todos GET
+
+
+def _nearby(ctx: Context, rng: random.Random) -> Request:
+    lat, lng = rng.choice(ctx.points) if ctx.points else (-23.55, -46.63)
+    return "/theaters/nearby", {
+        "lat": round(lat + rng.gauss(0, 0.02), 5),
+        "lng": round(lng + rng.gauss(0, 0.02), 5),
+        "radius_km": rng.choice([2, 5, 10, 25]),
+    }
+
+
+ENDPOINTS: Dict[str, Callable[[Context, random.Random], Request]] = {
+    "theaters.list": lambda ctx, rng: ("/theaters", {"limit": 50, "skip": rng.choice([0, 0, 50, 100])}),
+    "theaters.get": lambda ctx, rng: (f"/theaters/{rng.choice(ctx.theater_ids)}", {}),
+    "theaters.nearby": _nearby,
+    "performances.list": lambda ctx, rng: ("/performances", {"limit": 50}),
+    "performances.search": lambda ctx, rng: ("/performances", {"q": rng.choice(SEARCH_TERMS), "limit": 20}),
+    "performances.get": lambda ctx, rng: (f"/performances/{rng.choice(ctx.performance_ids)}", {}),
+    "sessions.list": lambda ctx, rng: ("/sessions", {"limit": 100, **ctx.date_range(rng, 7)}),
+    "sessions.by_performance": lambda ctx, rng: (
+        f"/sessions/by-performance/{rng.choice(ctx.performance_ids)}", {"limit": 200},
+    ),
+    "sessions.by_theater": lambda ctx, rng: (
+        f"/sessions/by-theater/{rng.choice(ctx.theater_ids)}", {"limit": 200, **ctx.date_range(rng, 30)},
+    ),
+    "schedule": lambda ctx, rng: ("/schedule", {"limit": 100, **ctx.date_range(rng, 2)}),
+    "health": lambda ctx, rng: ("/health", {}),
+}
+
+
+def parse_mix(text: Optional[str]) -> Dict[str, float]:
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"endpoint desconhecido: {name} (disponíveis: {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# ── Bancos locais ─────────────────────────────────────────────────────────────
+
+def use_stand_ins(workdir: Path) -> None:
+    """
+    Aponta o SQL para um SQLite temporário. Precisa rodar antes de qualquer
+    import de `app` (as settings são lidas no import).
+    """
+    os.environ["SQL_DATABASE_URL"] = f"sqlite+aiosqlite:///{workdir / 'loadtest.db'}"
+
+
+def attach_mongo_stand_in() -> None:
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("--stand-ins requer mongomock-motor (pip install mongomock-motor)")
+    from app.core.config import settings
+    from app.db import mongo
+
+    # connect() é idempotente: com _db preenchido, o lifespan reaproveita este
+    mongo._db = AsyncMongoMockClient(tz_aware=False)[settings.mongodb_db]
+
+
+async def generate(
+    theaters: int,
+    performances: int,
+    sessions_per_performance: int,
+    seed: int,
+    stand_in: bool = False,
+) -> None:
+    """Popula os bancos com os geradores de synth_data via scripts/bulk_load."""
+    from app.db import mongo
+    from app.db.sql import AsyncSessionLocal
+    from app.repositories import sessions_repo
+    from app.repositories.theaters_repo import TheatersRepo
+    from scripts import bulk_load, synth_data
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    await bulk_load.load_theaters(synth_data.generate_theaters(theaters, rng), mode="insert", keep_ids=True)
+    async with AsyncSessionLocal() as session:
+        await TheatersRepo(session).load_geo_index()
+
+    if stand_in:
+        # o mongomock não usa índices nas consultas e checa unicidade com uma
+        # varredura por insert (O(n²) na carga): sem índices no stand-in
+        await mongo.get_collection("performances").drop_indexes()
+        await mongo.get_collection(sessions_repo.COLLECTION).drop_indexes()
+
+    pairs = []
+
+    def performance_docs():
+        for doc in synth_data.generate_performances(performances, rng):
+            pairs.append((str(doc["_id"]), rng.randint(1, theaters)))
+            yield doc
+
+    await bulk_load.load_performances(performance_docs(), mode="insert", indexes=not stand_in)
+    loaded = await bulk_load.load_sessions(
+        synth_data.generate_sessions(pairs, sessions_per_performance, rng),
+        mode="insert", indexes=not stand_in,
+    )
+    print(
+        f"dados: {theaters} teatros, {performances} performances, {loaded.rows} sessões "
+        f"em {time.perf_counter() - started:.1f}s"
+    )
+
+
+@asynccontextmanager
+async def in_process_client(args):
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        if args.generate:
+            await generate(
+                args.theaters, args.performances, args.sessions_per_performance,
+                args.seed, stand_in=args.stand_ins,
+            )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            yield client
+
+
+@asynccontextmanager
+async def http_client(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        yield client
+
+
+# ── Execução ──────────────────────────────────────────────────────────────────
+
+async def discover(client: httpx.AsyncClient) -> Context:
+    theaters = (await client.get("/theaters", params={"limit": 1000})).json()
+    performances = (await client.get("/performances", params={"limit": 1000})).json()
+    if not theaters or not performances:
+        sys.exit("a API não tem teatros/performances: carregue dados ou use --generate")
+    performance_ids = [p.get("_id") or p.get("id") for p in performances]
+    # janela de datas: da primeira à última sessão de uma amostra de performances
+    dates = []
+    for pid in performance_ids[:20]:
+        for s in (await client.get(f"/sessions/by-performance/{pid}", params={"limit": 5000})).json():
+            dates.append(datetime.fromisoformat(s["datetime"].replace("Z", "+00:00")).replace(tzinfo=None))
+    window = (min(dates), max(dates)) if dates else (datetime.now(), datetime.now() + timedelta(days=90))
+    return Context(theaters, performance_ids, window)
+
+
+class Recorder:
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[int, int]] = {}
+
+    def add(self, name: str, seconds: float, status: Optional[int]) -> None:
+        self.latencies.setdefault(name, []).append(seconds)
+        if status is None or status >= 400:
+            self.errors[name] = self.errors.get(name, 0) + 1
+        codes = self.statuses.setdefault(name, {})
+        codes[status or 0] = codes.get(status or 0, 0) + 1
+
+
+async def worker(
+    client: httpx.AsyncClient,
+    ctx: Context,
+    names: List[str],
+    weights: List[float],
+    recorder: Recorder,
+    deadline: float,
+    budget: List[int],
+    rng: random.Random,
+) -> None:
+    while time.perf_counter() < deadline:
+        if budget:
+            if budget[0] <= 0:
+                return
+            budget[0] -= 1
+        name = rng.choices(names, weights)[0]
+        path, params = ENDPOINTS[name](ctx, rng)
+        t0 = time.perf_counter()
+        try:
+            response = await client.get(path, params=params)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = None
+        recorder.add(name, time.perf_counter() - t0, status)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank sobre uma lista já ordenada."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Dict[str, Any]]:
+    rows = {}
+    everything: List[float] = []
+    for name, values in sorted(recorder.latencies.items()):
+        values.sort()
+        everything.extend(values)
+        rows[name] = _row(values, elapsed, recorder.errors.get(name, 0), recorder.statuses[name])
+    everything.sort()
+    rows["total"] = _row(everything, elapsed, sum(recorder.errors.values()), {})
+    return rows
+
+
+def _row(values: List[float], elapsed: float, errors: int, statuses: Dict[int, int]) -> Dict[str, Any]:
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def print_report(rows: Dict[str, Dict[str, Any]], elapsed: float, concurrency: int) -> None:
+    print(f"\n{elapsed:.1f}s, concorrência {concurrency}")
+    print(f"{'endpoint':<26}{'reqs':>8}{'erros':>7}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+    for name, r in rows.items():
+        if name == "total":
+            print("-" * 86)
+        print(
+            f"{name:<26}{r['requests']:>8}{r['errors']:>7}{r['rps']:>9}"
+            f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}"
+        )
+
+
+async def run(args) -> Dict[str, Dict[str, Any]]:
+    mix = parse_mix(args.mix)
+    if args.stand_ins:
+        attach_mongo_stand_in()
+        dropped = [n for n in mix if n in NEEDS_REAL_MONGO]
+        for name in dropped:
+            del mix[name]
+        if dropped:
+            print(f"stand-ins: fora do mix (exigem MongoDB real): {', '.join(dropped)}")
+    names = [n for n, w in mix.items() if w > 0]
+    weights = [mix[n] for n in names]
+
+    client_factory = http_client if args.base_url else in_process_client
+    async with client_factory(args) as client:
+        ctx = await discover(client)
+        rng = random.Random(args.seed)
+        if args.warmup:
+            warm = Recorder()
+            await asyncio.gather(*(
+                worker(client, ctx, names, weights, warm, time.perf_counter() + args.warmup, [], random.Random(rng.random()))
+                for _ in range(args.concurrency)
+            ))
+
+        recorder = Recorder()
+        budget = [args.requests] if args.requests else []
+        deadline = time.perf_counter() + (args.duration if not args.requests else float("inf"))
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            worker(client, ctx, names, weights, recorder, deadline, budget, random.Random(rng.random()))
+            for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    rows = summarize(recorder, elapsed)
+    print_report(rows, elapsed, args.concurrency)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", help="servidor já rodando; sem isso, app em processo")
+    parser.add_argument("--stand-ins", action="store_true", help="SQLite temporário + Mongo em memória")
+    parser.add_argument("--generate", action="store_true", help="popula os bancos antes de medir")
+    parser.add_argument("--theaters", type=int, default=200)
+    parser.add_argument("--performances", type=int, default=500)
+    parser.add_argument("--sessions-per-performance", type=int, default=20)
+    parser.add_argument("--mix", help='pesos por endpoint, ex.: "performances.get=5,schedule=2"')
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30, help="segundos de medição")
+    parser.add_argument("--requests", type=int, default=0, help="nº fixo de requisições (ignora --duration)")
+    parser.add_argument("--warmup", type=float, default=2, help="segundos de aquecimento descartados")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, help="grava o relatório em JSON")
+    args = parser.parse_args()
+
+    if args.base_url and (args.stand_ins or args.generate):
+        parser.error("--stand-ins/--generate só valem para o app em processo")
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+        if args.stand_ins:
+            use_stand_ins(Path(workdir))
+        rows = asyncio.run(run(args))
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            "target": args.base_url or ("in-process/stand-ins" if args.stand_ins else "in-process"),
+            "concurrency": args.concurrency,
+            "mix": parse_mix(args.mix),
+            "results": rows,
+        }, indent=2))
+        print(f"relatório gravado em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+scripts/migrate_indexes.py
+Aplica a migração de índices do MongoDB fora do startup da API
+(útil para construir índices compostos em coleções grandes antes do deploy).
+
+Uso:
+  python -m scripts.migrate_indexes
+"""
+import asyncio
+
+import app.repositories.sessions_repo as sessions_repo
+from app.db.mongo import get_collection
+from app.repositories.performances_repo import PerformancesRepository
+
+
+async def _names(collection: str) -> list:
+    return sorted(await get_collection(collection).index_information())
+
+
+async def migrate() -> None:
+    for collection, ensure in (
+        (sessions_repo.COLLECTION, sessions_repo.ensure_indexes),
+        ("performances", PerformancesRepository().ensure_indexes),
+    ):
+        before = await _names(collection)
+        await ensure()
+        after = await _names(collection)
+        print(f"{collection}:")
+        print(f"  criados:   {sorted(set(after) - set(before)) or '-'}")
+        print(f"  removidos: {sorted(set(before) - set(after)) or '-'}")
+
+
+def main():
+    asyncio.run(migrate())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+scripts/synth_data.py
+Gerador de dados sintéticos em escala de produção (ordem de grandeza:
+10k teatros, 50k performances, milhões de sessões).
+
+Grava três arquivos NDJSON em `--out` (um documento por linha, streaming —
+a memória não cresce com o volume):
+
+  theaters.ndjson      mesmo formato de seeds/theaters.json (address,
+                       location GeoJSON, contacts) + `id` explícito
+  performances.ndjson  Extended JSON ({"$oid"}, {"$date"}), com sinopse,
+                       tags, elenco e ficha técnica
+  sessions.ndjson      {"performance_id", "theater_id", "datetime"} — o
+                       formato aceito por POST /sessions/import
+
+As sessões vêm de regras semanais (dias + horários, temporada de 4 a 20
+semanas) expandidas pelo mesmo `_expand_rules` da API. Com a mesma `--seed`
+a saída é idêntica.
+
+Uso:
+  python -m scripts.synth_data --out data/synth
+  python -m scripts.synth_data --theaters 500 --performances 2000 --out /tmp/small
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from bson import ObjectId, json_util
+
+from app.repositories.theaters_repo import _slugify
+from app.routes.sessions import RulePayload, _expand_rules
+
+# (cidade, UF, lat, lng, peso) — teatros concentrados nas capitais
+CITIES = [
+    ("São Paulo", "SP", -23.5505, -46.6333, 30),
+    ("Rio de Janeiro", "RJ", -22.9068, -43.1729, 20),
+    ("Belo Horizonte", "MG", -19.9167, -43.9345, 8),
+    ("Porto Alegre", "RS", -30.0346, -51.2177, 6),
+    ("Curitiba", "PR", -25.4284, -49.2733, 6),
+    ("Salvador", "BA", -12.9777, -38.5016, 6),
+    ("Recife", "PE", -8.0476, -34.8770, 5),
+    ("Brasília", "DF", -15.7939, -47.8828, 5),
+    ("Fortaleza", "CE", -3.7319, -38.5267, 4),
+    ("Florianópolis", "SC", -27.5954, -48.5480, 3),
+    ("Campinas", "SP", -22.9099, -47.0626, 3),
+    ("Belém", "PA", -1.4558, -48.4902, 2),
+    ("Manaus", "AM", -3.1190, -60.0217, 2),
+]
+NEIGHBORHOODS = ["Centro", "Bela Vista", "Consolação", "Pinheiros", "Botafogo", "Savassi",
+                 "Moinhos de Vento", "Batel", "Barra", "Boa Viagem", "Asa Sul", "Lapa", "Vila Madalena"]
+STREETS = ["Rua Augusta", "Av. Paulista", "Rua da Consolação", "Rua do Catete", "Av. Brasil",
+           "Rua XV de Novembro", "Av. Atlântica", "Rua das Flores", "Av. Sete de Setembro"]
+VENUE_KINDS = ["Teatro", "Espaço", "Centro Cultural", "Sala", "Auditório", "Cia.", "Galpão", "Casa"]
+VENUE_NAMES = ["Municipal", "das Artes", "Oficina", "Ruth Escobar", "Sérgio Cardoso", "Glória",
+               "Ipanema", "Ópera", "São João", "Popular", "Experimental", "do Sesc", "Aurora"]
+
+WORDS = ("amor memória cidade noite mar silêncio corpo família viagem sonho guerra festa "
+         "palavra tempo casa rua mulher homem criança segredo verão inverno luz sombra "
+         "história canção fuga encontro carta jardim").split()
+TAGS = ["drama", "comédia", "musical", "infantil", "dança", "stand-up", "tragédia", "ópera",
+        "improviso", "monólogo", "circo", "performance", "clássico", "contemporâneo"]
+CLASSIFICATIONS = ["L", "10", "12", "14", "16", "18"]
+FIRST = ["Ana", "João", "Maria", "Pedro", "Luíza", "Carlos", "Beatriz", "Rafael", "Júlia",
+         "Marcos", "Fernanda", "Tiago", "Camila", "André", "Letícia", "Bruno", "Helena"]
+LAST = ["Silva", "Souza", "Oliveira", "Santos", "Lima", "Araújo", "Ferreira", "Gomes",
+        "Ribeiro", "Carvalho", "Almeida", "Barbosa", "Rocha", "Dias", "Nascimento"]
+CREW_ROLES = ["Iluminação", "Cenografia", "Figurino", "Trilha sonora", "Produção", "Preparação corporal"]
+SHOW_TIMES = ["15:00", "16:00", "17:00", "19:00", "20:00", "20:30", "21:00", "21:30"]
+
+
+def _person(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+
+
+def _title(rng: random.Random) -> str:
+    words = rng.sample(WORDS, rng.randint(1, 3))
+    article = rng.choice(["O", "A", "Os", "As", "Uma", ""])
+    return " ".join(filter(None, [article, *words])).capitalize()
+
+
+# ── Geradores ─────────────────────────────────────────────────────────────────
+
+def generate_theaters(n: int, rng: random.Random) -> Iterator[Dict[str, Any]]:
+    weights = [c[4] for c in CITIES]
+    seen = set()
+    for i in range(1, n + 1):
+        city, state, lat, lng, _ = rng.choices(CITIES, weights)[0]
+        name = f"{rng.choice(VENUE_KINDS)} {rng.choice(VENUE_NAMES)}"
+        if name in seen:
+            name = f"{name} {rng.choice(NEIGHBORHOODS)} {i}"
+        seen.add(name)
+        yield {
+            "id": i,
+            "name": name,
+            "slug": _slugify(name),
+            "address": {
+                "street": f"{rng.choice(STREETS)}, {rng.randint(1, 3000)}",
+                "neighborhood": rng.choice(NEIGHBORHOODS),
+                "city": city,
+                "state": state,
+                "postal_code": f"{rng.randint(1000, 99999):05d}-{rng.randint(0, 999):03d}",
+                "country": "BR",
+            },
+            # ~5 km de dispersão em torno do centro da cidade
+            "location": {
+                "type": "Point",
+                "coordinates": [round(rng.gauss(lng, 0.05), 6), round(rng.gauss(lat, 0.05), 6)],
+            },
+            "contacts": {
+                "website": f"https://{_slugify(name)}.com.br" if rng.random() < 0.7 else None,
+                "instagram": f"@{_slugify(name).replace('-', '')}" if rng.random() < 0.6 else None,
+                "phone": f"+55 11 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}" if rng.random() < 0.4 else None,
+            },
+        }
+
+
+def generate_performances(n: int, rng: random.Random) -> Iterator[Dict[str, Any]]:
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(n):
+        created = base + timedelta(minutes=rng.randint(0, 60 * 24 * 600))
+        yield {
+            # timestamp do created_at + bytes do rng: determinístico por seed
+            "_id": ObjectId(ObjectId.from_datetime(created).binary[:4] + rng.randbytes(8)),
+            "name": f"{_title(rng)} {i}",
+            "synopsis": " ".join(rng.choices(WORDS, k=rng.randint(25, 80))).capitalize() + ".",
+            "tags": rng.sample(TAGS, rng.randint(1, 4)),
+            "classification": rng.choice(CLASSIFICATIONS),
+            "season": rng.choice([2024, 2025, 2026]),
+            "dramaturgy": [_person(rng) for _ in range(rng.randint(1, 2))],
+            "direction": [_person(rng) for _ in range(rng.randint(1, 2))],
+            "cast": [_person(rng) for _ in range(rng.randint(1, 12))],
+            "crew": [
+                {"role": role, "people": [_person(rng) for _ in range(rng.randint(1, 3))]}
+                for role in rng.sample(CREW_ROLES, rng.randint(1, 4))
+            ],
+            "banner_url": None,
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+def season_rule(
+    performance_id: str,
+    theater_id: int,
+    sessions_per_performance: int,
+    rng: random.Random,
+) -> RulePayload:
+    """Temporada semanal cujo total fica em torno de `sessions_per_performance`."""
+    days = sorted(rng.sample(range(7), rng.randint(1, 5)))
+    times = sorted(rng.sample(SHOW_TIMES, rng.randint(1, 2)))
+    per_week = len(days) * len(times)
+    weeks = max(1, min(52, round(sessions_per_performance / per_week * rng.uniform(0.6, 1.4))))
+    start = date(2025, 1, 6) + timedelta(days=rng.randint(0, 700))
+    return RulePayload(
+        performance_id=performance_id,
+        theater_id=theater_id,
+        start_date=start.isoformat(),
+        end_date=(start + timedelta(weeks=weeks) - timedelta(days=1)).isoformat(),
+        rules={d: times for d in days},
+    )
+
+
+def generate_sessions(
+    performances: List[Tuple[str, int]],
+    sessions_per_performance: int,
+    rng: random.Random,
+) -> Iterator[Dict[str, Any]]:
+    """`performances` = [(performance_id, theater_id)]; sessões em ordem de performance."""
+    for performance_id, theater_id in performances:
+        rule = season_rule(performance_id, theater_id, sessions_per_performance, rng)
+        yield from _expand_rules(rule)
+
+
+# ── Escrita ───────────────────────────────────────────────────────────────────
+
+def _write_ndjson(path: Path, docs: Iterator[Dict[str, Any]], extended: bool = False) -> int:
+    count = 0
+    with path.open("w", encoding="utf-8") as fh:
+        for doc in docs:
+            if extended:
+                line = json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS, ensure_ascii=False)
+            else:
+                line = json.dumps(doc, ensure_ascii=False, default=str)
+            fh.write(line)
+            fh.write("\n")
+            count += 1
+    return count
+
+
+def _session_lines(sessions: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    for s in sessions:
+        yield {
+            "performance_id": s["performance_id"],
+            "theater_id": s["theater_id"],
+            "datetime": s["datetime"].isoformat(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--out", type=Path, default=Path("data/synth"))
+    parser.add_argument("--theaters", type=int, default=10_000)
+    parser.add_argument("--performances", type=int, default=50_000)
+    parser.add_argument("--sessions-per-performance", type=int, default=40,
+                        help="média aproximada (50k × 40 ≈ 2M sessões)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if args.theaters < 1:
+        parser.error("--theaters deve ser >= 1")
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+
+    n = _write_ndjson(args.out / "theaters.ndjson", generate_theaters(args.theaters, rng))
+    print(f"theaters.ndjson:     {n:>10} documentos")
+
+    pairs: List[Tuple[str, int]] = []
+
+    def performances() -> Iterator[Dict[str, Any]]:
+        for doc in generate_performances(args.performances, rng):
+            # parte das temporadas se concentra nos primeiros teatros (cauda longa)
+            if rng.random() < 0.3:
+                theater_id = min(args.theaters, int(rng.paretovariate(1.2)))
+            else:
+                theater_id = rng.randint(1, args.theaters)
+            pairs.append((str(doc["_id"]), theater_id))
+            yield doc
+
+    n = _write_ndjson(args.out / "performances.ndjson", performances(), extended=True)
+    print(f"performances.ndjson: {n:>10} documentos")
+
+    sessions = generate_sessions(pairs, args.sessions_per_performance, rng)
+    n = _write_ndjson(args.out / "sessions.ndjson", _session_lines(sessions))
+    print(f"sessions.ndjson:     {n:>10} documentos")
+    print(f"concluído em {time.perf_counter() - started:.1f}s → {args.out}")
+
+
+if __name__ == "__main__":
+    main()